@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Bulk insert benchmark - построчные INSERT против executemany для Namada схемы
+
+Запуск:
+    python benchmarks/bulk_insert_benchmark.py --rows 100000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from namada_db import NamadaConnectionManager
+from namada_integration_layer import NamadaAnalyticsAdapter, INSERT_TRANSACTION_SQL
+from namada_schema import to_epoch
+
+def generate_rows(count: int):
+    """Генерирует строки для таблицы transactions"""
+    now = datetime.now(timezone.utc).isoformat()
+    now_epoch = to_epoch(now)
+    return [
+        (
+            f"{i:064X}",
+            2789000 + i // 10,
+            now,
+            random.choice(['transfer', 'stake', 'governance', 'complex']),
+            f"tnam1{random.randint(100000, 999999)}",
+            f"tnam1{random.randint(100000, 999999)}",
+            random.uniform(0.1, 1000.0),
+            random.uniform(0.001, 0.01),
+            'confirmed',
+            random.randint(21000, 100000),
+            now_epoch
+        )
+        for i in range(count)
+    ]
+
+def init_schema(db_path: str):
+    """Создает схему так же, как это делает адаптер"""
+    adapter = NamadaAnalyticsAdapter.__new__(NamadaAnalyticsAdapter)
+    adapter.db_path = db_path
+    adapter.db = NamadaConnectionManager(db_path)
+    adapter.init_database()
+    adapter.db.close()
+
+def run_row_by_row(db_path: str, rows, batch_size: int) -> float:
+    """Прежний способ: новое соединение на каждый тик и execute на каждую строку"""
+    started = time.perf_counter()
+    for offset in range(0, len(rows), batch_size):
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        for row in rows[offset:offset + batch_size]:
+            cursor.execute(INSERT_TRANSACTION_SQL, row)
+        conn.commit()
+        conn.close()
+    return time.perf_counter() - started
+
+def run_executemany(db_path: str, rows, batch_size: int) -> float:
+    """Новый способ: долгоживущий писатель и один executemany на тик"""
+    db = NamadaConnectionManager(db_path)
+    started = time.perf_counter()
+    for offset in range(0, len(rows), batch_size):
+        with db.writer() as conn:
+            conn.executemany(INSERT_TRANSACTION_SQL, rows[offset:offset + batch_size])
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='Количество строк')
+    parser.add_argument('--batch-size', type=int, default=100, help='Строк за один тик синхронизации')
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, runner in (('row-by-row', run_row_by_row), ('executemany', run_executemany)):
+            db_path = os.path.join(tmp_dir, f"{name}.db")
+            init_schema(db_path)
+            elapsed = runner(db_path, rows, args.batch_size)
+            results[name] = args.rows / elapsed
+            print(f"{name:>12}: {args.rows} rows in {elapsed:.2f}s ({results[name]:,.0f} rows/sec)")
+
+    print(f"     speedup: {results['executemany'] / results['row-by-row']:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark - ORM to_dict() + jsonify against row tuples + fast JSON provider
+
+Measures one 100-row page of each list endpoint, built the old way (ORM objects,
+to_dict(), stdlib json) and the new way (column SELECT, RowSerializer, and the
+orjson provider when orjson is installed).
+
+Usage:
+    python benchmarks/serialization_benchmark.py --repeat 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import desc, select
+from src.models.anoma_models import db, Resource, Transaction, Intent, Block
+from src.services.data_simulator import AnomaDataSimulator
+from src.services.export import BLOCK_COLUMNS, INTENT_COLUMNS, RESOURCE_COLUMNS, TRANSACTION_COLUMNS
+from src.services.serialization import OrjsonProvider, RowSerializer, orjson, transaction_counts
+
+PAGE_SIZE = 100
+
+ENTITIES = (
+    ('resources', Resource, RESOURCE_COLUMNS, Resource.created_at),
+    ('transactions', Transaction, TRANSACTION_COLUMNS, Transaction.timestamp),
+    ('intents', Intent, INTENT_COLUMNS, Intent.created_at),
+    ('blocks', Block, BLOCK_COLUMNS, Block.height),
+)
+
+def orm_page(model, order_column):
+    """Previous implementation: ORM objects and to_dict()"""
+    items = model.query.order_by(desc(order_column)).limit(PAGE_SIZE).all()
+    return [item.to_dict() for item in items]
+
+def row_page(name, columns, order_column):
+    """New implementation: column SELECT and RowSerializer"""
+    query = select(*columns).order_by(desc(order_column)).limit(PAGE_SIZE)
+    items = RowSerializer(query).many(db.session.execute(query).all())
+    if name == 'transactions':
+        counts = transaction_counts([item['id'] for item in items])
+        for item in items:
+            item.update(counts[item['id']])
+    return items
+
+def measure(build, provider, repeat: int) -> float:
+    """Average milliseconds to build and encode one page"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        db.session.expunge_all()
+        provider.dumps({'items': build()}, separators=(',', ':'))
+    return (time.perf_counter() - started) * 1000 / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200, help='Pages built per measurement')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}"
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            AnomaDataSimulator().populate_database()
+
+            stdlib = DefaultJSONProvider(app)
+            fast = OrjsonProvider(app) if orjson is not None else None
+            print(f"{'entity':>14} {'orm+json':>10} {'rows+json':>10} {'rows+orjson':>12}  (ms per {PAGE_SIZE}-row page)")
+
+            for name, model, columns, order_column in ENTITIES:
+                orm_ms = measure(lambda: orm_page(model, order_column), stdlib, args.repeat)
+                rows_ms = measure(lambda: row_page(name, columns, order_column), stdlib, args.repeat)
+                fast_ms = measure(lambda: row_page(name, columns, order_column), fast, args.repeat) if fast else None
+                fast_text = f"{fast_ms:12.2f}" if fast_ms is not None else f"{'n/a':>12}"
+                print(f"{name:>14} {orm_ms:10.2f} {rows_ms:10.2f} {fast_text}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+WebSocket load test - connections held per process and broadcast latency
+
+Opens --clients Socket.IO connections (websocket transport) to a server
+running the WebSocket service (src/main_original.py or src/websocket_worker.py),
+keeps them open for --hold seconds and reports:
+
+  - connections established, failed and still open at the end;
+  - application heartbeat round trips ('ping' -> 'pong') from a sample of clients;
+  - broadcast latency: receive time minus the server 'timestamp' of every
+    update in data_batch/data_update messages (server and load test must
+    share a clock, i.e. run on the same host).
+
+Broadcasts are only sent when rows are committed, so keep the data sync (or
+the simulator) running while the test holds its connections; --init-data
+starts it through POST /api/init-data first. For tens of
+thousands of connections start the server with WEBSOCKET_ASYNC_MODE=eventlet
+(or gevent) and raise the open file limit on both sides.
+
+Usage:
+    python benchmarks/websocket_load_test.py --url http://localhost:5000 --clients 10000 --hold 60
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import time
+import urllib.request
+from datetime import datetime
+
+import socketio
+
+def percentiles(values, points=(50, 95, 99)):
+    if not values:
+        return 'n/a'
+    ordered = sorted(values)
+    parts = [f"p{p}={ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]:.1f}" for p in points]
+    return ' '.join(parts + [f"max={ordered[-1]:.1f}"]) + ' ms'
+
+def raise_file_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.clients = []
+        self.connect_ms = []
+        self.failed = 0
+        self.disconnected = 0
+        self.broadcast_ms = []
+        self.events = 0
+        self.ping_ms = []
+
+    def _on_updates(self, updates):
+        received = datetime.utcnow()
+        for update in updates if isinstance(updates, list) else [updates]:
+            self.events += 1
+            if update.get('type') == 'initial_data' or not update.get('timestamp'):
+                continue
+            sent = datetime.fromisoformat(update['timestamp'])
+            self.broadcast_ms.append((received - sent).total_seconds() * 1000)
+
+    async def _connect(self, semaphore):
+        client = socketio.AsyncClient(reconnection=False)
+        client.on('data_batch', self._on_updates)
+        client.on('data_update', self._on_updates)
+
+        @client.on('pong')
+        async def on_pong(data):
+            echo = (data or {}).get('echo') or {}
+            if 'sent' in echo:
+                self.ping_ms.append((time.perf_counter() - echo['sent']) * 1000)
+
+        @client.on('disconnect')
+        async def on_disconnect(*args):
+            self.disconnected += 1
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.connect(self.args.url, transports=['websocket'], wait_timeout=30)
+            except Exception:
+                self.failed += 1
+                return
+            self.connect_ms.append((time.perf_counter() - started) * 1000)
+            self.clients.append(client)
+
+    async def _ping_sample(self):
+        while True:
+            await asyncio.sleep(self.args.ping_every)
+            sample = self.clients[::max(1, len(self.clients) // self.args.ping_sample)]
+            for client in sample:
+                if client.connected:
+                    await client.emit('ping', {'sent': time.perf_counter()})
+
+    async def _init_data(self):
+        def post():
+            request = urllib.request.Request(f"{self.args.url}/api/init-data", method='POST')
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return json.loads(response.read()).get('message')
+        print(f"init-data: {await asyncio.get_running_loop().run_in_executor(None, post)}")
+
+    async def run(self):
+        print(f"open file limit: {raise_file_limit()}")
+        if self.args.init_data:
+            await self._init_data()
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(*(self._connect(semaphore) for _ in range(self.args.clients)))
+        print(f"connected {len(self.clients)}/{self.args.clients} in {time.perf_counter() - started:.1f}s "
+              f"(failed {self.failed}); connect {percentiles(self.connect_ms)}")
+
+        pinger = asyncio.ensure_future(self._ping_sample())
+        for elapsed in range(self.args.report_every, self.args.hold + 1, self.args.report_every):
+            await asyncio.sleep(self.args.report_every)
+            print(f"[{elapsed:>4}s] open {len(self.clients) - self.disconnected} "
+                  f"events {self.events} broadcast {percentiles(self.broadcast_ms)} ping {percentiles(self.ping_ms)}")
+        pinger.cancel()
+
+        print(f"held {len(self.clients) - self.disconnected}/{len(self.clients)} connections for {self.args.hold}s")
+        print(f"broadcast latency over {len(self.broadcast_ms)} updates: {percentiles(self.broadcast_ms)}")
+        print(f"heartbeat round trip over {len(self.ping_ms)} pings: {percentiles(self.ping_ms)}")
+        if not self.broadcast_ms:
+            print("no broadcasts received: is ingest running on the server (see --init-data)?")
+        if not self.ping_ms:
+            print("no pongs received: does the server run the WebSocket service (init_websocket)?")
+        await asyncio.gather(*(client.disconnect() for client in self.clients), return_exceptions=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000', help='Socket.IO server URL')
+    parser.add_argument('--clients', type=int, default=1000, help='Connections to open')
+    parser.add_argument('--concurrency', type=int, default=200, help='Connections opened in parallel')
+    parser.add_argument('--hold', type=int, default=60, help='Seconds to keep connections open')
+    parser.add_argument('--report-every', type=int, default=10, help='Seconds between progress lines')
+    parser.add_argument('--ping-every', type=float, default=5, help='Seconds between heartbeat samples')
+    parser.add_argument('--ping-sample', type=int, default=100, help='Clients pinged per heartbeat sample')
+    parser.add_argument('--init-data', action='store_true', help='Start ingest via POST /api/init-data first')
+    args = parser.parse_args()
+
+    asyncio.run(LoadTest(args).run())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Precompress static assets - writes .gz (and .br when brotli is installed) next to each file
+
+Run after building the frontend and copying dist/ into src/static so serve()
+can send the compressed files without compressing on every request:
+
+    python scripts/precompress_static.py src/static
+"""
+
+import argparse
+import gzip
+import mimetypes
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.compression import COMPRESSIBLE_MIMETYPES, brotli
+
+# Compressed copies smaller than this fraction of the original are not worth keeping
+MAX_RATIO = 0.9
+
+def precompress(path: str, min_size: int):
+    """Write compressed siblings of one file; returns (written suffixes, original size)"""
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < min_size:
+        return [], len(data)
+
+    encoders = [('.gz', lambda payload: gzip.compress(payload, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append(('.br', lambda payload: brotli.compress(payload, quality=11)))
+
+    written = []
+    for suffix, encode in encoders:
+        compressed = encode(data)
+        if len(compressed) > len(data) * MAX_RATIO:
+            continue
+        with open(path + suffix, 'wb') as target:
+            target.write(compressed)
+        written.append(f"{suffix} {len(compressed)}")
+    return written, len(data)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help='Static folder to precompress')
+    parser.add_argument('--min-size', type=int, default=1024, help='Skip files smaller than this (bytes)')
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli is not installed, writing .gz files only")
+
+    for root, _, files in os.walk(args.directory):
+        for name in sorted(files):
+            if name.endswith(('.gz', '.br')):
+                continue
+            if mimetypes.guess_type(name)[0] not in COMPRESSIBLE_MIMETYPES:
+                continue
+            path = os.path.join(root, name)
+            written, size = precompress(path, args.min_size)
+            if written:
+                print(f"{os.path.relpath(path, args.directory)} ({size}): {', '.join(written)}")
+
+if __name__ == '__main__':
+    main()
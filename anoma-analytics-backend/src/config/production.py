@@ -32,6 +32,43 @@ class ProductionConfig:
     ENABLE_REAL_DATA = os.environ.get('ENABLE_REAL_DATA', 'true').lower() == 'true'  # TRUE by default
     SYNC_INTERVAL = int(os.environ.get('SYNC_INTERVAL', '5'))  # 5 seconds for real-time updates
     
+    # Retention settings
+    RETENTION_RAW_DAYS = int(os.environ.get('RETENTION_RAW_DAYS', '7'))  # Raw network_stats rows
+    RETENTION_HOURLY_DAYS = int(os.environ.get('RETENTION_HOURLY_DAYS', '90'))  # Hourly rollups
+    RETENTION_HISTORY_DAYS = int(os.environ.get('RETENTION_HISTORY_DAYS', '30'))  # Namada blocks/transactions (0: keep all)
+    RETENTION_INTERVAL = int(os.environ.get('RETENTION_INTERVAL', '3600'))  # Seconds between runs
+    
+    # Response compression (bytes; smaller JSON bodies are sent uncompressed)
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+    
+    # WebSocket server: eventlet/gevent (when installed) hold many idle connections cheaply
+    WEBSOCKET_ASYNC_MODE = os.environ.get('WEBSOCKET_ASYNC_MODE', 'threading')
+    WEBSOCKET_PING_INTERVAL = int(os.environ.get('WEBSOCKET_PING_INTERVAL', '25'))  # seconds
+    WEBSOCKET_PING_TIMEOUT = int(os.environ.get('WEBSOCKET_PING_TIMEOUT', '20'))  # seconds
+    
+    # Event bus: 'memory' for one process; 'socket' lets one ingest process
+    # (EVENT_BUS_ROLE=publisher) feed N websocket workers (EVENT_BUS_ROLE=subscriber)
+    EVENT_BUS_BACKEND = os.environ.get('EVENT_BUS_BACKEND', 'memory')
+    EVENT_BUS_ROLE = os.environ.get('EVENT_BUS_ROLE', 'publisher')
+    EVENT_BUS_ADDRESS = os.environ.get('EVENT_BUS_ADDRESS', '/tmp/anoma-event-bus.sock')  # path or host:port
+    NAMADA_EVENT_BUS_ADDRESS = os.environ.get('NAMADA_EVENT_BUS_ADDRESS', '/tmp/anoma-namada-event-bus.sock')  # main_namada's publisher
+    EVENT_BUS_MAX_QUEUE = int(os.environ.get('EVENT_BUS_MAX_QUEUE', '10000'))  # frames per subscriber
+    
+    # WebSocket delivery (a batch window of 0 sends every update immediately)
+    WEBSOCKET_BATCH_WINDOW = float(os.environ.get('WEBSOCKET_BATCH_WINDOW', '0.25'))  # seconds
+    WEBSOCKET_MAX_EVENTS_PER_SECOND = int(os.environ.get('WEBSOCKET_MAX_EVENTS_PER_SECOND', '200'))  # per client
+    WEBSOCKET_MAX_QUEUE = int(os.environ.get('WEBSOCKET_MAX_QUEUE', '1000'))  # per client
+    WEBSOCKET_REPLAY_SIZE = int(os.environ.get('WEBSOCKET_REPLAY_SIZE', '1000'))  # events kept per topic for resume
+    WEBSOCKET_SNAPSHOT_MAX_AGE = float(os.environ.get('WEBSOCKET_SNAPSHOT_MAX_AGE', '30'))  # seconds; commits invalidate sooner
+    WEBSOCKET_PACKET_LOGGING = os.environ.get('WEBSOCKET_PACKET_LOGGING', 'false').lower() == 'true'
+
+    # Server-Sent Events overview stream (/api/analytics/stream)
+    SSE_HEARTBEAT_INTERVAL = float(os.environ.get('SSE_HEARTBEAT_INTERVAL', '15'))  # seconds
+    SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', '3000'))  # client reconnect delay
+    SSE_REPLAY_SIZE = int(os.environ.get('SSE_REPLAY_SIZE', '1000'))  # deltas kept for Last-Event-ID resume
+    SSE_MAX_QUEUE = int(os.environ.get('SSE_MAX_QUEUE', '100'))  # per stream; a slower client is reconnected
+    SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', '32'))  # per process; keep below gthread --threads (0: no cap)
+
     # API settings
     API_RATE_LIMIT = os.environ.get('API_RATE_LIMIT', '1000 per hour')
     
@@ -8,10 +8,14 @@ from flask_cors import CORS
 import logging
 
 # Import models and services
-from src.models.anoma_models import db
+from src.models.anoma_models import create_missing_indexes, db
 from src.routes.user import user_bp
 from src.routes.analytics import analytics_bp
 from src.services.data_simulator import AnomaDataSimulator
+from src.services.serialization import install_json_provider
+from src.services.compression import init_compression
+from src.services.event_bus import configure_event_bus
+from src.config.production import config
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -30,10 +34,28 @@ def create_app(config_name='production'):
     app.config['ENABLE_REAL_DATA'] = False
     app.config['SYNC_INTERVAL'] = 5  # 5 seconds for real-time updates
     
+    # Overview stream and event bus settings (SSE_*, EVENT_BUS_*)
+    for key, value in vars(config[config_name]).items():
+        if key.startswith(('SSE_', 'EVENT_BUS_')):
+            app.config[key] = value
+    
     # Initialize extensions
     db.init_app(app)
+    install_json_provider(app)
+    init_compression(app)
     CORS(app, origins=["*"])
     
+    # Nothing is ingested here, so /api/analytics/stream only has deltas to send
+    # when this process subscribes to the ingest process (main_original.py)
+    if app.config.get('EVENT_BUS_BACKEND', 'memory') == 'socket':
+        configure_event_bus({
+            'EVENT_BUS_BACKEND': 'socket',
+            'EVENT_BUS_ROLE': 'subscriber',
+            'EVENT_BUS_ADDRESS': app.config.get('EVENT_BUS_ADDRESS')
+        })
+    else:
+        logger.info("No ingest publisher (EVENT_BUS_BACKEND=memory): overview streams send snapshots only")
+    
     # Register blueprints
     app.register_blueprint(user_bp, url_prefix='/api')
     app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
@@ -46,6 +68,7 @@ def create_app(config_name='production'):
         
         # Create tables
         db.create_all()
+        create_missing_indexes()
         
         # Initialize with simulated data
         simulator = AnomaDataSimulator()
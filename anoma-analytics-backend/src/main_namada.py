@@ -5,8 +5,8 @@ Anoma Analytics Backend with Real Namada Data Integration
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-import sqlite3
 import json
+import math
 import threading
 import time
 import logging
@@ -16,7 +16,12 @@ import os
 
 # Добавляем путь к нашим модулям
 sys.path.append('/home/ubuntu')
+# и к пакету src (шина событий и настройки общие с основным бэкендом)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from namada_integration_layer import NamadaAnalyticsAdapter
+from namada_retention import NamadaRetentionJob
+from src.config.production import config
+from src.services.event_bus import configure_event_bus
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -28,11 +33,58 @@ CORS(app)
 # Глобальный адаптер Namada
 namada_adapter = None
 
+# Ограничение числа точек в /api/analytics/stats/network при любом диапазоне
+DEFAULT_NETWORK_STATS_POINTS = 500
+MAX_NETWORK_STATS_POINTS = 2000
+
+# Интервалы network_stats: свежая часть диапазона - из сырых строк, более
+# старая (уже удаленная политикой хранения) - из почасовых, а еще более
+# старая - из посуточных агрегатов. Агрегат берется, только если он целиком
+# старше покрытия более подробного источника, так что отсчеты не дублируются.
+NETWORK_STATS_BUCKETS_SQL = '''
+    SELECT bucket,
+           SUM(tps_sum) * 1.0 / SUM(samples), MIN(tps_min), MAX(tps_max),
+           SUM(apt_sum) * 1.0 / SUM(samples), MIN(apt_min), MAX(apt_max),
+           SUM(active_sum) * 1.0 / SUM(samples), SUM(pending_sum) * 1.0 / SUM(samples), MAX(block_height),
+           SUM(samples)
+    FROM (
+        SELECT timestamp_epoch / :bucket AS bucket, 1 AS samples,
+               tps AS tps_sum, tps AS tps_min, tps AS tps_max,
+               avg_processing_time AS apt_sum, avg_processing_time AS apt_min,
+               avg_processing_time AS apt_max, active_resources AS active_sum,
+               pending_intents AS pending_sum, block_height
+        FROM network_stats
+        WHERE timestamp_epoch >= :since
+        UNION ALL
+        SELECT bucket_epoch / :bucket, samples,
+               tps_avg * samples, tps_min, tps_max,
+               avg_processing_time_avg * samples, avg_processing_time_min, avg_processing_time_max,
+               active_resources_avg * samples, pending_intents_avg * samples, block_height_max
+        FROM network_stats_hourly
+        WHERE bucket_epoch > :since - 3600 AND bucket_epoch <= :raw_start - 3600
+        UNION ALL
+        SELECT bucket_epoch / :bucket, samples,
+               tps_avg * samples, tps_min, tps_max,
+               avg_processing_time_avg * samples, avg_processing_time_min, avg_processing_time_max,
+               active_resources_avg * samples, pending_intents_avg * samples, block_height_max
+        FROM network_stats_daily
+        WHERE bucket_epoch > :since - 86400 AND bucket_epoch <= :hourly_start - 86400
+    )
+    GROUP BY bucket
+    ORDER BY bucket DESC
+'''
+
 def init_namada_adapter():
     """Инициализирует адаптер Namada"""
     global namada_adapter
     try:
-        namada_adapter = NamadaAnalyticsAdapter("namada_analytics.db")
+        # Новые строки после фиксации уходят в шину событий: при
+        # EVENT_BUS_BACKEND=socket их получают websocket-воркеры. Адрес свой,
+        # чтобы не занять сокет издателя main_original.py
+        settings = dict(vars(config['production']))
+        settings['EVENT_BUS_ADDRESS'] = settings['NAMADA_EVENT_BUS_ADDRESS']
+        event_bus = configure_event_bus(settings)
+        namada_adapter = NamadaAnalyticsAdapter("namada_analytics.db", publisher=event_bus)
         logger.info("✅ Namada адаптер инициализирован")
         return True
     except Exception as e:
@@ -53,6 +105,33 @@ def sync_namada_data():
             logger.error(f"❌ Ошибка синхронизации: {e}")
             time.sleep(60)  # При ошибке ждем дольше
 
+def run_retention():
+    """Фоновая очистка и компактификация истории"""
+    # Политика хранения общая с основным бэкендом (RETENTION_* в ProductionConfig)
+    settings = config['production']
+    job = None
+    while True:
+        try:
+            if namada_adapter:
+                if job is None:
+                    job = NamadaRetentionJob(
+                        namada_adapter.db,
+                        raw_days=settings.RETENTION_RAW_DAYS,
+                        hourly_days=settings.RETENTION_HOURLY_DAYS,
+                        history_days=settings.RETENTION_HISTORY_DAYS or None
+                    )
+                result = job.run_once()
+                logger.info(f"🧹 Очистка истории завершена: {result}")
+        except Exception as e:
+            logger.error(f"❌ Ошибка очистки истории: {e}")
+        time.sleep(settings.RETENTION_INTERVAL)
+
+@app.teardown_appcontext
+def release_db_reader(exc):
+    """Возвращает соединение для чтения в пул: app.run() создает поток на каждый запрос"""
+    if namada_adapter:
+        namada_adapter.db.release_reader()
+
 @app.route('/api/analytics/overview', methods=['GET'])
 def get_overview():
     """Получает общую статистику (Dashboard)"""
@@ -80,54 +159,82 @@ def get_overview():
 
 @app.route('/api/analytics/stats/network', methods=['GET'])
 def get_network_stats():
-    """Получает статистику сети"""
+    """Получает статистику сети (с прореживанием по интервалам на стороне БД)"""
     try:
         hours = request.args.get('hours', 24, type=int)
+        max_points = request.args.get('max_points', DEFAULT_NETWORK_STATS_POINTS, type=int)
+        max_points = min(max(max_points, 1), MAX_NETWORK_STATS_POINTS)
+        resolution = request.args.get('resolution', 0, type=int)  # секунд на интервал
         
-        conn = sqlite3.connect(namada_adapter.db_path)
-        cursor = conn.cursor()
+        # Ширина интервала: запрошенная, но не меньше, чем нужно, чтобы уложиться в max_points
+        bucket_seconds = max(resolution, math.ceil(hours * 3600 / max_points), 1)
         
-        # Получаем статистику за указанный период
-        since_time = datetime.now(timezone.utc) - timedelta(hours=hours)
+        cursor = namada_adapter.db.reader().cursor()
         
-        cursor.execute('''
-            SELECT timestamp, tps, avg_processing_time, active_resources, pending_intents, block_height
-            FROM network_stats 
-            WHERE timestamp >= ?
-            ORDER BY timestamp DESC
-        ''', (since_time.isoformat(),))
+        # Получаем статистику за указанный период
+        since_epoch = int((datetime.now(timezone.utc) - timedelta(hours=hours)).timestamp())
+        
+        # Где начинаются сырые строки и почасовые агрегаты (до этого - только агрегаты)
+        now_epoch = int(time.time())
+        raw_start = cursor.execute('SELECT MIN(timestamp_epoch) FROM network_stats').fetchone()[0] or now_epoch
+        hourly_start = cursor.execute('SELECT MIN(bucket_epoch) FROM network_stats_hourly').fetchone()[0] or raw_start
+        
+        # Агрегируем по интервалам (avg/min/max, с весом по числу отсчетов) прямо в SQL
+        cursor.execute(NETWORK_STATS_BUCKETS_SQL, {
+            'bucket': bucket_seconds,
+            'since': since_epoch,
+            'raw_start': raw_start,
+            'hourly_start': hourly_start
+        })
         
         stats = cursor.fetchall()
-        conn.close()
         
         # Форматируем данные
         formatted_stats = []
         for stat in stats:
             formatted_stats.append({
-                "timestamp": stat[0],
+                "timestamp": datetime.fromtimestamp(stat[0] * bucket_seconds, tz=timezone.utc).isoformat(),
                 "tps": stat[1],
-                "avg_processing_time": stat[2],
-                "active_resources": stat[3],
-                "pending_intents": stat[4],
-                "block_height": stat[5]
+                "tps_min": stat[2],
+                "tps_max": stat[3],
+                "avg_processing_time": stat[4],
+                "avg_processing_time_min": stat[5],
+                "avg_processing_time_max": stat[6],
+                "active_resources": round(stat[7]),
+                "pending_intents": round(stat[8]),
+                "block_height": stat[9],
+                "samples": stat[10]
             })
         
-        # Получаем текущие значения
-        current = formatted_stats[0] if formatted_stats else {
-            "tps": 0, "avg_processing_time": 0, 
-            "active_resources": 0, "pending_intents": 0
-        }
+        # Текущие значения и сводка - по сырым строкам (индекс по timestamp_epoch)
+        cursor.execute('''
+            SELECT tps, avg_processing_time, active_resources, pending_intents
+            FROM network_stats 
+            WHERE timestamp_epoch >= ?
+            ORDER BY timestamp_epoch DESC, id DESC
+            LIMIT 1
+        ''', (since_epoch,))
+        latest = cursor.fetchone() or (0, 0, 0, 0)
+        
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(AVG(tps), 0)
+            FROM network_stats 
+            WHERE timestamp_epoch >= ?
+        ''', (since_epoch,))
+        raw_points, avg_tps = cursor.fetchone()
         
         return jsonify({
-            "current_tps": current["tps"],
-            "avg_processing_time": current["avg_processing_time"],
-            "active_resources": current["active_resources"],
-            "pending_intents": current["pending_intents"],
+            "current_tps": latest[0],
+            "avg_processing_time": latest[1],
+            "active_resources": latest[2],
+            "pending_intents": latest[3],
             "historical_data": formatted_stats,
             "summary": {
                 "data_points": len(formatted_stats),
+                "raw_data_points": raw_points,
+                "resolution_seconds": bucket_seconds,
                 "time_range_hours": hours,
-                "avg_tps": sum(s["tps"] for s in formatted_stats) / len(formatted_stats) if formatted_stats else 0
+                "avg_tps": avg_tps
             }
         })
     except Exception as e:
@@ -143,9 +250,9 @@ def get_resources():
         kind_filter = request.args.get('kind')
         status_filter = request.args.get('status')
         owner_filter = request.args.get('owner')
+        match_mode = request.args.get('match_mode', 'substring')
         
-        conn = sqlite3.connect(namada_adapter.db_path)
-        cursor = conn.cursor()
+        cursor = namada_adapter.db.reader().cursor()
         
         # Строим запрос с фильтрами
         where_conditions = []
@@ -158,8 +265,12 @@ def get_resources():
             where_conditions.append("status = ?")
             params.append(status_filter)
         if owner_filter:
-            where_conditions.append("owner LIKE ?")
-            params.append(f"%{owner_filter}%")
+            try:
+                owner_condition, owner_params = namada_adapter.build_owner_filter(owner_filter, match_mode)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            where_conditions.append(owner_condition)
+            params.extend(owner_params)
         
         where_clause = " WHERE " + " AND ".join(where_conditions) if where_conditions else ""
         
@@ -173,12 +284,11 @@ def get_resources():
             SELECT resource_id, kind, owner, status, amount, token_id, decimals,
                    collection, metadata_uri, intent_type, custom_type, created_at, updated_at
             FROM resources{where_clause}
-            ORDER BY created_at DESC
+            ORDER BY created_at_epoch DESC, id DESC
             LIMIT ? OFFSET ?
         ''', params + [per_page, offset])
         
         resources = cursor.fetchall()
-        conn.close()
         
         # Форматируем данные
         formatted_resources = []
@@ -219,8 +329,7 @@ def get_transactions():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        conn = sqlite3.connect(namada_adapter.db_path)
-        cursor = conn.cursor()
+        cursor = namada_adapter.db.reader().cursor()
         
         # Получаем общее количество
         cursor.execute("SELECT COUNT(*) FROM transactions")
@@ -232,12 +341,11 @@ def get_transactions():
             SELECT tx_hash, block_height, timestamp, tx_type, from_address, to_address,
                    amount, fee, status, gas_used
             FROM transactions
-            ORDER BY timestamp DESC
+            ORDER BY timestamp_epoch DESC, id DESC
             LIMIT ? OFFSET ?
         ''', (per_page, offset))
         
         transactions = cursor.fetchall()
-        conn.close()
         
         # Форматируем данные
         formatted_transactions = []
@@ -275,8 +383,7 @@ def get_intents():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        conn = sqlite3.connect(namada_adapter.db_path)
-        cursor = conn.cursor()
+        cursor = namada_adapter.db.reader().cursor()
         
         # Получаем общее количество
         cursor.execute("SELECT COUNT(*) FROM intents")
@@ -288,12 +395,11 @@ def get_intents():
             SELECT intent_id, intent_type, creator, status, target_amount, current_amount,
                    deadline, created_at, updated_at, metadata
             FROM intents
-            ORDER BY created_at DESC
+            ORDER BY created_at_epoch DESC, id DESC
             LIMIT ? OFFSET ?
         ''', (per_page, offset))
         
         intents = cursor.fetchall()
-        conn.close()
         
         # Форматируем данные
         formatted_intents = []
@@ -331,8 +437,7 @@ def get_blocks():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        conn = sqlite3.connect(namada_adapter.db_path)
-        cursor = conn.cursor()
+        cursor = namada_adapter.db.reader().cursor()
         
         # Получаем общее количество
         cursor.execute("SELECT COUNT(*) FROM blocks")
@@ -348,7 +453,6 @@ def get_blocks():
         ''', (per_page, offset))
         
         blocks = cursor.fetchall()
-        conn.close()
         
         # Форматируем данные
         formatted_blocks = []
@@ -397,6 +501,11 @@ def main():
     sync_thread = threading.Thread(target=sync_namada_data, daemon=True)
     sync_thread.start()
     logger.info("🔄 Фоновая синхронизация запущена")
+
+    # Запускаем фоновую очистку истории
+    retention_thread = threading.Thread(target=run_retention, daemon=True)
+    retention_thread.start()
+    logger.info("🧹 Фоновая очистка истории запущена")
     
     # Запускаем Flask приложение
     port = int(os.environ.get('PORT', 8000))
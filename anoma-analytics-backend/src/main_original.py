@@ -3,20 +3,29 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, jsonify
+# Green-thread servers need the stdlib patched before anything else is imported
+from src.services.async_mode import monkey_patch, resolve_async_mode
+ASYNC_MODE = resolve_async_mode()
+monkey_patch(ASYNC_MODE)
+
+from flask import Flask, jsonify
 from flask_cors import CORS
-from flask_socketio import SocketIO
 import asyncio
 import threading
 import logging
 
 # Import models and services
-from src.models.anoma_models import db
+from src.models.anoma_models import create_missing_indexes, db
 from src.routes.user import user_bp
 from src.routes.analytics import analytics_bp
 from src.services.data_simulator import AnomaDataSimulator
 from src.services.anoma_client import AnomaConfig
 from src.services.data_sync import start_data_sync
+from src.services.event_bus import configure_event_bus
+from src.services.retention import RetentionPolicy
+from src.services.serialization import install_json_provider
+from src.services.websocket_service import init_websocket
+from src.services.compression import init_compression, send_static_file
 from src.config.production import config
 
 # Setup logging
@@ -41,16 +50,17 @@ def create_app(config_name='production'):
     
     # Initialize extensions
     db.init_app(app)
+    install_json_provider(app)
+    init_compression(app)
     CORS(app, origins=["*"])
     
-    # Initialize SocketIO for real-time updates
-    socketio = SocketIO(
-        app,
-        cors_allowed_origins="*",
-        async_mode='threading',
-        logger=True,
-        engineio_logger=False
-    )
+    # This process runs the ingest paths, so it is the bus publisher
+    configure_event_bus(app.config)
+    
+    # Real-time updates: the WebSocket service subscribes to the event bus in
+    # this process and pushes rows as the sync writers commit them
+    app.config['WEBSOCKET_ASYNC_MODE'] = ASYNC_MODE
+    socketio = init_websocket(app)
     
     # Register blueprints
     app.register_blueprint(user_bp, url_prefix='/api')
@@ -59,6 +69,7 @@ def create_app(config_name='production'):
     # Create database tables
     with app.app_context():
         db.create_all()
+        create_missing_indexes()
         
     return app, socketio
 
@@ -68,16 +79,6 @@ app, socketio = create_app()
 data_sync_thread = None
 is_syncing = False
 
-@socketio.on('connect')
-def handle_connect():
-    """Handle WebSocket client connection"""
-    logger.info(f"Client connected for real-time updates")
-    
-@socketio.on('disconnect')
-def handle_disconnect():
-    """Handle WebSocket client disconnection"""
-    logger.info(f"Client disconnected from real-time updates")
-
 @app.route('/api/init-data', methods=['POST'])
 def init_data():
     """Initialize database with REAL Anoma data (not simulation)"""
@@ -96,6 +97,11 @@ def init_data():
                 websocket_url=app.config.get('ANOMA_WEBSOCKET_URL', 'ws://localhost:26657/websocket'),
                 indexing_url=app.config.get('ANOMA_INDEXING_URL', 'http://localhost:8080')
             )
+            retention_policy = RetentionPolicy(
+                raw_days=app.config.get('RETENTION_RAW_DAYS', 7),
+                hourly_days=app.config.get('RETENTION_HOURLY_DAYS', 90),
+                interval=app.config.get('RETENTION_INTERVAL', 3600)
+            )
             
             # Start data sync in background thread
             def start_sync():
@@ -105,7 +111,9 @@ def init_data():
                 asyncio.set_event_loop(loop)
                 try:
                     logger.info("🔄 Connecting to Anoma network for real-time data...")
-                    loop.run_until_complete(start_data_sync(anoma_config))
+                    # The sync writers use db.session, which needs an app context
+                    with app.app_context():
+                        loop.run_until_complete(start_data_sync(anoma_config, retention_policy))
                 except Exception as e:
                     logger.error(f"❌ Error in real-time data sync: {e}")
                     # Fallback to simulation if real data fails
@@ -189,12 +197,12 @@ def serve(path):
     if static_folder_path is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
+    if path != "" and os.path.isfile(os.path.join(static_folder_path, path)):
+        return send_static_file(static_folder_path, path)
     else:
         index_path = os.path.join(static_folder_path, 'index.html')
         if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+            return send_static_file(static_folder_path, 'index.html')
         else:
             return "index.html not found", 404
 
@@ -213,6 +221,8 @@ if __name__ == '__main__':
         except Exception as e:
             logger.warning(f"⚠️ Could not auto-initialize data: {e}")
     
-    # Run with SocketIO support for real-time updates
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=True)
+    # Run with SocketIO support for real-time updates; eventlet/gevent bring their
+    # own server, only threading mode falls back to the Werkzeug development server
+    run_options = {'allow_unsafe_werkzeug': True} if ASYNC_MODE == 'threading' else {}
+    socketio.run(app, host='0.0.0.0', port=5000, debug=False, **run_options)
 
@@ -136,7 +136,7 @@ class NetworkStats(db.Model):
     __tablename__ = 'network_stats'
     
     id = db.Column(db.Integer, primary_key=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     total_resources = db.Column(db.Integer, default=0)
     total_transactions = db.Column(db.Integer, default=0)
     total_intents = db.Column(db.Integer, default=0)
@@ -158,3 +158,55 @@ class NetworkStats(db.Model):
             'tps': self.tps
         }
 
+
+class NetworkStatsRollup(db.Model):
+    """Downsampled network_stats bucket produced by the retention job"""
+    __abstract__ = True
+    
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    samples = db.Column(db.Integer, nullable=False)
+    total_resources = db.Column(db.Integer, default=0)  # Max in bucket
+    total_transactions = db.Column(db.Integer, default=0)  # Max in bucket
+    total_intents = db.Column(db.Integer, default=0)  # Max in bucket
+    active_resources = db.Column(db.Float, default=0.0)  # Avg in bucket
+    pending_intents = db.Column(db.Float, default=0.0)  # Avg in bucket
+    avg_processing_time_ms = db.Column(db.Float, default=0.0)
+    avg_processing_time_ms_min = db.Column(db.Float, default=0.0)
+    avg_processing_time_ms_max = db.Column(db.Float, default=0.0)
+    tps = db.Column(db.Float, default=0.0)
+    tps_min = db.Column(db.Float, default=0.0)
+    tps_max = db.Column(db.Float, default=0.0)
+    
+    def to_dict(self):
+        return {
+            'timestamp': self.bucket_start.isoformat() if self.bucket_start else None,
+            'samples': self.samples,
+            'total_resources': self.total_resources,
+            'total_transactions': self.total_transactions,
+            'total_intents': self.total_intents,
+            'active_resources': self.active_resources,
+            'pending_intents': self.pending_intents,
+            'avg_processing_time_ms': self.avg_processing_time_ms,
+            'avg_processing_time_ms_min': self.avg_processing_time_ms_min,
+            'avg_processing_time_ms_max': self.avg_processing_time_ms_max,
+            'tps': self.tps,
+            'tps_min': self.tps_min,
+            'tps_max': self.tps_max
+        }
+
+class NetworkStatsHourly(NetworkStatsRollup):
+    __tablename__ = 'network_stats_hourly'
+
+class NetworkStatsDaily(NetworkStatsRollup):
+    __tablename__ = 'network_stats_daily'
+
+def create_missing_indexes():
+    """Create model indexes that existing tables lack
+    
+    db.create_all() skips tables that already exist, so an index added to a
+    model later (e.g. network_stats.timestamp for the retention job) would
+    only reach new databases. Call after create_all() in an app context.
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
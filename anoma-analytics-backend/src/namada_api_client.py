@@ -4,20 +4,75 @@ Namada API Client - Клиент для получения реальных да
 """
 
 import requests
+import binascii
+import hashlib
 import json
 import time
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 import logging
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Максимум заголовков, которые CometBFT отдает за один вызов `blockchain`
+BLOCKCHAIN_PAGE_SIZE = 20
+
+# Размеры скользящих окон (в блоках) для статистики сети
+NETWORK_STATS_WINDOWS = (5, 100, 1000)
+
+# Примерное время блока в Namada, пока в окне меньше двух блоков
+DEFAULT_BLOCK_TIME = 6.0
+
+class BlockCache:
+    """LRU-кэш блоков по высоте
+    
+    Финализированные блоки CometBFT неизменяемы, поэтому блок, однажды
+    полученный по высоте, можно переиспользовать без повторного RPC вызова.
+    """
+    
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+    def get(self, height: int) -> Optional[Dict]:
+        """Возвращает блок из кэша (или None) и помечает его как недавно использованный"""
+        with self._lock:
+            block = self._blocks.get(height)
+            if block is None:
+                self.misses += 1
+                return None
+            self._blocks.move_to_end(height)
+            self.hits += 1
+            return block
+            
+    def put(self, height: int, block: Dict):
+        """Кладет блок в кэш, вытесняя самые давно использованные"""
+        with self._lock:
+            self._blocks[height] = block
+            self._blocks.move_to_end(height)
+            while len(self._blocks) > self.max_size:
+                self._blocks.popitem(last=False)
+                
+    def clear(self):
+        """Очищает кэш"""
+        with self._lock:
+            self._blocks.clear()
+            
+    def __len__(self) -> int:
+        return len(self._blocks)
+
 class NamadaAPIClient:
     """Клиент для работы с Namada RPC API"""
     
-    def __init__(self, rpc_url: str = "https://namada-mainnet-rpc.itrocket.net"):
+    def __init__(self, rpc_url: str = "https://namada-mainnet-rpc.itrocket.net",
+                 block_cache_size: int = 256, status_ttl: float = 5.0):
         self.rpc_url = rpc_url
         self.session = requests.Session()
         self.session.headers.update({
@@ -25,6 +80,16 @@ class NamadaAPIClient:
             'User-Agent': 'Anoma-Analytics/1.0'
         })
         
+        # Общий кэш блоков: им пользуются и NamadaDataProcessor, и интеграционный слой
+        self.block_cache = BlockCache(block_cache_size)
+        self.header_cache = BlockCache(block_cache_size)
+        
+        # Статус ноды меняется с каждым блоком, поэтому кэшируем его ненадолго
+        self.status_ttl = status_ttl
+        self._status = None
+        self._status_fetched_at = 0.0
+        self._status_lock = threading.Lock()
+        
     def _make_rpc_call(self, method: str, params: List[Any] = None) -> Dict:
         """Выполняет RPC вызов к Namada ноде"""
         if params is None:
@@ -55,20 +120,43 @@ class NamadaAPIClient:
             logger.error(f"JSON decode error: {e}")
             return None
     
-    def get_status(self) -> Optional[Dict]:
-        """Получает статус ноды"""
-        return self._make_rpc_call("status")
+    def get_status(self, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Получает статус ноды (результат кэшируется на status_ttl секунд)"""
+        ttl = self.status_ttl if max_age is None else max_age
+        
+        with self._status_lock:
+            if self._status and time.monotonic() - self._status_fetched_at < ttl:
+                return self._status
+                
+            status = self._make_rpc_call("status")
+            if status:
+                self._status = status
+                self._status_fetched_at = time.monotonic()
+            return status
+    
+    def get_latest_height(self) -> Optional[int]:
+        """Возвращает высоту последнего блока по (кэшированному) статусу"""
+        status = self.get_status()
+        if not status:
+            return None
+        return int(status['sync_info']['latest_block_height'])
     
     def get_block(self, height: Optional[int] = None) -> Optional[Dict]:
         """Получает блок по высоте (если не указана - последний)"""
         if height is None:
             # Сначала получаем статус для определения последней высоты
-            status = self.get_status()
-            if not status:
+            height = self.get_latest_height()
+            if height is None:
                 return None
-            height = int(status['sync_info']['latest_block_height'])
+                
+        block = self.block_cache.get(height)
+        if block is not None:
+            return block
             
-        return self._make_rpc_call("block", [str(height)])
+        block = self._make_rpc_call("block", [str(height)])
+        if block:
+            self.block_cache.put(height, block)
+        return block
     
     def get_block_results(self, height: int) -> Optional[Dict]:
         """Получает результаты выполнения блока"""
@@ -86,12 +174,157 @@ class NamadaAPIClient:
     def get_blockchain_info(self, min_height: int, max_height: int) -> Optional[Dict]:
         """Получает информацию о блокчейне в диапазоне высот"""
         return self._make_rpc_call("blockchain", [str(min_height), str(max_height)])
+    
+    def get_block_metas(self, min_height: int, max_height: int) -> List[Dict]:
+        """Получает заголовки блоков (block_metas) в диапазоне высот
+        
+        Недостающие в кэше высоты запрашиваются через `blockchain` пачками
+        до BLOCKCHAIN_PAGE_SIZE штук. Результат отсортирован по убыванию высоты.
+        """
+        metas = {}
+        missing = []
+        for height in range(max_height, min_height - 1, -1):
+            meta = self.header_cache.get(height)
+            if meta is None:
+                missing.append(height)
+            else:
+                metas[height] = meta
+                
+        # Группируем недостающие высоты в непрерывные отрезки не длиннее страницы
+        i = 0
+        while i < len(missing):
+            top = missing[i]
+            j = i
+            while (j + 1 < len(missing) and missing[j + 1] == missing[j] - 1
+                   and top - missing[j + 1] < BLOCKCHAIN_PAGE_SIZE):
+                j += 1
+                
+            result = self.get_blockchain_info(missing[j], top)
+            for meta in (result or {}).get('block_metas', []):
+                height = int(meta['header']['height'])
+                self.header_cache.put(height, meta)
+                metas[height] = meta
+            i = j + 1
+            
+        return [metas[height] for height in sorted(metas, reverse=True)]
+
+def compute_tx_hashes(transactions: List[str]) -> List[str]:
+    """Вычисляет хеши транзакций блока так же, как CometBFT
+    
+    Хеш - SHA-256 от байтов транзакции (base64 из RPC), в верхнем регистре hex.
+    Он детерминирован между процессами, поэтому годится для дедупликации.
+    """
+    sha256 = hashlib.sha256
+    a2b_base64 = binascii.a2b_base64
+    hashes = []
+    for tx_data in transactions:
+        try:
+            raw = a2b_base64(tx_data)
+        except (binascii.Error, ValueError):
+            # Некорректный base64 - хешируем строку как есть
+            raw = tx_data.encode('utf-8')
+        hashes.append(sha256(raw).hexdigest().upper())
+    return hashes
+
+class BlockWindow:
+    """Скользящее окно последних блоков (время и число транзакций)
+    
+    Суммы и гистограмма интервалов между блоками обновляются инкрементально,
+    поэтому добавление блока стоит O(1) и не требует повторных RPC вызовов.
+    """
+    
+    def __init__(self, size: int, bin_width: float = 0.1, max_interval: float = 120.0):
+        self.size = size
+        self.bin_width = bin_width
+        self._blocks = deque()     # (height, timestamp, tx_count)
+        self._intervals = deque()  # интервал перед каждым блоком, кроме первого
+        self._histogram = [0] * (int(max_interval / bin_width) + 1)
+        self.tx_total = 0
+        
+    def push(self, height: int, timestamp: float, tx_count: int):
+        """Добавляет новый блок в окно, вытесняя самый старый"""
+        if self._blocks:
+            last_height, last_timestamp, _ = self._blocks[-1]
+            if height <= last_height:
+                return
+            # При пропуске высот берем средний интервал на блок
+            interval = max(timestamp - last_timestamp, 0.0) / (height - last_height)
+            self._intervals.append(interval)
+            self._histogram[self._bin(interval)] += 1
+            
+        self._blocks.append((height, timestamp, tx_count))
+        self.tx_total += tx_count
+        
+        if len(self._blocks) > self.size:
+            _, _, old_tx_count = self._blocks.popleft()
+            self.tx_total -= old_tx_count
+            self._histogram[self._bin(self._intervals.popleft())] -= 1
+            
+    def _bin(self, interval: float) -> int:
+        return min(int(interval / self.bin_width), len(self._histogram) - 1)
+        
+    @property
+    def count(self) -> int:
+        return len(self._blocks)
+        
+    @property
+    def latest_height(self) -> int:
+        return self._blocks[-1][0] if self._blocks else 0
+        
+    def average_block_time(self) -> float:
+        """Среднее время между блоками окна"""
+        if len(self._blocks) < 2:
+            return DEFAULT_BLOCK_TIME
+        first_height, first_timestamp, _ = self._blocks[0]
+        last_height, last_timestamp, _ = self._blocks[-1]
+        return (last_timestamp - first_timestamp) / (last_height - first_height)
+        
+    def tps(self) -> float:
+        """Транзакций в секунду по окну"""
+        avg_block_time = self.average_block_time()
+        if avg_block_time <= 0 or not self._blocks:
+            return 0
+        return self.tx_total / (len(self._blocks) * avg_block_time)
+        
+    def block_time_percentile(self, percentile: float) -> float:
+        """Перцентиль времени блока по гистограмме интервалов (точность - bin_width)"""
+        if not self._intervals:
+            return DEFAULT_BLOCK_TIME
+            
+        rank = percentile / 100.0 * len(self._intervals)
+        seen = 0
+        for index, count in enumerate(self._histogram):
+            seen += count
+            if count and seen >= rank:
+                return round((index + 0.5) * self.bin_width, 3)
+        return round((len(self._histogram) - 0.5) * self.bin_width, 3)
+        
+    def summary(self) -> Dict:
+        """Сводка по окну для API"""
+        return {
+            'blocks': self.count,
+            'transactions': self.tx_total,
+            'tps': self.tps(),
+            'average_block_time': self.average_block_time(),
+            'block_time_p50': self.block_time_percentile(50),
+            'block_time_p90': self.block_time_percentile(90),
+            'block_time_p99': self.block_time_percentile(99)
+        }
 
 class NamadaDataProcessor:
     """Обработчик данных Namada для преобразования в формат аналитики"""
     
-    def __init__(self, api_client: NamadaAPIClient):
+    def __init__(self, api_client: NamadaAPIClient, window_sizes=NETWORK_STATS_WINDOWS,
+                 window_bootstrap: int = BLOCKCHAIN_PAGE_SIZE):
         self.api = api_client
+        # Хеши транзакций по высоте блока: блоки неизменяемы, хешируем один раз
+        self._tx_hash_cache = BlockCache(api_client.block_cache.max_size)
+        
+        # Скользящие окна статистики; при старте заполняем не больше window_bootstrap
+        # блоков, дальше окна растут по мере появления новых высот
+        self.windows = {size: BlockWindow(size) for size in sorted(window_sizes)}
+        self.window_bootstrap = window_bootstrap
+        self._window_height = 0
         
     def process_block_to_analytics(self, block_data: Dict) -> Dict:
         """Преобразует данные блока в формат для аналитики"""
@@ -109,10 +342,15 @@ class NamadaDataProcessor:
         tx_count = len(transactions)
         
         # Анализируем транзакции
-        tx_analysis = self._analyze_transactions(transactions)
+        height = int(header['height'])
+        tx_hashes = self._tx_hash_cache.get(height)
+        if tx_hashes is None:
+            tx_hashes = compute_tx_hashes(transactions)
+            self._tx_hash_cache.put(height, tx_hashes)
+        tx_analysis = self._analyze_transactions(transactions, tx_hashes)
         
         return {
-            'block_height': int(header['height']),
+            'block_height': height,
             'block_hash': header['last_block_id']['hash'] if header.get('last_block_id') else '',
             'timestamp': block_time.isoformat(),
             'proposer_address': header.get('proposer_address', ''),
@@ -124,14 +362,62 @@ class NamadaDataProcessor:
             'data_hash': header.get('data_hash', '')
         }
     
-    def _analyze_transactions(self, transactions: List[str]) -> List[Dict]:
+    def process_block_meta_to_analytics(self, block_meta: Dict) -> Dict:
+        """Преобразует заголовок блока (из `blockchain`) в формат для аналитики
+        
+        Формат совпадает с process_block_to_analytics, но без тел транзакций.
+        """
+        if not block_meta or 'header' not in block_meta:
+            return None
+            
+        header = block_meta['header']
+        block_time = datetime.fromisoformat(header['time'].replace('Z', '+00:00'))
+        
+        return {
+            'block_height': int(header['height']),
+            'block_hash': header['last_block_id']['hash'] if header.get('last_block_id') else '',
+            'timestamp': block_time.isoformat(),
+            'proposer_address': header.get('proposer_address', ''),
+            'transaction_count': int(block_meta.get('num_txs', 0)),
+            'transactions': [],
+            'block_size': int(block_meta.get('block_size', 0)),
+            'chain_id': header.get('chain_id', ''),
+            'app_hash': header.get('app_hash', ''),
+            'data_hash': header.get('data_hash', '')
+        }
+    
+    def iter_blocks(self, min_height: int, max_height: int,
+                    with_transactions: bool = False) -> Iterator[Dict]:
+        """Перебирает блоки диапазона от новых к старым
+        
+        По умолчанию работает только с заголовками (вызов `blockchain`).
+        С with_transactions=True полный блок запрашивается лишь для высот,
+        в которых есть транзакции.
+        """
+        for meta in self.api.get_block_metas(min_height, max_height):
+            block_data = self.process_block_meta_to_analytics(meta)
+            if not block_data:
+                continue
+                
+            if with_transactions and block_data['transaction_count'] > 0:
+                block = self.api.get_block(block_data['block_height'])
+                full_data = self.process_block_to_analytics(block) if block else None
+                if full_data:
+                    full_data['block_size'] = block_data['block_size']
+                    block_data = full_data
+                    
+            yield block_data
+    
+    def _analyze_transactions(self, transactions: List[str],
+                              tx_hashes: Optional[List[str]] = None) -> List[Dict]:
         """Анализирует транзакции в блоке"""
+        if tx_hashes is None:
+            tx_hashes = compute_tx_hashes(transactions)
+            
         analyzed_txs = []
         
-        for i, tx_data in enumerate(transactions):
+        for i, (tx_data, tx_hash) in enumerate(zip(transactions, tx_hashes)):
             # Базовый анализ транзакции (в реальности нужно декодировать)
-            tx_hash = f"tx_{i}_{hash(tx_data) % 1000000}"
-            
             # Определяем тип транзакции (упрощенно)
             tx_type = self._determine_tx_type(tx_data)
             
@@ -157,6 +443,24 @@ class NamadaDataProcessor:
         else:
             return "complex"
     
+    def _advance_windows(self, latest_height: int):
+        """Добавляет в скользящие окна блоки, появившиеся с прошлого вызова"""
+        if self._window_height:
+            start_height = self._window_height + 1
+        else:
+            start_height = latest_height - self.window_bootstrap + 1
+        start_height = max(start_height, latest_height - max(self.windows) + 1, 1)
+        
+        if start_height > latest_height:
+            return
+            
+        new_blocks = list(self.iter_blocks(start_height, latest_height))
+        for block in reversed(new_blocks):  # от старых к новым
+            timestamp = datetime.fromisoformat(block['timestamp']).timestamp()
+            for window in self.windows.values():
+                window.push(block['block_height'], timestamp, block['transaction_count'])
+            self._window_height = block['block_height']
+    
     def get_network_stats(self) -> Dict:
         """Получает статистику сети"""
         status = self.api.get_status()
@@ -166,73 +470,47 @@ class NamadaDataProcessor:
         sync_info = status['sync_info']
         latest_height = int(sync_info['latest_block_height'])
         
-        # Получаем несколько последних блоков для анализа
-        recent_blocks = []
-        for i in range(5):  # Последние 5 блоков
-            height = latest_height - i
-            if height > 0:
-                block = self.api.get_block(height)
-                if block:
-                    recent_blocks.append(self.process_block_to_analytics(block))
+        # Дочитываем только новые заголовки и сдвигаем окна
+        self._advance_windows(latest_height)
         
-        # Вычисляем статистику
-        if recent_blocks:
-            total_txs = sum(b['transaction_count'] for b in recent_blocks if b)
-            avg_block_time = self._calculate_avg_block_time(recent_blocks)
-            
+        # Основные метрики - по самому короткому окну
+        window = self.windows[min(self.windows)]
+        if window.count:
             return {
                 'current_height': latest_height,
                 'latest_block_time': sync_info['latest_block_time'],
-                'total_recent_transactions': total_txs,
-                'average_block_time': avg_block_time,
-                'tps': total_txs / (5 * avg_block_time) if avg_block_time > 0 else 0,
+                'total_recent_transactions': window.tx_total,
+                'average_block_time': window.average_block_time(),
+                'tps': window.tps(),
                 'chain_id': status['node_info']['network'],
                 'node_version': status['node_info']['version'],
-                'catching_up': sync_info['catching_up']
+                'catching_up': sync_info['catching_up'],
+                'windows': {size: w.summary() for size, w in self.windows.items()}
             }
         
         return {}
     
-    def _calculate_avg_block_time(self, blocks: List[Dict]) -> float:
-        """Вычисляет среднее время между блоками"""
-        if len(blocks) < 2:
-            return 6.0  # Примерное время блока в Namada
-            
-        times = []
-        for i in range(len(blocks) - 1):
-            if blocks[i] and blocks[i+1]:
-                t1 = datetime.fromisoformat(blocks[i]['timestamp'])
-                t2 = datetime.fromisoformat(blocks[i+1]['timestamp'])
-                diff = abs((t1 - t2).total_seconds())
-                times.append(diff)
-        
-        return sum(times) / len(times) if times else 6.0
-    
     def get_recent_transactions(self, limit: int = 50) -> List[Dict]:
         """Получает последние транзакции"""
-        status = self.api.get_status()
-        if not status:
+        latest_height = self.api.get_latest_height()
+        if latest_height is None:
             return []
             
-        latest_height = int(status['sync_info']['latest_block_height'])
         transactions = []
         
-        # Ищем транзакции в последних блоках
-        for height in range(latest_height, max(latest_height - 20, 1), -1):
+        # Ищем транзакции в последних блоках (полные блоки - только с транзакциями)
+        for block_data in self.iter_blocks(max(latest_height - 19, 2), latest_height,
+                                           with_transactions=True):
             if len(transactions) >= limit:
                 break
                 
-            block = self.api.get_block(height)
-            if block:
-                block_data = self.process_block_to_analytics(block)
-                if block_data and block_data['transactions']:
-                    for tx in block_data['transactions']:
-                        tx['block_height'] = height
-                        tx['timestamp'] = block_data['timestamp']
-                        transactions.append(tx)
-                        
-                        if len(transactions) >= limit:
-                            break
+            for tx in block_data['transactions']:
+                tx['block_height'] = block_data['block_height']
+                tx['timestamp'] = block_data['timestamp']
+                transactions.append(tx)
+                
+                if len(transactions) >= limit:
+                    break
         
         return transactions[:limit]
 
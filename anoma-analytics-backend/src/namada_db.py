@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Namada DB - Управление соединениями SQLite для Namada Analytics
+"""
+
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class NamadaConnectionManager:
+    """Менеджер соединений SQLite
+
+    Держит одно долгоживущее соединение для записи (синхронизация) и пул
+    соединений для чтения (API). Поток берет читателя из пула при первом
+    reader() и возвращает его через release_reader() (по завершении запроса),
+    так что потоки-на-запрос не копят открытые соединения: в пуле остается
+    не больше max_idle_readers свободных, лишние закрываются. В режиме WAL
+    читатели не ждут писателя, а писатель не ждет читателей.
+    """
+
+    def __init__(self, db_path: str, mmap_size: int = 256 * 1024 * 1024,
+                 busy_timeout_ms: int = 5000, cached_statements: int = 256,
+                 max_idle_readers: int = 8):
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self.max_idle_readers = max_idle_readers
+
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = []  # все открытые читатели (для close())
+        self._idle_readers = []  # свободные читатели пула
+        self._readers_lock = threading.Lock()
+
+    def _open(self, readonly: bool = False) -> sqlite3.Connection:
+        """Открывает соединение и применяет настройки"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            isolation_level=None  # транзакциями управляем явно
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        if readonly:
+            conn.execute('PRAGMA query_only=ON')
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """Соединение-писатель внутри транзакции (COMMIT или ROLLBACK по выходу)"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._open()
+
+            conn = self._writer
+            if conn.in_transaction:
+                # Вложенный вызов - работаем в уже открытой транзакции
+                yield conn
+                return
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            else:
+                conn.execute('COMMIT')
+
+    @contextmanager
+    def maintenance(self):
+        """Соединение-писатель вне транзакции (для VACUUM и подобных команд)"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._open()
+            yield self._writer
+
+    def reader(self) -> sqlite3.Connection:
+        """Соединение для чтения, закрепленное за текущим потоком до release_reader()"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._readers_lock:
+                conn = self._idle_readers.pop() if self._idle_readers else None
+            if conn is None:
+                conn = self._open(readonly=True)
+                with self._readers_lock:
+                    self._readers.append(conn)
+            self._local.conn = conn
+        return conn
+
+    def release_reader(self):
+        """Возвращает читателя текущего потока в пул (или закрывает, если пул полон)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._readers_lock:
+            if len(self._idle_readers) < self.max_idle_readers:
+                self._idle_readers.append(conn)
+                return
+            self._readers.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Ошибка закрытия соединения: {e}")
+
+    def reader_count(self) -> int:
+        """Число открытых соединений для чтения"""
+        with self._readers_lock:
+            return len(self._readers)
+
+    def close(self):
+        """Закрывает все соединения"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        with self._readers_lock:
+            for conn in self._readers:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Ошибка закрытия соединения: {e}")
+            self._readers.clear()
+            self._idle_readers.clear()
+        self._local = threading.local()
@@ -3,31 +3,100 @@
 Namada Integration Layer - Адаптер данных Namada для Anoma Analytics
 """
 
-import sqlite3
 import json
 import time
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import random
 import logging
 from namada_api_client import NamadaAPIClient, NamadaDataProcessor
+from namada_db import NamadaConnectionManager
+from namada_schema import REFRESH_DASHBOARD_SNAPSHOT_SQL, has_table, migrate, to_epoch
 
 logger = logging.getLogger(__name__)
 
+# Режимы поиска ресурсов по владельцу
+OWNER_MATCH_MODES = ('exact', 'prefix', 'substring')
+
+# Запросы записи - константы, чтобы долгоживущее соединение-писатель
+# переиспользовало подготовленные выражения из своего кэша между синхронизациями
+# Имена столбцов в порядке параметров INSERT - по ним записанные строки
+# превращаются в словари для публикации подписчикам
+# Статистика публикуется под именами схемы обзора (см. STATS_OVERVIEW_FIELDS в
+# src/services/overview_stream.py): тема 'stats' общая с основным приложением.
+# total_transactions здесь - число транзакций в последних блоках, а не итог,
+# поэтому публикуется как recent_transactions и не затирает общий счетчик
+NETWORK_STATS_EVENT_COLUMNS = ('timestamp', 'tps', 'avg_processing_time_ms', 'active_resources',
+                               'pending_intents', 'block_height', 'recent_transactions', 'timestamp_epoch')
+BLOCK_COLUMNS = ('block_height', 'block_hash', 'timestamp', 'proposer', 'transaction_count',
+                 'size', 'timestamp_epoch')
+TRANSACTION_COLUMNS = ('tx_hash', 'block_height', 'timestamp', 'tx_type', 'from_address', 'to_address',
+                       'amount', 'fee', 'status', 'gas_used', 'timestamp_epoch')
+RESOURCE_COLUMNS = ('resource_id', 'kind', 'owner', 'status', 'amount', 'token_id', 'decimals',
+                    'collection', 'metadata_uri', 'intent_type', 'custom_type', 'created_at', 'updated_at',
+                    'created_at_epoch')
+INTENT_COLUMNS = ('intent_id', 'intent_type', 'creator', 'status', 'target_amount', 'current_amount',
+                  'deadline', 'created_at', 'updated_at', 'metadata', 'created_at_epoch')
+
+INSERT_NETWORK_STATS_SQL = '''
+    INSERT INTO network_stats 
+    (timestamp, tps, avg_processing_time, active_resources, pending_intents, 
+     block_height, total_transactions, timestamp_epoch)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_BLOCK_SQL = '''
+    INSERT OR REPLACE INTO blocks 
+    (block_height, block_hash, timestamp, proposer, transaction_count, size, timestamp_epoch)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_TRANSACTION_SQL = '''
+    INSERT OR REPLACE INTO transactions 
+    (tx_hash, block_height, timestamp, tx_type, from_address, to_address, 
+     amount, fee, status, gas_used, timestamp_epoch)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_RESOURCE_SQL = '''
+    INSERT OR IGNORE INTO resources 
+    (resource_id, kind, owner, status, amount, token_id, decimals, 
+     collection, metadata_uri, intent_type, custom_type, created_at, updated_at,
+     created_at_epoch)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_INTENT_SQL = '''
+    INSERT OR IGNORE INTO intents 
+    (intent_id, intent_type, creator, status, target_amount, current_amount,
+     deadline, created_at, updated_at, metadata, created_at_epoch)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
 class NamadaAnalyticsAdapter:
     """Адаптер для преобразования данных Namada в формат Anoma Analytics"""
     
-    def __init__(self, db_path: str = "anoma_analytics.db"):
+    def __init__(self, db_path: str = "anoma_analytics.db", publisher=None):
         self.db_path = db_path
+        # Необязательный получатель новых строк: любой объект с методом
+        # publish(topic, payload), например src.services.event_bus.event_bus
+        self.publisher = publisher
+        self.db = NamadaConnectionManager(db_path)
         self.namada_client = NamadaAPIClient()
         self.namada_processor = NamadaDataProcessor(self.namada_client)
         self.init_database()
         
     def init_database(self):
         """Инициализирует базу данных"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            self._create_tables(cursor)
+            # Доводим схему до актуальной версии (в т.ч. старые БД на месте)
+            migrate(cursor)
+            self.owner_fts_enabled = has_table(cursor, 'resources_owner_fts')
+            
+    def _create_tables(self, cursor):
+        """Создает таблицы схемы"""
         # Создаем таблицы если их нет
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS network_stats (
@@ -109,34 +178,53 @@ class NamadaAnalyticsAdapter:
             )
         ''')
         
-        conn.commit()
-        conn.close()
-        
     def sync_with_namada(self):
         """Синхронизирует данные с Namada блокчейном"""
         logger.info("🔄 Начинаю синхронизацию с Namada...")
         
-        # Получаем статистику сети
+        # Сначала выполняем все сетевые запросы, чтобы не держать транзакцию записи
         network_stats = self.namada_processor.get_network_stats()
-        if network_stats:
-            self._update_network_stats(network_stats)
-            
-        # Получаем последние блоки
-        self._sync_recent_blocks()
+        blocks = self._fetch_recent_blocks()
+        transactions = self.namada_processor.get_recent_transactions(100)
         
-        # Получаем последние транзакции
-        self._sync_recent_transactions()
+        # Затем записываем все одной транзакцией
+        with self.db.writer() as conn:
+            cursor = conn.cursor()
+            written = {}
+            
+            # Статистика сети
+            if network_stats:
+                written['stats'] = (NETWORK_STATS_EVENT_COLUMNS, [self._update_network_stats(cursor, network_stats)])
+                
+            # Последние блоки
+            written['blocks'] = (BLOCK_COLUMNS, self._sync_recent_blocks(cursor, blocks))
+            
+            # Последние транзакции
+            written['transactions'] = (TRANSACTION_COLUMNS, self._sync_recent_transactions(cursor, transactions))
+            
+            # Генерируем дополнительные данные на основе реальных
+            resource_rows, intent_rows = self._generate_enhanced_data(cursor, network_stats)
+            written['resources'] = (RESOURCE_COLUMNS, resource_rows)
+            written['intents'] = (INTENT_COLUMNS, intent_rows)
+            
+            # Обновляем снимок Dashboard в той же транзакции
+            cursor.execute(REFRESH_DASHBOARD_SNAPSHOT_SQL)
         
-        # Генерируем дополнительные данные на основе реальных
-        self._generate_enhanced_data(network_stats)
+        # Публикуем только после фиксации транзакции
+        self._publish_written(written)
         
         logger.info("✅ Синхронизация завершена")
         
-    def _update_network_stats(self, stats: Dict):
-        """Обновляет статистику сети"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _publish_written(self, written: Dict[str, Tuple[Tuple[str, ...], List[tuple]]]):
+        """Передает записанные строки подписчикам (без повторных запросов к БД)"""
+        if self.publisher is None:
+            return
+        for topic, (columns, rows) in written.items():
+            for row in rows:
+                self.publisher.publish(topic, dict(zip(columns, row)))
         
+    def _update_network_stats(self, cursor, stats: Dict) -> tuple:
+        """Обновляет статистику сети"""
         # Вычисляем дополнительные метрики
         tps = stats.get('tps', 0)
         avg_processing_time = stats.get('average_block_time', 6.0) * 1000  # в миллисекундах
@@ -145,23 +233,19 @@ class NamadaAnalyticsAdapter:
         active_resources = self._calculate_active_resources(stats)
         pending_intents = self._calculate_pending_intents(stats)
         
-        cursor.execute('''
-            INSERT INTO network_stats 
-            (timestamp, tps, avg_processing_time, active_resources, pending_intents, 
-             block_height, total_transactions)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            datetime.now(timezone.utc).isoformat(),
+        now = datetime.now(timezone.utc)
+        row = (
+            now.isoformat(),
             tps,
             avg_processing_time,
             active_resources,
             pending_intents,
             stats.get('current_height', 0),
-            stats.get('total_recent_transactions', 0)
-        ))
-        
-        conn.commit()
-        conn.close()
+            stats.get('total_recent_transactions', 0),
+            int(now.timestamp())
+        )
+        cursor.execute(INSERT_NETWORK_STATS_SQL, row)
+        return row
         
     def _calculate_active_resources(self, stats: Dict) -> int:
         """Вычисляет количество активных ресурсов на основе реальных данных"""
@@ -176,50 +260,41 @@ class NamadaAnalyticsAdapter:
         base_intents = int(tps * 10 + random.randint(1, 20))
         return max(1, base_intents)
         
-    def _sync_recent_blocks(self):
-        """Синхронизирует последние блоки"""
-        status = self.namada_client.get_status()
-        if not status:
-            return
-            
-        latest_height = int(status['sync_info']['latest_block_height'])
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _fetch_recent_blocks(self) -> List[Dict]:
+        """Получает из сети блоки, которых еще нет в БД"""
+        latest_height = self.namada_client.get_latest_height()
+        if latest_height is None:
+            return []
         
         # Проверяем, какие блоки уже есть в БД
-        cursor.execute('SELECT MAX(block_height) FROM blocks')
-        last_synced = cursor.fetchone()[0] or 0
-        
-        # Синхронизируем новые блоки
-        for height in range(max(last_synced + 1, latest_height - 10), latest_height + 1):
-            block = self.namada_client.get_block(height)
-            if block:
-                block_data = self.namada_processor.process_block_to_analytics(block)
-                if block_data:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO blocks 
-                        (block_height, block_hash, timestamp, proposer, transaction_count, size)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        block_data['block_height'],
-                        block_data['block_hash'],
-                        block_data['timestamp'],
-                        block_data['proposer_address'],
-                        block_data['transaction_count'],
-                        len(str(block))  # Примерный размер
-                    ))
-        
-        conn.commit()
-        conn.close()
-        
-    def _sync_recent_transactions(self):
-        """Синхронизирует последние транзакции"""
-        transactions = self.namada_processor.get_recent_transactions(100)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        last_synced = self.db.reader().execute('SELECT MAX(block_height) FROM blocks').fetchone()[0] or 0
+        
+        # Достаточно заголовков, без тел транзакций
+        start_height = max(last_synced + 1, latest_height - 10)
+        if start_height > latest_height:
+            return []
+        return list(self.namada_processor.iter_blocks(start_height, latest_height))
+        
+    def _sync_recent_blocks(self, cursor, blocks: List[Dict]) -> List[tuple]:
+        """Синхронизирует последние блоки (все они новые - см. _fetch_recent_blocks)"""
+        rows = [
+            (
+                block_data['block_height'],
+                block_data['block_hash'],
+                block_data['timestamp'],
+                block_data['proposer_address'],
+                block_data['transaction_count'],
+                block_data['block_size'],
+                to_epoch(block_data['timestamp'])
+            )
+            for block_data in blocks
+        ]
+        cursor.executemany(INSERT_BLOCK_SQL, rows)
+        return rows
+        
+    def _sync_recent_transactions(self, cursor, transactions: List[Dict]) -> List[tuple]:
+        """Синхронизирует последние транзакции, возвращает строки новых"""
+        rows = []
         for tx in transactions:
             # Генерируем дополнительные поля для транзакции
             from_addr = f"tnam1{random.randint(100000, 999999)}"
@@ -227,12 +302,7 @@ class NamadaAnalyticsAdapter:
             amount = random.uniform(0.1, 1000.0)
             fee = random.uniform(0.001, 0.01)
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO transactions 
-                (tx_hash, block_height, timestamp, tx_type, from_address, to_address, 
-                 amount, fee, status, gas_used)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            rows.append((
                 tx['hash'],
                 tx['block_height'],
                 tx['timestamp'],
@@ -242,27 +312,35 @@ class NamadaAnalyticsAdapter:
                 amount,
                 fee,
                 'confirmed',
-                random.randint(21000, 100000)
+                random.randint(21000, 100000),
+                to_epoch(tx['timestamp'])
             ))
+            
+        new_rows = rows
+        if self.publisher is not None and rows:
+            # Последние транзакции перекрываются между синхронизациями -
+            # публикуем только те, которых еще не было в БД
+            cursor.execute(
+                f"SELECT tx_hash FROM transactions WHERE tx_hash IN ({','.join('?' * len(rows))})",
+                [row[0] for row in rows]
+            )
+            existing = {tx_hash for (tx_hash,) in cursor.fetchall()}
+            new_rows = [row for row in rows if row[0] not in existing]
+            
+        cursor.executemany(INSERT_TRANSACTION_SQL, rows)
+        return new_rows
         
-        conn.commit()
-        conn.close()
-        
-    def _generate_enhanced_data(self, network_stats: Dict):
+    def _generate_enhanced_data(self, cursor, network_stats: Dict) -> Tuple[List[tuple], List[tuple]]:
         """Генерирует дополнительные данные на основе реальных"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Генерируем ресурсы
-        self._generate_resources(cursor, network_stats)
+        resource_rows = self._generate_resources(cursor, network_stats)
         
         # Генерируем интенты
-        self._generate_intents(cursor, network_stats)
+        intent_rows = self._generate_intents(cursor, network_stats)
         
-        conn.commit()
-        conn.close()
+        return resource_rows, intent_rows
         
-    def _generate_resources(self, cursor, network_stats: Dict):
+    def _generate_resources(self, cursor, network_stats: Dict) -> List[tuple]:
         """Генерирует ресурсы на основе реальных данных сети"""
         current_height = network_stats.get('current_height', 2789000)
         
@@ -275,6 +353,8 @@ class NamadaAnalyticsAdapter:
         
         if existing_count < target_count:
             resources_to_create = min(50, target_count - existing_count)  # Не более 50 за раз
+            now = datetime.now(timezone.utc)
+            rows = []
             
             for _ in range(resources_to_create):
                 resource_id = f"resource_{current_height}_{random.randint(1000, 9999)}"
@@ -304,19 +384,19 @@ class NamadaAnalyticsAdapter:
                 elif kind == 'CUSTOM':
                     custom_type = f"custom_{random.randint(1, 20)}"
                 
-                cursor.execute('''
-                    INSERT OR IGNORE INTO resources 
-                    (resource_id, kind, owner, status, amount, token_id, decimals, 
-                     collection, metadata_uri, intent_type, custom_type, created_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                rows.append((
                     resource_id, kind, owner, status, amount, token_id, decimals,
                     collection, metadata_uri, intent_type, custom_type,
-                    datetime.now(timezone.utc).isoformat(),
-                    datetime.now(timezone.utc).isoformat()
+                    now.isoformat(),
+                    now.isoformat(),
+                    int(now.timestamp())
                 ))
                 
-    def _generate_intents(self, cursor, network_stats: Dict):
+            cursor.executemany(INSERT_RESOURCE_SQL, rows)
+            return rows
+        return []
+                
+    def _generate_intents(self, cursor, network_stats: Dict) -> List[tuple]:
         """Генерирует интенты на основе реальных данных"""
         current_height = network_stats.get('current_height', 2789000)
         
@@ -328,6 +408,8 @@ class NamadaAnalyticsAdapter:
         
         if existing_count < target_count:
             intents_to_create = min(10, target_count - existing_count)
+            now = datetime.now(timezone.utc)
+            rows = []
             
             for _ in range(intents_to_create):
                 intent_id = f"intent_{current_height}_{random.randint(1000, 9999)}"
@@ -339,60 +421,67 @@ class NamadaAnalyticsAdapter:
                 current_amount = random.uniform(0, target_amount)
                 
                 # Deadline в будущем
-                deadline = datetime.now(timezone.utc) + timedelta(days=random.randint(1, 30))
+                deadline = now + timedelta(days=random.randint(1, 30))
                 
-                cursor.execute('''
-                    INSERT OR IGNORE INTO intents 
-                    (intent_id, intent_type, creator, status, target_amount, current_amount,
-                     deadline, created_at, updated_at, metadata)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                rows.append((
                     intent_id, intent_type, creator, status, target_amount, current_amount,
                     deadline.isoformat(),
-                    datetime.now(timezone.utc).isoformat(),
-                    datetime.now(timezone.utc).isoformat(),
-                    json.dumps({"priority": random.choice(["high", "medium", "low"])})
+                    now.isoformat(),
+                    now.isoformat(),
+                    json.dumps({"priority": random.choice(["high", "medium", "low"])}),
+                    int(now.timestamp())
                 ))
+                
+            cursor.executemany(INSERT_INTENT_SQL, rows)
+            return rows
+        return []
+    
+    def build_owner_filter(self, owner: str, match_mode: str = 'substring') -> Tuple[str, List]:
+        """Строит условие WHERE для поиска ресурсов по владельцу
+        
+        exact и prefix используют B-tree индекс по owner (префикс - как диапазон),
+        substring - FTS5 trigram индекс (для строк от 3 символов).
+        """
+        if match_mode not in OWNER_MATCH_MODES:
+            raise ValueError(f"match_mode must be one of: {', '.join(OWNER_MATCH_MODES)}")
+            
+        if match_mode == 'exact':
+            return "owner = ?", [owner]
+            
+        if match_mode == 'prefix':
+            # owner LIKE 'x%' не использует индекс (LIKE без учета регистра),
+            # поэтому ищем по диапазону [prefix, следующий префикс)
+            upper_bound = owner[:-1] + chr(ord(owner[-1]) + 1)
+            return "owner >= ? AND owner < ?", [owner, upper_bound]
+            
+        if self.owner_fts_enabled and len(owner) >= 3:
+            fts_query = '"' + owner.replace('"', '""') + '"'
+            return ("id IN (SELECT rowid FROM resources_owner_fts WHERE resources_owner_fts MATCH ?)",
+                    [fts_query])
+            
+        # Короткие строки trigram не ищет - остается полный просмотр
+        return "owner LIKE ?", [f"%{owner}%"]
     
     def get_dashboard_data(self) -> Dict:
-        """Получает данные для Dashboard"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Получаем последние статистики
+        """Получает данные для Dashboard (одно чтение по первичному ключу)"""
+        cursor = self.db.reader().cursor()
         cursor.execute('''
-            SELECT * FROM network_stats 
-            ORDER BY timestamp DESC LIMIT 1
+            SELECT total_resources, total_transactions, active_intents, current_block,
+                   tps, avg_processing_time, active_resources, pending_intents
+            FROM dashboard_snapshot
+            WHERE id = 1
         ''')
-        latest_stats = cursor.fetchone()
-        
-        # Подсчитываем ресурсы
-        cursor.execute('SELECT COUNT(*) FROM resources')
-        total_resources = cursor.fetchone()[0]
-        
-        # Подсчитываем транзакции
-        cursor.execute('SELECT COUNT(*) FROM transactions')
-        total_transactions = cursor.fetchone()[0]
-        
-        # Подсчитываем активные интенты
-        cursor.execute('SELECT COUNT(*) FROM intents WHERE status IN ("pending", "active")')
-        active_intents = cursor.fetchone()[0]
-        
-        # Получаем текущий блок
-        cursor.execute('SELECT MAX(block_height) FROM blocks')
-        current_block = cursor.fetchone()[0] or 0
-        
-        conn.close()
+        snapshot = cursor.fetchone() or (0, 0, 0, 0, 0, 0, 0, 0)
         
         return {
-            'total_resources': total_resources,
-            'total_transactions': total_transactions,
-            'active_intents': active_intents,
-            'current_block': current_block,
-            'tps': latest_stats[2] if latest_stats else 0,
-            'avg_processing_time': latest_stats[3] if latest_stats else 0,
-            'active_resources': latest_stats[4] if latest_stats else 0,
-            'pending_intents': latest_stats[5] if latest_stats else 0
+            'total_resources': snapshot[0],
+            'total_transactions': snapshot[1],
+            'active_intents': snapshot[2],
+            'current_block': snapshot[3],
+            'tps': snapshot[4],
+            'avg_processing_time': snapshot[5],
+            'active_resources': snapshot[6],
+            'pending_intents': snapshot[7]
         }
 
 def test_integration_layer():
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Namada Retention - Политика хранения и компактификация истории Namada Analytics
+"""
+
+import logging
+import time
+from typing import Dict, Optional
+
+from namada_db import NamadaConnectionManager
+
+logger = logging.getLogger(__name__)
+
+HOUR_SECONDS = 3600
+DAY_SECONDS = 86400
+
+# Сырые строки network_stats -> почасовые агрегаты (новые бакеты дописываются,
+# пересекающиеся после сбоя - сливаются с учетом числа отсчетов)
+ROLLUP_RAW_SQL = '''
+    INSERT INTO network_stats_hourly
+    (bucket_epoch, samples, tps_avg, tps_min, tps_max,
+     avg_processing_time_avg, avg_processing_time_min, avg_processing_time_max,
+     active_resources_avg, pending_intents_avg, block_height_max, total_transactions_max)
+    SELECT (timestamp_epoch / 3600) * 3600, COUNT(*), AVG(tps), MIN(tps), MAX(tps),
+           AVG(avg_processing_time), MIN(avg_processing_time), MAX(avg_processing_time),
+           AVG(active_resources), AVG(pending_intents), MAX(block_height), MAX(total_transactions)
+    FROM network_stats
+    WHERE timestamp_epoch >= ? AND timestamp_epoch < ?
+    GROUP BY 1
+    ON CONFLICT(bucket_epoch) DO UPDATE SET {merge}
+'''
+
+# Почасовые агрегаты -> посуточные
+ROLLUP_HOURLY_SQL = '''
+    INSERT INTO network_stats_daily
+    (bucket_epoch, samples, tps_avg, tps_min, tps_max,
+     avg_processing_time_avg, avg_processing_time_min, avg_processing_time_max,
+     active_resources_avg, pending_intents_avg, block_height_max, total_transactions_max)
+    SELECT (bucket_epoch / 86400) * 86400, SUM(samples),
+           SUM(tps_avg * samples) / SUM(samples), MIN(tps_min), MAX(tps_max),
+           SUM(avg_processing_time_avg * samples) / SUM(samples),
+           MIN(avg_processing_time_min), MAX(avg_processing_time_max),
+           SUM(active_resources_avg * samples) / SUM(samples),
+           SUM(pending_intents_avg * samples) / SUM(samples),
+           MAX(block_height_max), MAX(total_transactions_max)
+    FROM network_stats_hourly
+    WHERE bucket_epoch >= ? AND bucket_epoch < ?
+    GROUP BY 1
+    ON CONFLICT(bucket_epoch) DO UPDATE SET {merge}
+'''
+
+_MERGE_SET = ', '.join(
+    [f"{column} = ({column} * samples + excluded.{column} * excluded.samples) / (samples + excluded.samples)"
+     for column in ('tps_avg', 'avg_processing_time_avg', 'active_resources_avg', 'pending_intents_avg')] +
+    [f"{column} = MIN({column}, excluded.{column})" for column in ('tps_min', 'avg_processing_time_min')] +
+    [f"{column} = MAX({column}, excluded.{column})"
+     for column in ('tps_max', 'avg_processing_time_max', 'block_height_max', 'total_transactions_max')] +
+    ['samples = samples + excluded.samples']
+)
+
+ROLLUP_RAW_SQL = ROLLUP_RAW_SQL.format(merge=_MERGE_SET)
+ROLLUP_HOURLY_SQL = ROLLUP_HOURLY_SQL.format(merge=_MERGE_SET)
+
+class NamadaRetentionJob:
+    """Инкрементальная очистка и даунсэмплинг истории
+
+    - network_stats старше raw_days сворачиваются в network_stats_hourly и удаляются;
+    - network_stats_hourly старше hourly_days сворачиваются в network_stats_daily;
+    - blocks и transactions старше history_days удаляются (None - хранить всё);
+    - удаление идет пачками по batch_size строк, каждая пачка - отдельная
+      короткая транзакция, чтобы не блокировать синхронизацию;
+    - каждый проход заканчивается PRAGMA optimize, каждые vacuum_every
+      проходов - VACUUM (или incremental_vacuum при auto_vacuum=INCREMENTAL).
+    """
+
+    def __init__(self, db: NamadaConnectionManager, raw_days: int = 7, hourly_days: int = 90,
+                 history_days: Optional[int] = 30, batch_size: int = 1000,
+                 batch_pause: float = 0.05, vacuum_every: int = 24):
+        if raw_days <= 0 or hourly_days < raw_days:
+            raise ValueError("Требуется 0 < raw_days <= hourly_days")
+        self.db = db
+        self.raw_days = raw_days
+        self.hourly_days = hourly_days
+        self.history_days = history_days
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.vacuum_every = vacuum_every
+        self.runs = 0
+
+    def run_once(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Один проход политики хранения; возвращает число удаленных/свернутых строк"""
+        now = int(now if now is not None else time.time())
+        raw_cutoff = (now - self.raw_days * DAY_SECONDS) // HOUR_SECONDS * HOUR_SECONDS
+        hourly_cutoff = (now - self.hourly_days * DAY_SECONDS) // DAY_SECONDS * DAY_SECONDS
+
+        result = {
+            'hourly_rollups': self._rollup(ROLLUP_RAW_SQL, 'network_stats_hourly', HOUR_SECONDS, raw_cutoff),
+            'network_stats_deleted': self._delete_before('network_stats', 'timestamp_epoch', raw_cutoff),
+            'daily_rollups': self._rollup(ROLLUP_HOURLY_SQL, 'network_stats_daily', DAY_SECONDS, hourly_cutoff),
+            'hourly_deleted': self._delete_before('network_stats_hourly', 'bucket_epoch', hourly_cutoff),
+        }
+
+        if self.history_days:
+            history_cutoff = now - self.history_days * DAY_SECONDS
+            result['blocks_deleted'] = self._delete_before('blocks', 'timestamp_epoch', history_cutoff)
+            result['transactions_deleted'] = self._delete_before('transactions', 'timestamp_epoch', history_cutoff)
+
+        self.runs += 1
+        self._optimize(vacuum=self.vacuum_every > 0 and self.runs % self.vacuum_every == 0)
+        return result
+
+    def _rollup(self, sql: str, target: str, bucket_seconds: int, cutoff: int) -> int:
+        """Сворачивает полные бакеты [водяная отметка, cutoff) в таблицу target"""
+        with self.db.writer() as conn:
+            # Водяная отметка - конец последнего уже свернутого бакета
+            row = conn.execute(f'SELECT MAX(bucket_epoch) FROM {target}').fetchone()
+            start = row[0] + bucket_seconds if row[0] is not None else 0
+            if start >= cutoff:
+                return 0
+            return conn.execute(sql, (start, cutoff)).rowcount
+
+    def _delete_before(self, table: str, column: str, cutoff: int) -> int:
+        """Удаляет строки старше cutoff пачками в отдельных транзакциях"""
+        key = 'bucket_epoch' if column == 'bucket_epoch' else 'id'
+        sql = f'''
+            DELETE FROM {table} WHERE {key} IN (
+                SELECT {key} FROM {table} WHERE {column} < ? ORDER BY {column} LIMIT ?
+            )
+        '''
+        deleted = 0
+        while True:
+            with self.db.writer() as conn:
+                count = conn.execute(sql, (cutoff, self.batch_size)).rowcount
+            deleted += count
+            if count < self.batch_size:
+                return deleted
+            # Даем синхронизации забрать блокировку записи между пачками
+            time.sleep(self.batch_pause)
+
+    def _optimize(self, vacuum: bool):
+        """Обновляет статистику планировщика и периодически возвращает место на диске"""
+        with self.db.maintenance() as conn:
+            conn.execute('PRAGMA optimize')
+            if not vacuum:
+                return
+            auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            if auto_vacuum == 2:
+                conn.execute('PRAGMA incremental_vacuum')
+            else:
+                logger.info("🧹 VACUUM базы Namada Analytics")
+                conn.execute('VACUUM')
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Namada Schema - Версионированные миграции схемы SQLite для Namada Analytics
+"""
+
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+def to_epoch(timestamp: Optional[str]) -> Optional[int]:
+    """Переводит ISO-время в секунды Unix epoch (None для пустых значений)"""
+    if not timestamp:
+        return None
+    value = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+# Пересчет строки dashboard_snapshot; выполняется в транзакции синхронизации
+REFRESH_DASHBOARD_SNAPSHOT_SQL = '''
+    INSERT OR REPLACE INTO dashboard_snapshot
+    (id, total_resources, total_transactions, active_intents, current_block,
+     tps, avg_processing_time, active_resources, pending_intents, updated_at_epoch)
+    SELECT 1,
+           (SELECT COUNT(*) FROM resources),
+           (SELECT COUNT(*) FROM transactions),
+           (SELECT COUNT(*) FROM intents WHERE status IN ('pending', 'active')),
+           (SELECT COALESCE(MAX(block_height), 0) FROM blocks),
+           COALESCE(latest.tps, 0),
+           COALESCE(latest.avg_processing_time, 0),
+           COALESCE(latest.active_resources, 0),
+           COALESCE(latest.pending_intents, 0),
+           CAST(strftime('%s', 'now') AS INTEGER)
+    FROM (SELECT 1)
+    LEFT JOIN (
+        SELECT tps, avg_processing_time, active_resources, pending_intents
+        FROM network_stats
+        ORDER BY timestamp_epoch DESC, id DESC
+        LIMIT 1
+    ) AS latest
+'''
+
+def _migration_1_epoch_columns(cursor):
+    """Целочисленное время (epoch) и индексы под сортировки и фильтры API"""
+    for table, text_column, epoch_column in (
+        ('network_stats', 'timestamp', 'timestamp_epoch'),
+        ('transactions', 'timestamp', 'timestamp_epoch'),
+        ('blocks', 'timestamp', 'timestamp_epoch'),
+        ('resources', 'created_at', 'created_at_epoch'),
+        ('intents', 'created_at', 'created_at_epoch'),
+    ):
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {epoch_column} INTEGER')
+        # Заполняем новые колонки для уже существующих строк
+        cursor.execute(f'''
+            UPDATE {table}
+            SET {epoch_column} = CAST(strftime('%s', {text_column}) AS INTEGER)
+            WHERE {epoch_column} IS NULL
+        ''')
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_network_stats_timestamp ON network_stats (timestamp_epoch)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions (timestamp_epoch)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_resources_created ON resources (created_at_epoch)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_resources_kind_created ON resources (kind, created_at_epoch)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_resources_status_created ON resources (status, created_at_epoch)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_intents_created ON intents (created_at_epoch)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_intents_status_created ON intents (status, created_at_epoch)')
+
+def _migration_2_owner_search(cursor):
+    """Индексы поиска ресурсов по владельцу (B-tree для префикса, FTS5 trigram для подстроки)"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_resources_owner ON resources (owner)')
+
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS resources_owner_fts USING fts5(
+                owner, content='resources', content_rowid='id', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # Сборка SQLite без FTS5/trigram (нужна 3.34+) - поиск по подстроке останется на LIKE
+        logger.warning(f"⚠️ FTS5 trigram недоступен, поиск по подстроке без индекса: {e}")
+        return
+
+    # Триггеры держат индекс в синхронизации со всеми записями в resources
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS resources_owner_fts_insert AFTER INSERT ON resources BEGIN
+            INSERT INTO resources_owner_fts (rowid, owner) VALUES (new.id, new.owner);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS resources_owner_fts_delete AFTER DELETE ON resources BEGIN
+            INSERT INTO resources_owner_fts (resources_owner_fts, rowid, owner) VALUES ('delete', old.id, old.owner);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS resources_owner_fts_update AFTER UPDATE OF owner ON resources BEGIN
+            INSERT INTO resources_owner_fts (resources_owner_fts, rowid, owner) VALUES ('delete', old.id, old.owner);
+            INSERT INTO resources_owner_fts (rowid, owner) VALUES (new.id, new.owner);
+        END
+    ''')
+
+    # Индексируем уже существующие ресурсы
+    cursor.execute("INSERT INTO resources_owner_fts (resources_owner_fts) VALUES ('rebuild')")
+
+def _migration_3_dashboard_snapshot(cursor):
+    """Материализованная строка dashboard_snapshot для /api/analytics/overview"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dashboard_snapshot (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_resources INTEGER NOT NULL,
+            total_transactions INTEGER NOT NULL,
+            active_intents INTEGER NOT NULL,
+            current_block INTEGER NOT NULL,
+            tps REAL NOT NULL,
+            avg_processing_time REAL NOT NULL,
+            active_resources INTEGER NOT NULL,
+            pending_intents INTEGER NOT NULL,
+            updated_at_epoch INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute(REFRESH_DASHBOARD_SNAPSHOT_SQL)
+
+def _migration_4_stats_rollups(cursor):
+    """Почасовые и посуточные агрегаты network_stats для политики хранения"""
+    for table in ('network_stats_hourly', 'network_stats_daily'):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket_epoch INTEGER PRIMARY KEY,
+                samples INTEGER NOT NULL,
+                tps_avg REAL NOT NULL,
+                tps_min REAL NOT NULL,
+                tps_max REAL NOT NULL,
+                avg_processing_time_avg REAL NOT NULL,
+                avg_processing_time_min REAL NOT NULL,
+                avg_processing_time_max REAL NOT NULL,
+                active_resources_avg REAL NOT NULL,
+                pending_intents_avg REAL NOT NULL,
+                block_height_max INTEGER NOT NULL,
+                total_transactions_max INTEGER NOT NULL
+            )
+        ''')
+    # Индексы по времени для удаления старой истории пачками
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_blocks_timestamp ON blocks (timestamp_epoch)')
+
+# Миграции по порядку: версия схемы = номер последней примененной миграции
+MIGRATIONS = [
+    (1, _migration_1_epoch_columns),
+    (2, _migration_2_owner_search),
+    (3, _migration_3_dashboard_snapshot),
+    (4, _migration_4_stats_rollups),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def has_table(cursor, name: str) -> bool:
+    """Проверяет, существует ли таблица (в т.ч. виртуальная)"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+def migrate(cursor) -> int:
+    """Применяет недостающие миграции (вызывать внутри транзакции записи)"""
+    cursor.execute('PRAGMA user_version')
+    current_version = cursor.fetchone()[0]
+
+    for version, migration in MIGRATIONS:
+        if version <= current_version:
+            continue
+        logger.info(f"🔧 Миграция схемы до версии {version}: {migration.__doc__}")
+        migration(cursor)
+        cursor.execute(f'PRAGMA user_version = {version}')
+        current_version = version
+
+    return current_version
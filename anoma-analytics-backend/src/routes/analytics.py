@@ -1,66 +1,132 @@
-from flask import Blueprint, jsonify, request
-from sqlalchemy import func, desc, and_
+import math
+import os
+from flask import Blueprint, Response, current_app, jsonify, request, send_file, stream_with_context
+from sqlalchemy import func, desc, and_, cast, literal, select, union_all
 from datetime import datetime, timedelta
 from src.models.anoma_models import (
-    db, Resource, Transaction, Intent, Block, NetworkStats,
+    db, Resource, Transaction, Intent, Block, NetworkStats, NetworkStatsHourly, NetworkStatsDaily,
     ResourceKind, TransactionType, IntentStatus
 )
+from src.services.export import (
+    BLOCK_COLUMNS, EXPORT_FORMATS, INTENT_COLUMNS, RESOURCE_COLUMNS, TRANSACTION_COLUMNS,
+    ExportError, build_export_statement, export_headers, stream_export
+)
+from src.services.overview_stream import StreamLimitReached, get_overview_stream
+from src.services.parquet_export import ExportInProgress, get_parquet_exporter, parquet_available
+from src.services.serialization import RowSerializer, paginate_rows, transaction_counts
 
 analytics_bp = Blueprint('analytics', __name__)
 
+# /stats/network returns at most this many points, whatever the time range
+DEFAULT_NETWORK_STATS_POINTS = 500
+MAX_NETWORK_STATS_POINTS = 2000
+
+# network_stats columns averaged per bucket, and those also reported as _min/_max
+NETWORK_STATS_AVERAGED = (
+    'total_resources', 'total_transactions', 'total_intents', 'active_resources',
+    'pending_intents', 'avg_processing_time_ms', 'tps'
+)
+NETWORK_STATS_RANGED = ('avg_processing_time_ms', 'tps')
+
 @analytics_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
 
+def _overview_data():
+    """Overview statistics, as served by /overview and streamed by /stream"""
+    # Count data directly from tables
+    total_transactions = Transaction.query.count()
+    total_resources = Resource.query.count()
+    total_intents = Intent.query.count()
+    
+    # Count active/pending items
+    active_resources = Resource.query.filter(Resource.is_consumed == False).count()
+    pending_intents = Intent.query.filter(Intent.status == IntentStatus.PENDING).count()
+    
+    # Get recent activity (last 24 hours)
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    recent_transactions = Transaction.query.filter(Transaction.timestamp >= yesterday).count()
+    recent_intents = Intent.query.filter(Intent.created_at >= yesterday).count()
+    recent_resources = Resource.query.filter(Resource.created_at >= yesterday).count()
+    
+    # Get current block height
+    latest_block = Block.query.order_by(desc(Block.height)).first()
+    current_height = latest_block.height if latest_block else 0
+    
+    # Calculate average processing time for intents
+    avg_processing_time = db.session.query(func.avg(Intent.processing_time_ms)).scalar() or 0
+    
+    # Calculate current TPS (transactions in last minute)
+    one_minute_ago = datetime.utcnow() - timedelta(minutes=1)
+    recent_tx_count = Transaction.query.filter(Transaction.timestamp >= one_minute_ago).count()
+    current_tps = recent_tx_count / 60.0  # transactions per second
+    
+    overview = {
+        'current_block_height': current_height,
+        'total_transactions': total_transactions,
+        'total_resources': total_resources,
+        'total_intents': total_intents,
+        'active_resources': active_resources,
+        'pending_intents': pending_intents,
+        'avg_processing_time_ms': float(avg_processing_time),
+        'current_tps': round(current_tps, 2),
+        'recent_activity': {
+            'transactions_24h': recent_transactions,
+            'intents_24h': recent_intents,
+            'resources_24h': recent_resources
+        }
+    }
+    
+    return overview
+
 @analytics_bp.route('/overview', methods=['GET'])
 def get_overview():
     """Get overview statistics"""
     try:
-        # Count data directly from tables
-        total_transactions = Transaction.query.count()
-        total_resources = Resource.query.count()
-        total_intents = Intent.query.count()
-        
-        # Count active/pending items
-        active_resources = Resource.query.filter(Resource.is_consumed == False).count()
-        pending_intents = Intent.query.filter(Intent.status == IntentStatus.PENDING).count()
-        
-        # Get recent activity (last 24 hours)
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        recent_transactions = Transaction.query.filter(Transaction.timestamp >= yesterday).count()
-        recent_intents = Intent.query.filter(Intent.created_at >= yesterday).count()
-        recent_resources = Resource.query.filter(Resource.created_at >= yesterday).count()
-        
-        # Get current block height
-        latest_block = Block.query.order_by(desc(Block.height)).first()
-        current_height = latest_block.height if latest_block else 0
-        
-        # Calculate average processing time for intents
-        avg_processing_time = db.session.query(func.avg(Intent.processing_time_ms)).scalar() or 0
-        
-        # Calculate current TPS (transactions in last minute)
-        one_minute_ago = datetime.utcnow() - timedelta(minutes=1)
-        recent_tx_count = Transaction.query.filter(Transaction.timestamp >= one_minute_ago).count()
-        current_tps = recent_tx_count / 60.0  # transactions per second
-        
-        overview = {
-            'current_block_height': current_height,
-            'total_transactions': total_transactions,
-            'total_resources': total_resources,
-            'total_intents': total_intents,
-            'active_resources': active_resources,
-            'pending_intents': pending_intents,
-            'avg_processing_time_ms': float(avg_processing_time),
-            'current_tps': round(current_tps, 2),
-            'recent_activity': {
-                'transactions_24h': recent_transactions,
-                'intents_24h': recent_intents,
-                'resources_24h': recent_resources
-            }
-        }
+        return jsonify(_overview_data())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/stream', methods=['GET'])
+def stream_overview():
+    """Server-Sent Events stream of overview changes
+    
+    Sends a 'snapshot' of the overview, then a 'stats_delta' ({'stream',
+    'seq', 'changes'}) whenever committed rows change it, with heartbeat
+    comments in between. A reconnecting EventSource sends Last-Event-ID
+    and receives only the deltas it missed.
+    
+    Each open stream occupies a server thread, so serve this from an
+    eventlet/gevent or gthread worker; past SSE_MAX_STREAMS open streams
+    the process answers 503 and the client retries.
+    """
+    try:
+        config = current_app.config
+        stream = get_overview_stream(
+            _overview_data,
+            replay_size=config.get('SSE_REPLAY_SIZE', 1000),
+            max_queue=config.get('SSE_MAX_QUEUE', 100),
+            max_streams=config.get('SSE_MAX_STREAMS', 0)
+        )
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        messages = stream.stream(
+            last_event_id,
+            heartbeat=config.get('SSE_HEARTBEAT_INTERVAL', 15),
+            retry_ms=config.get('SSE_RETRY_MS', 3000)
+        )
         
-        return jsonify(overview)
+        # Not stream_with_context: the stream outlives the request's DB session
+        return Response(
+            messages,
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'  # keep nginx from buffering the stream
+            }
+        )
+    except StreamLimitReached as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -75,32 +141,25 @@ def get_resources():
         owner = request.args.get('owner')
         is_consumed = request.args.get('is_consumed')
         
-        # Build query
-        query = Resource.query
+        # Build query over plain columns (no ORM objects)
+        query = select(*RESOURCE_COLUMNS)
         
         if kind:
-            query = query.filter(Resource.kind == ResourceKind(kind))
+            query = query.where(Resource.kind == ResourceKind(kind))
         if owner:
-            query = query.filter(Resource.owner == owner)
+            query = query.where(Resource.owner == owner)
         if is_consumed is not None:
-            query = query.filter(Resource.is_consumed == (is_consumed.lower() == 'true'))
+            query = query.where(Resource.is_consumed == (is_consumed.lower() == 'true'))
         
         # Order by creation time (newest first)
         query = query.order_by(desc(Resource.created_at))
         
         # Paginate
-        resources = query.paginate(page=page, per_page=per_page, error_out=False)
+        rows, pagination = paginate_rows(query, page, per_page)
         
         return jsonify({
-            'resources': [resource.to_dict() for resource in resources.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': resources.total,
-                'pages': resources.pages,
-                'has_next': resources.has_next,
-                'has_prev': resources.has_prev
-            }
+            'resources': RowSerializer(query).many(rows),
+            'pagination': pagination
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -115,30 +174,28 @@ def get_transactions():
         tx_type = request.args.get('type')
         status = request.args.get('status')
         
-        # Build query
-        query = Transaction.query
+        # Build query over plain columns (no ORM objects)
+        query = select(*TRANSACTION_COLUMNS)
         
         if tx_type:
-            query = query.filter(Transaction.type == TransactionType(tx_type))
+            query = query.where(Transaction.type == TransactionType(tx_type))
         if status:
-            query = query.filter(Transaction.status == status)
+            query = query.where(Transaction.status == status)
         
         # Order by timestamp (newest first)
         query = query.order_by(desc(Transaction.timestamp))
         
         # Paginate
-        transactions = query.paginate(page=page, per_page=per_page, error_out=False)
+        rows, pagination = paginate_rows(query, page, per_page)
+        transactions = RowSerializer(query).many(rows)
+        
+        counts = transaction_counts([tx['id'] for tx in transactions])
+        for tx in transactions:
+            tx.update(counts[tx['id']])
         
         return jsonify({
-            'transactions': [tx.to_dict() for tx in transactions.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': transactions.total,
-                'pages': transactions.pages,
-                'has_next': transactions.has_next,
-                'has_prev': transactions.has_prev
-            }
+            'transactions': transactions,
+            'pagination': pagination
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -154,32 +211,25 @@ def get_intents():
         creator = request.args.get('creator')
         solver = request.args.get('solver')
         
-        # Build query
-        query = Intent.query
+        # Build query over plain columns (no ORM objects)
+        query = select(*INTENT_COLUMNS)
         
         if status:
-            query = query.filter(Intent.status == IntentStatus(status))
+            query = query.where(Intent.status == IntentStatus(status))
         if creator:
-            query = query.filter(Intent.creator == creator)
+            query = query.where(Intent.creator == creator)
         if solver:
-            query = query.filter(Intent.solver == solver)
+            query = query.where(Intent.solver == solver)
         
         # Order by creation time (newest first)
         query = query.order_by(desc(Intent.created_at))
         
         # Paginate
-        intents = query.paginate(page=page, per_page=per_page, error_out=False)
+        rows, pagination = paginate_rows(query, page, per_page)
         
         return jsonify({
-            'intents': [intent.to_dict() for intent in intents.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': intents.total,
-                'pages': intents.pages,
-                'has_next': intents.has_next,
-                'has_prev': intents.has_prev
-            }
+            'intents': RowSerializer(query).many(rows),
+            'pagination': pagination
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -193,24 +243,90 @@ def get_blocks():
         per_page = min(request.args.get('per_page', 50, type=int), 100)
         
         # Order by height (newest first)
-        blocks = Block.query.order_by(desc(Block.height)).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        query = select(*BLOCK_COLUMNS).order_by(desc(Block.height))
+        rows, pagination = paginate_rows(query, page, per_page)
         
         return jsonify({
-            'blocks': [block.to_dict() for block in blocks.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': blocks.total,
-                'pages': blocks.pages,
-                'has_next': blocks.has_next,
-                'has_prev': blocks.has_prev
-            }
+            'blocks': RowSerializer(query).many(rows),
+            'pagination': pagination
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/export/<entity>', methods=['GET'])
+def export_entity(entity):
+    """Stream resources, transactions, intents or blocks as NDJSON or CSV"""
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        compress = request.args.get('gzip', 'false').lower() == 'true'
+        if export_format not in EXPORT_FORMATS:
+            raise ExportError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+        
+        statement = build_export_statement(entity, request.args)
+        
+        # Chunked response; the generator keeps the request context for the DB session
+        return Response(
+            stream_with_context(stream_export(statement, export_format, compress)),
+            headers=export_headers(entity, export_format, compress)
+        )
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _parquet_exporter():
+    export_dir = current_app.config.get('PARQUET_EXPORT_DIR') or os.path.join(
+        current_app.root_path, 'database', 'parquet'
+    )
+    return get_parquet_exporter(export_dir)
+
+@analytics_bp.route('/export/parquet', methods=['GET'])
+def list_parquet_partitions():
+    """List exported Parquet partitions per entity"""
+    try:
+        return jsonify({
+            'available': parquet_available(),
+            'partitions': _parquet_exporter().load_manifest()
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@analytics_bp.route('/export/parquet', methods=['POST'])
+def run_parquet_export():
+    """Append new complete partitions to the Parquet snapshot"""
+    try:
+        if not parquet_available():
+            return jsonify({'error': 'Parquet export requires pyarrow'}), 503
+        
+        entities = request.args.getlist('entity') or None
+        written = _parquet_exporter().run(entities)
+        return jsonify({'written': written})
+    except ExportInProgress as e:
+        return jsonify({'error': str(e)}), 409
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/export/parquet/<entity>/<partition>', methods=['GET'])
+def get_parquet_partition(entity, partition):
+    """Download one Parquet partition (sent with sendfile when the server supports it)"""
+    try:
+        path = _parquet_exporter().partition_path(entity, partition)
+        if not path or not os.path.exists(path):
+            return jsonify({'error': 'Partition not found'}), 404
+        
+        return send_file(
+            path,
+            mimetype='application/vnd.apache.parquet',
+            as_attachment=True,
+            download_name=f"{entity}-{partition}.parquet",
+            conditional=True,
+            max_age=31536000  # partitions are immutable once written
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @analytics_bp.route('/stats/resources', methods=['GET'])
 def get_resource_stats():
     """Get resource statistics"""
@@ -346,23 +462,97 @@ def get_intent_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _network_stats_samples(model, bucket_seconds: int, *filters):
+    """Per-row (samples, sample-weighted sums, min, max) of raw network_stats or a rollup table"""
+    if model is NetworkStats:
+        timestamp, samples = NetworkStats.timestamp, literal(1)
+        weighted = lambda column: getattr(NetworkStats, column)
+        low = high = lambda column: getattr(NetworkStats, column)
+    else:
+        timestamp, samples = model.bucket_start, model.samples
+        weighted = lambda column: getattr(model, column) * model.samples
+        low = lambda column: getattr(model, f"{column}_min")
+        high = lambda column: getattr(model, f"{column}_max")
+    
+    return select(
+        (cast(func.strftime('%s', timestamp), db.Integer) // bucket_seconds).label('bucket'),
+        samples.label('samples'),
+        *[weighted(column).label(column) for column in NETWORK_STATS_AVERAGED],
+        *[low(column).label(f"{column}_min") for column in NETWORK_STATS_RANGED],
+        *[high(column).label(f"{column}_max") for column in NETWORK_STATS_RANGED]
+    ).where(*filters)
+
+def _network_stats_buckets(time_ago: datetime, bucket_seconds: int):
+    """Network stats since time_ago per bucket, sample-weighted
+    
+    Raw rows cover the recent part of the range. Older raw rows are pruned
+    by the retention job, so that part comes from network_stats_hourly, and
+    anything older than the hourly rollups from network_stats_daily. A
+    rollup bucket is only used when it ends before the more detailed source
+    starts, so no sample is counted twice.
+    """
+    now = datetime.utcnow()
+    raw_start = db.session.query(func.min(NetworkStats.timestamp)).scalar() or now
+    hourly_start = db.session.query(func.min(NetworkStatsHourly.bucket_start)).scalar() or raw_start
+    
+    sources = [_network_stats_samples(NetworkStats, bucket_seconds, NetworkStats.timestamp >= time_ago)]
+    for model, width, covered_from in ((NetworkStatsHourly, timedelta(hours=1), raw_start),
+                                       (NetworkStatsDaily, timedelta(days=1), hourly_start)):
+        if time_ago < covered_from:
+            sources.append(_network_stats_samples(
+                model, bucket_seconds,
+                model.bucket_start > time_ago - width,
+                model.bucket_start <= covered_from - width
+            ))
+    
+    samples = union_all(*sources).subquery()
+    total = func.sum(samples.c.samples)
+    return db.session.query(
+        samples.c.bucket,
+        total.label('samples'),
+        *[(func.sum(samples.c[column]) * 1.0 / total).label(column) for column in NETWORK_STATS_AVERAGED],
+        *[func.min(samples.c[f"{column}_min"]).label(f"{column}_min") for column in NETWORK_STATS_RANGED],
+        *[func.max(samples.c[f"{column}_max"]).label(f"{column}_max") for column in NETWORK_STATS_RANGED]
+    ).group_by(samples.c.bucket).order_by(samples.c.bucket).all()
+
 @analytics_bp.route('/stats/network', methods=['GET'])
 def get_network_stats():
-    """Get network statistics over time"""
+    """Get network statistics over time, bucketed server-side"""
     try:
         # Query parameters
         hours = request.args.get('hours', 24, type=int)
+        max_points = request.args.get('max_points', DEFAULT_NETWORK_STATS_POINTS, type=int)
+        max_points = min(max(max_points, 1), MAX_NETWORK_STATS_POINTS)
+        resolution = request.args.get('resolution', 0, type=int)  # seconds per bucket
+        
+        # Bucket width: the requested resolution, widened so the range fits in max_points
+        bucket_seconds = max(resolution, math.ceil(hours * 3600 / max_points), 1)
         
-        # Get network stats for the specified time period
+        # Aggregate the specified time period per bucket in SQL
         time_ago = datetime.utcnow() - timedelta(hours=hours)
-        stats = NetworkStats.query.filter(
-            NetworkStats.timestamp >= time_ago
-        ).order_by(NetworkStats.timestamp).all()
+        buckets = _network_stats_buckets(time_ago, bucket_seconds)
         
         return jsonify({
-            'stats': [stat.to_dict() for stat in stats],
-            'time_range_hours': hours
+            'stats': [
+                {
+                    'timestamp': datetime.utcfromtimestamp(row.bucket * bucket_seconds).isoformat(),
+                    'samples': row.samples,
+                    'total_resources': round(row.total_resources or 0),
+                    'total_transactions': round(row.total_transactions or 0),
+                    'total_intents': round(row.total_intents or 0),
+                    'active_resources': round(row.active_resources or 0),
+                    'pending_intents': round(row.pending_intents or 0),
+                    'avg_processing_time_ms': row.avg_processing_time_ms,
+                    'avg_processing_time_ms_min': row.avg_processing_time_ms_min,
+                    'avg_processing_time_ms_max': row.avg_processing_time_ms_max,
+                    'tps': row.tps,
+                    'tps_min': row.tps_min,
+                    'tps_max': row.tps_max
+                }
+                for row in buckets
+            ],
+            'time_range_hours': hours,
+            'resolution_seconds': bucket_seconds
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
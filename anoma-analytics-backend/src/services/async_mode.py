@@ -0,0 +1,39 @@
+import importlib
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 'threading' holds one OS thread per connection; eventlet and gevent use
+# green threads, so a process can keep tens of thousands of idle sockets
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
+def resolve_async_mode(mode: Optional[str] = None) -> str:
+    """Socket.IO async mode from the argument or WEBSOCKET_ASYNC_MODE
+
+    Falls back to threading when the requested package is not installed.
+    """
+    mode = (mode or os.environ.get('WEBSOCKET_ASYNC_MODE') or 'threading').lower()
+    if mode not in ASYNC_MODES:
+        raise ValueError(f"WEBSOCKET_ASYNC_MODE must be one of: {', '.join(ASYNC_MODES)}")
+    if mode != 'threading':
+        try:
+            importlib.import_module(mode)
+        except ImportError:
+            logger.warning(f"{mode} is not installed, falling back to threading async mode")
+            return 'threading'
+    return mode
+
+def monkey_patch(mode: str):
+    """Make the stdlib cooperative for green threads
+
+    Must run in the entry point before anything imports socket, threading
+    or ssl, i.e. before Flask, SQLAlchemy and requests are imported.
+    """
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
@@ -0,0 +1,331 @@
+import errno
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.services.event_bus import BusEvent
+from src.services.event_encoding import dumps_compact
+
+try:
+    import orjson
+except ImportError:  # optional dependency, stdlib json is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('memory', 'socket')
+DEFAULT_ADDRESS = '/tmp/anoma-event-bus.sock'
+
+Deliver = Callable[[BusEvent], None]
+
+class InMemoryHub:
+    """Fans events out to every bus attached to it within one process
+
+    Stands in for a cross-process transport in tests and benchmarks: attach
+    one bus per simulated worker and they all receive what any of them
+    publishes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._members: List[Deliver] = []
+
+    def join(self, deliver: Deliver):
+        with self._lock:
+            self._members = self._members + [deliver]
+
+    def leave(self, deliver: Deliver):
+        with self._lock:
+            self._members = [member for member in self._members if member != deliver]
+
+    def broadcast(self, event: BusEvent):
+        for deliver in self._members:
+            deliver(event)
+
+    def size(self) -> int:
+        return len(self._members)
+
+class InMemoryBackend:
+    """Delivers to this process's handlers, or to every bus on a shared InMemoryHub"""
+
+    def __init__(self, hub: Optional[InMemoryHub] = None):
+        self.hub = hub
+        self.deliver: Optional[Deliver] = None
+
+    def attach(self, deliver: Deliver):
+        self.deliver = deliver
+        if self.hub is not None:
+            self.hub.join(deliver)
+
+    def send(self, event: BusEvent):
+        if self.hub is not None:
+            self.hub.broadcast(event)
+        else:
+            self.deliver(event)
+
+    def has_peers(self) -> bool:
+        return self.hub is not None and self.hub.size() > 1
+
+    def close(self):
+        if self.hub is not None and self.deliver is not None:
+            self.hub.leave(self.deliver)
+
+def encode_frame(event: BusEvent) -> bytes:
+    """One event as a JSON line"""
+    return (dumps_compact({
+        'topic': event.topic,
+        'seq': event.seq,
+        'stream': event.stream,
+        'payload': event.payload
+    }) + '\n').encode('utf-8')
+
+def decode_frame(line: bytes) -> BusEvent:
+    frame = orjson.loads(line) if orjson is not None else json.loads(line)
+    return BusEvent(frame['topic'], frame['seq'], frame['stream'], frame['payload'])
+
+def _socket_for(address: str) -> Tuple[socket.socket, object]:
+    """A Unix socket for a path, TCP for 'host:port'"""
+    if not address.startswith('/') and ':' in address:
+        host, port = address.rsplit(':', 1)
+        return socket.socket(socket.AF_INET, socket.SOCK_STREAM), (host, int(port))
+    return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM), address
+
+def _unix_socket_in_use(path: str) -> bool:
+    """Whether something still accepts connections on a Unix socket path"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+class _Peer:
+    """A connected subscriber with its own bounded send queue and writer thread"""
+
+    def __init__(self, conn: socket.socket, max_queue: int, on_close: Callable[['_Peer'], None]):
+        self.conn = conn
+        self.frames = queue.Queue(maxsize=max_queue)
+        self.on_close = on_close
+        self.closed = False
+        threading.Thread(target=self._write_loop, daemon=True).start()
+
+    def offer(self, frame: bytes) -> bool:
+        try:
+            self.frames.put_nowait(frame)
+            return True
+        except queue.Full:
+            return False
+
+    def _write_loop(self):
+        try:
+            while not self.closed:
+                frame = self.frames.get()
+                if frame is None:
+                    break
+                # Drain whatever else is queued into one write
+                chunk = [frame]
+                while len(chunk) < 1000:
+                    try:
+                        frame = self.frames.get_nowait()
+                    except queue.Empty:
+                        break
+                    if frame is None:
+                        self.closed = True
+                        break
+                    chunk.append(frame)
+                self.conn.sendall(b''.join(chunk))
+        except OSError as e:
+            if not self.closed:
+                logger.warning(f"Event bus subscriber connection lost: {e}")
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop the writer and drop the connection; safe to call more than once"""
+        self.closed = True
+        try:
+            # Wakes the writer if it is waiting for a frame
+            self.frames.put_nowait(None)
+        except queue.Full:
+            pass
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        self.on_close(self)
+
+class SocketPublisherBackend:
+    """Ingest side of the local-socket transport: listens and streams every event to each subscriber
+
+    Events are also delivered to this process's own handlers. Each
+    subscriber has a queue of max_queue frames; a subscriber that falls that
+    far behind is disconnected rather than slowing the publisher down, and
+    sees the missing seqs as a gap after it reconnects.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, max_queue: int = 10000):
+        self.address = address
+        self.max_queue = max_queue
+        self.deliver: Optional[Deliver] = None
+        self._peers: List[_Peer] = []
+        self._peers_lock = threading.Lock()
+        self._server: Optional[socket.socket] = None
+        self.dropped_peers = 0
+
+    def attach(self, deliver: Deliver):
+        self.deliver = deliver
+        server, bind_address = _socket_for(self.address)
+        if server.family == socket.AF_UNIX and os.path.exists(self.address):
+            # Another live publisher would lose its subscribers to us without a sound
+            if _unix_socket_in_use(self.address):
+                server.close()
+                raise OSError(errno.EADDRINUSE, f"Another event bus publisher is listening on {self.address}")
+            os.unlink(self.address)  # stale socket from a previous run
+        elif server.family != socket.AF_UNIX:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(bind_address)
+        server.listen(64)
+        self._server = server
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        logger.info(f"Event bus publishing on {self.address}")
+
+    def _accept_loop(self):
+        server = self._server
+        while self._server is server:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                break
+            if self._server is not server:
+                conn.close()
+                break
+            peer = _Peer(conn, self.max_queue, self._remove_peer)
+            with self._peers_lock:
+                self._peers = self._peers + [peer]
+            logger.info(f"Event bus subscriber connected ({len(self._peers)} total)")
+
+    def _remove_peer(self, peer: _Peer):
+        with self._peers_lock:
+            self._peers = [other for other in self._peers if other is not peer]
+
+    def send(self, event: BusEvent):
+        self.deliver(event)
+        peers = self._peers
+        if not peers:
+            return
+        # Encoded once for all subscribers
+        frame = encode_frame(event)
+        for peer in peers:
+            if not peer.offer(frame):
+                self.dropped_peers += 1
+                logger.warning("Event bus subscriber fell behind, disconnecting it")
+                peer.close()
+
+    def has_peers(self) -> bool:
+        return bool(self._peers)
+
+    def close(self):
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                # close() alone does not wake a thread blocked in accept()
+                server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            server.close()
+            if server.family == socket.AF_UNIX and os.path.exists(self.address):
+                os.unlink(self.address)
+        for peer in self._peers:
+            peer.close()
+
+class SocketSubscriberBackend:
+    """Worker side of the local-socket transport: receives the publisher's events and delivers them here
+
+    Reconnects with backoff when the publisher goes away. Events arrive in
+    seq order per topic; a jump in seq within the same stream (events lost
+    while disconnected or dropped for falling behind) is counted in gaps.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, reconnect_delay: float = 0.5,
+                 max_reconnect_delay: float = 5.0):
+        self.address = address
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.deliver: Optional[Deliver] = None
+        self._last: Dict[str, Tuple[str, int]] = {}
+        self._sock: Optional[socket.socket] = None
+        self.connected = False
+        self.is_running = False
+        self.gaps = 0
+
+    def attach(self, deliver: Deliver):
+        self.deliver = deliver
+        self.is_running = True
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def _read_loop(self):
+        delay = self.reconnect_delay
+        while self.is_running:
+            sock, connect_address = _socket_for(self.address)
+            try:
+                sock.connect(connect_address)
+                self._sock = sock
+                self.connected = True
+                delay = self.reconnect_delay
+                logger.info(f"Event bus subscribed to {self.address}")
+                with sock.makefile('rb') as frames:
+                    for line in frames:
+                        self._receive(decode_frame(line))
+            except OSError as e:
+                if self.is_running:
+                    logger.debug(f"Event bus publisher unavailable at {self.address}: {e}")
+            finally:
+                self.connected = False
+                sock.close()
+            if self.is_running:
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _receive(self, event: BusEvent):
+        last = self._last.get(event.topic)
+        if last is not None and last[0] == event.stream and event.seq != last[1] + 1:
+            self.gaps += 1
+            logger.warning(f"Event bus gap in {event.topic}: {last[1]} -> {event.seq}")
+        self._last[event.topic] = (event.stream, event.seq)
+        self.deliver(event)
+
+    def send(self, event: BusEvent):
+        # Events published inside a worker stay in that worker
+        self.deliver(event)
+
+    def has_peers(self) -> bool:
+        return False
+
+    def close(self):
+        self.is_running = False
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+def create_backend(name: str = 'memory', address: Optional[str] = None, role: str = 'publisher',
+                   max_queue: int = 10000):
+    """Backend for EVENT_BUS_BACKEND / EVENT_BUS_ROLE"""
+    if name == 'memory':
+        return InMemoryBackend()
+    if name == 'socket':
+        address = address or DEFAULT_ADDRESS
+        if role == 'publisher':
+            return SocketPublisherBackend(address, max_queue)
+        if role == 'subscriber':
+            return SocketSubscriberBackend(address)
+        raise ValueError("EVENT_BUS_ROLE must be 'publisher' or 'subscriber'")
+    raise ValueError(f"EVENT_BUS_BACKEND must be one of: {', '.join(BACKENDS)}")
@@ -0,0 +1,103 @@
+import gzip
+import mimetypes
+import os
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip is used without it
+    brotli = None
+
+# Responses smaller than this are sent as-is; compressing them costs more than it saves
+DEFAULT_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+    'image/svg+xml'
+}
+
+# Vite emits content-hashed file names under assets/, so they can be cached forever
+IMMUTABLE_PREFIX = 'assets/'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+def _accepted_encodings():
+    """Encodings this request accepts, in order of preference"""
+    encodings = []
+    if brotli is not None and request.accept_encodings['br']:
+        encodings.append(('br', '.br'))
+    if request.accept_encodings['gzip']:
+        encodings.append(('gzip', '.gz'))
+    return encodings
+
+def _add_vary(response):
+    vary = response.headers.get('Vary')
+    if not vary:
+        response.headers['Vary'] = 'Accept-Encoding'
+    elif 'accept-encoding' not in vary.lower():
+        response.headers['Vary'] = f"{vary}, Accept-Encoding"
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+def init_compression(app, min_size: int = DEFAULT_MIN_SIZE):
+    """Compress buffered text/JSON responses above min_size with brotli or gzip"""
+    min_size = app.config.get('COMPRESSION_MIN_SIZE', min_size)
+
+    @app.after_request
+    def compress_response(response):
+        # Streams, files and already-encoded bodies are left alone
+        if (response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.status_code < 200 or response.status_code >= 300
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        _add_vary(response)
+        encodings = _accepted_encodings()
+        if not encodings:
+            return response
+
+        encoding = encodings[0][0]
+        response.set_data(_compress(encoding, data))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return app
+
+def send_static_file(static_folder: str, path: str):
+    """Send a static file, preferring a precompressed .br/.gz sibling built ahead of time"""
+    response = None
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    if mimetype in COMPRESSIBLE_MIMETYPES:
+        for encoding, suffix in _accepted_encodings():
+            if os.path.isfile(os.path.join(static_folder, path + suffix)):
+                response = send_from_directory(static_folder, path + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+
+    if response is None:
+        response = send_from_directory(static_folder, path)
+
+    if mimetype in COMPRESSIBLE_MIMETYPES:
+        _add_vary(response)
+    if path.startswith(IMMUTABLE_PREFIX):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        # index.html and other unhashed files must be revalidated to pick up new builds
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -7,6 +7,7 @@ from src.models.anoma_models import (
     db, Resource, Transaction, Intent, Block, NetworkStats,
     ResourceKind, TransactionType, IntentStatus
 )
+from src.services.event_bus import commit_and_publish
 
 class AnomaDataSimulator:
     """Simulator for generating realistic Anoma data"""
@@ -292,8 +293,14 @@ class AnomaDataSimulator:
             for stat in stats:
                 db.session.add(stat)
             
-            # Commit all changes
-            db.session.commit()
+            # Commit all changes and publish them to live subscribers
+            commit_and_publish(db.session, {
+                'blocks': blocks,
+                'transactions': transactions,
+                'resources': resources,
+                'intents': intents,
+                'stats': stats[-1:]  # only the latest sample is current state
+            })
             print("✅ Database populated with simulated data!")
             
             return {
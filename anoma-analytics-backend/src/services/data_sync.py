@@ -2,23 +2,27 @@ import asyncio
 import logging
 from datetime import datetime
 from typing import Dict, List, Any
+from flask import current_app, has_app_context
 from sqlalchemy.exc import IntegrityError
 from src.models.anoma_models import (
     db, Resource, Transaction, Intent, Block, NetworkStats,
     ResourceKind, TransactionType, IntentStatus
 )
 from src.services.anoma_client import get_anoma_client, AnomaConfig
+from src.services.event_bus import commit_and_publish
+from src.services.retention import NetworkStatsRetention, RetentionPolicy
 
 logger = logging.getLogger(__name__)
 
 class AnomaDataSync:
     """Service for synchronizing data from Anoma network to local database"""
     
-    def __init__(self, config: AnomaConfig = None):
+    def __init__(self, config: AnomaConfig = None, retention_policy: RetentionPolicy = None):
         self.config = config or AnomaConfig()
         self.client = None
         self.is_syncing = False
         self.sync_interval = 10  # seconds
+        self.retention = NetworkStatsRetention(retention_policy)
         
     async def start_sync(self):
         """Start continuous data synchronization"""
@@ -39,6 +43,7 @@ class AnomaDataSync:
                 self._sync_resources(),
                 self._sync_intents(),
                 self._update_network_stats(),
+                self._apply_retention(),
                 return_exceptions=True
             )
             
@@ -80,7 +85,7 @@ class AnomaDataSync:
                         )
                         
                         db.session.add(new_block)
-                        db.session.commit()
+                        commit_and_publish(db.session, {'blocks': [new_block]})
                         logger.info(f"Synced new block: {block_height}")
                         
             except Exception as e:
@@ -94,6 +99,7 @@ class AnomaDataSync:
             try:
                 # Get transactions from Anoma indexing service
                 transactions = await self.client.get_transactions(limit=100)
+                new_transactions = []
                 
                 for tx_data in transactions:
                     tx_id = tx_data.get('id') or tx_data.get('hash')
@@ -120,9 +126,10 @@ class AnomaDataSync:
                         )
                         
                         db.session.add(new_tx)
+                        new_transactions.append(new_tx)
                         
                 try:
-                    db.session.commit()
+                    commit_and_publish(db.session, {'transactions': new_transactions})
                     logger.info(f"Synced {len(transactions)} transactions")
                 except IntegrityError:
                     db.session.rollback()
@@ -139,6 +146,7 @@ class AnomaDataSync:
             try:
                 # Get resources from Anoma indexing service
                 resources = await self.client.get_resources(limit=100)
+                new_resources = []
                 
                 for resource_data in resources:
                     resource_id = resource_data.get('id')
@@ -165,9 +173,10 @@ class AnomaDataSync:
                         )
                         
                         db.session.add(new_resource)
+                        new_resources.append(new_resource)
                         
                 try:
-                    db.session.commit()
+                    commit_and_publish(db.session, {'resources': new_resources})
                     logger.info(f"Synced {len(resources)} resources")
                 except IntegrityError:
                     db.session.rollback()
@@ -184,6 +193,8 @@ class AnomaDataSync:
             try:
                 # Get intents from Anoma indexing service
                 intents = await self.client.get_intents(limit=100)
+                # New intents and intents whose status changed
+                changed_intents = []
                 
                 for intent_data in intents:
                     intent_id = intent_data.get('id')
@@ -205,6 +216,7 @@ class AnomaDataSync:
                             
                             if intent_data.get('processing_time'):
                                 existing_intent.processing_time_ms = intent_data['processing_time']
+                            changed_intents.append(existing_intent)
                     else:
                         # Create new intent
                         new_intent = Intent(
@@ -220,9 +232,10 @@ class AnomaDataSync:
                         )
                         
                         db.session.add(new_intent)
+                        changed_intents.append(new_intent)
                         
                 try:
-                    db.session.commit()
+                    commit_and_publish(db.session, {'intents': changed_intents})
                     logger.info(f"Synced {len(intents)} intents")
                 except IntegrityError:
                     db.session.rollback()
@@ -272,7 +285,7 @@ class AnomaDataSync:
                 )
                 
                 db.session.add(new_stats)
-                db.session.commit()
+                commit_and_publish(db.session, {'stats': [new_stats]})
                 logger.info("Updated network statistics")
                 
             except Exception as e:
@@ -280,6 +293,36 @@ class AnomaDataSync:
                 
             await asyncio.sleep(30)  # Update stats every 30 seconds
             
+    async def _apply_retention(self):
+        """Periodically downsample and prune old network statistics
+        
+        Each pass runs in a worker thread: its pauses between delete batches
+        and the periodic VACUUM would otherwise block the sync tasks sharing
+        this event loop.
+        """
+        loop = asyncio.get_running_loop()
+        app = current_app._get_current_object() if has_app_context() else None
+        while self.is_syncing:
+            try:
+                result = await loop.run_in_executor(None, self._run_retention, app)
+                logger.info(f"Applied retention policy: {result}")
+                
+            except Exception as e:
+                logger.error(f"Error applying retention policy: {e}")
+                
+            await asyncio.sleep(self.retention.policy.interval)
+            
+    def _run_retention(self, app):
+        """One retention pass with its own app context (and so its own session)"""
+        if app is None:
+            return self.retention.run_once()
+        with app.app_context():
+            try:
+                return self.retention.run_once()
+            except Exception:
+                db.session.rollback()
+                raise
+            
     def _parse_timestamp(self, timestamp_str):
         """Parse timestamp string to datetime"""
         if not timestamp_str:
@@ -329,7 +372,7 @@ class AnomaDataSync:
 # Global sync service instance
 data_sync_service = None
 
-async def start_data_sync(config: AnomaConfig = None):
+async def start_data_sync(config: AnomaConfig = None, retention_policy: RetentionPolicy = None):
     """Start global data synchronization service"""
     global data_sync_service
     
@@ -337,7 +380,7 @@ async def start_data_sync(config: AnomaConfig = None):
         logger.warning("Data sync service already running")
         return
         
-    data_sync_service = AnomaDataSync(config)
+    data_sync_service = AnomaDataSync(config, retention_policy)
     await data_sync_service.start_sync()
 
 async def stop_data_sync():
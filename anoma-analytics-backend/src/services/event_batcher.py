@@ -0,0 +1,205 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from src.services.event_encoding import EncodedEvent, encode_batch
+
+logger = logging.getLogger(__name__)
+
+# State events -> the state they update. When more than one is pending for a
+# client they are replaced by a single fresh snapshot of that state: dropping
+# a delta would leave a gap, and a slow client needs only the current value.
+COLLAPSIBLE_EVENTS = {'stats_delta': 'stats', 'stats_snapshot': 'stats'}
+
+class _ClientQueue:
+    """Pending events and rate-limit state for one client"""
+    __slots__ = ('events', 'latest', 'tokens', 'refilled_at', 'dropped', 'collapsed')
+
+    def __init__(self, max_queue: int, burst: float):
+        self.events = deque(maxlen=max_queue)
+        # State -> its single pending event, or None when a snapshot must replace several
+        self.latest: Dict[str, Optional[EncodedEvent]] = {}
+        self.tokens = burst
+        self.refilled_at = time.monotonic()
+        self.dropped = 0
+        self.collapsed = 0
+
+class EventBatcher:
+    """Collects updates over a short window and delivers one batch per client per window
+
+    - every event is encoded once by the publisher; a batch is a join of the
+      encoded events, shared by all clients that receive the same events;
+    - each client has a bounded queue (oldest events are dropped when it is
+      full) and a token bucket of max_events_per_second, so a slow client
+      never makes the server buffer without bound;
+    - pending state events (stats deltas) collapse into one snapshot per
+      client, built once per flush by the matching snapshots callback;
+    - clients receiving an identical batch are sent it with a single call.
+
+    start_task and sleep default to threads; pass the Socket.IO server's
+    start_background_task and sleep to run as a green thread under
+    eventlet/gevent.
+    """
+
+    def __init__(self, get_client_rooms: Callable[[], Dict[str, Set[str]]],
+                 send: Callable[[List[str], EncodedEvent], None], window: float = 0.25,
+                 max_events_per_second: float = 200, max_queue: int = 1000,
+                 start_task: Optional[Callable[..., Any]] = None,
+                 sleep: Callable[[float], None] = time.sleep,
+                 snapshots: Optional[Dict[str, Callable[[], EncodedEvent]]] = None):
+        self.get_client_rooms = get_client_rooms
+        self.send = send
+        self.window = window
+        self.max_events_per_second = max_events_per_second
+        self.max_queue = max_queue
+        self.start_task = start_task or self._start_thread
+        self.sleep = sleep
+        self.snapshots = snapshots or {}
+
+        self._pending: List[Tuple[EncodedEvent, FrozenSet[str]]] = []
+        self._pending_lock = threading.Lock()
+        self._clients: Dict[str, _ClientQueue] = {}
+        self._thread = None
+        self.is_running = False
+
+        self.batches_sent = 0
+        self.events_sent = 0
+
+    def publish(self, event: EncodedEvent, rooms: Iterable[str]):
+        """Queue an encoded event for every client in any of the rooms"""
+        with self._pending_lock:
+            self._pending.append((event, frozenset(rooms)))
+
+    def remove_client(self, client_id: str):
+        self._clients.pop(client_id, None)
+
+    def _client_queue(self, client_id: str) -> _ClientQueue:
+        queue = self._clients.get(client_id)
+        if queue is None:
+            queue = self._clients[client_id] = _ClientQueue(self.max_queue, self.max_events_per_second)
+        return queue
+
+    def _enqueue(self, queue: _ClientQueue, event: EncodedEvent):
+        state = COLLAPSIBLE_EVENTS.get(event.event_type)
+        if state in self.snapshots:
+            if state in queue.latest:
+                queue.collapsed += 1
+                queue.latest[state] = None
+            else:
+                queue.latest[state] = event
+            return
+        if len(queue.events) == queue.events.maxlen:
+            queue.dropped += 1
+        queue.events.append(event)
+
+    def _take(self, queue: _ClientQueue, now: float,
+              snapshots: Dict[str, EncodedEvent]) -> List[EncodedEvent]:
+        """Events the client may receive now under its rate limit"""
+        queue.tokens = min(
+            self.max_events_per_second,
+            queue.tokens + (now - queue.refilled_at) * self.max_events_per_second
+        )
+        queue.refilled_at = now
+
+        batch = []
+        # Latest state first, then queued entity events in arrival order
+        for state in list(queue.latest):
+            if queue.tokens < 1:
+                break
+            event = queue.latest.pop(state)
+            if event is None:
+                # Shared by every client collapsed in this flush
+                if state not in snapshots:
+                    snapshots[state] = self.snapshots[state]()
+                event = snapshots[state]
+            batch.append(event)
+            queue.tokens -= 1
+        while queue.events and queue.tokens >= 1:
+            batch.append(queue.events.popleft())
+            queue.tokens -= 1
+        return batch
+
+    def flush(self) -> int:
+        """Distribute pending events to client queues and send one batch per client"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+
+        # Idle windows are the common case with many connections; skip the room scan
+        # (a copy: clients disconnecting in another thread remove their queues meanwhile)
+        if not pending and not any(queue.events or queue.latest for queue in list(self._clients.values())):
+            return 0
+
+        client_rooms = self.get_client_rooms()
+        for client_id in list(self._clients):
+            if client_id not in client_rooms:
+                self.remove_client(client_id)
+
+        if pending:
+            # Clients with identical subscriptions share one matching pass
+            by_rooms: Dict[FrozenSet[str], List[str]] = {}
+            for client_id, rooms in client_rooms.items():
+                by_rooms.setdefault(frozenset(rooms), []).append(client_id)
+
+            for rooms, client_ids in by_rooms.items():
+                matching = [event for event, targets in pending if targets & rooms]
+                if not matching:
+                    continue
+                for client_id in client_ids:
+                    queue = self._client_queue(client_id)
+                    for event in matching:
+                        self._enqueue(queue, event)
+
+        now = time.monotonic()
+        snapshots: Dict[str, EncodedEvent] = {}
+        # Clients that get the same events share one encoded batch and one send
+        recipients: Dict[Tuple[int, ...], Tuple[List[EncodedEvent], List[str]]] = {}
+        for client_id, queue in list(self._clients.items()):
+            batch = self._take(queue, now, snapshots)
+            if batch:
+                recipients.setdefault(tuple(id(event) for event in batch), (batch, []))[1].append(client_id)
+
+        sent = 0
+        for batch, client_ids in recipients.values():
+            self.send(client_ids, encode_batch(batch))
+            sent += len(client_ids)
+            self.events_sent += len(batch) * len(client_ids)
+
+        self.batches_sent += sent
+        return sent
+
+    @staticmethod
+    def _start_thread(target):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        return thread
+
+    def start(self):
+        """Flush every window in a background task"""
+        if self.is_running:
+            return
+        self.is_running = True
+
+        def flush_loop():
+            while self.is_running:
+                started = time.monotonic()
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Error flushing event batches: {e}")
+                self.sleep(max(0.0, self.window - (time.monotonic() - started)))
+
+        self._thread = self.start_task(flush_loop)
+
+    def stop(self):
+        self.is_running = False
+
+    def get_metrics(self) -> Dict[str, int]:
+        queues = list(self._clients.values())
+        return {
+            'batches_sent': self.batches_sent,
+            'events_sent': self.events_sent,
+            'queued': sum(len(queue.events) + len(queue.latest) for queue in queues),
+            'dropped': sum(queue.dropped for queue in queues),
+            'collapsed': sum(queue.collapsed for queue in queues)
+        }
@@ -0,0 +1,140 @@
+import logging
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from src.services.serialization import event_payloads
+
+logger = logging.getLogger(__name__)
+
+# Topics published by the ingest paths; payloads are the rows' API dicts
+TOPICS = ('transactions', 'resources', 'intents', 'blocks', 'stats')
+
+@dataclass(frozen=True)
+class BusEvent:
+    """One published row with its position in the topic's sequence
+
+    seq grows by one per event within a topic; stream identifies the
+    publishing bus, so a restarted publisher (seq back at 1) is not
+    mistaken for a gap.
+    """
+    topic: str
+    seq: int
+    stream: str
+    payload: Dict[str, Any]
+
+Handler = Callable[[BusEvent], None]
+
+class EventBus:
+    """Publish/subscribe for newly committed rows
+
+    Publishers call publish() after their commit succeeded. The bus numbers
+    the event and passes it to its backend, which delivers it to this
+    process's handlers and, for cross-process backends, to other processes
+    (see src/services/bus_backends.py). Handlers run synchronously in the
+    delivering thread, so they must only hand the event off (encode,
+    enqueue) and never block on I/O. A failing handler is logged and does
+    not affect the publisher or other handlers.
+    """
+
+    def __init__(self, backend=None):
+        self._lock = threading.RLock()
+        self._handlers: Dict[str, List[Handler]] = {}
+        self.stream = uuid.uuid4().hex[:12]
+        self._seq: Dict[str, int] = {}
+        self.backend = None
+        self.set_backend(backend)
+
+    def set_backend(self, backend):
+        """Switch delivery backend; the default delivers in this process only"""
+        if backend is None:
+            from src.services.bus_backends import InMemoryBackend
+            backend = InMemoryBackend()
+        with self._lock:
+            if self.backend is not None:
+                self.backend.close()
+            self.backend = backend
+            backend.attach(self.deliver)
+
+    def subscribe(self, topic: str, handler: Handler):
+        with self._lock:
+            handlers = self._handlers.get(topic, [])
+            if handler not in handlers:
+                # Copy-on-write: deliver() iterates without taking the lock
+                self._handlers[topic] = handlers + [handler]
+
+    def unsubscribe(self, topic: str, handler: Handler):
+        with self._lock:
+            self._handlers[topic] = [h for h in self._handlers.get(topic, []) if h != handler]
+
+    def has_subscribers(self, topic: str) -> bool:
+        """Lets publishers skip serializing rows nobody listens to"""
+        return bool(self._handlers.get(topic)) or self.backend.has_peers()
+
+    def publish(self, topic: str, payload: Dict[str, Any]) -> Optional[BusEvent]:
+        # Numbering and sending under one lock keeps every subscriber's view
+        # of a topic in seq order, even with several publishing threads
+        with self._lock:
+            seq = self._seq.get(topic, 0) + 1
+            self._seq[topic] = seq
+            event = BusEvent(topic, seq, self.stream, payload)
+            self.backend.send(event)
+        return event
+
+    def positions(self) -> Dict[str, int]:
+        """Last seq this bus assigned per topic (0 for topics not yet published)"""
+        with self._lock:
+            return {topic: self._seq.get(topic, 0) for topic in TOPICS}
+
+    def publish_many(self, topic: str, payloads: Iterable[Dict[str, Any]]):
+        for payload in payloads:
+            self.publish(topic, payload)
+
+    def deliver(self, event: BusEvent):
+        """Run this process's handlers for an event (called by the backend)"""
+        for handler in self._handlers.get(event.topic, ()):
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f"Error handling {event.topic} event: {e}")
+
+    def close(self):
+        self.backend.close()
+
+# Global event bus instance
+event_bus = EventBus()
+
+def configure_event_bus(config) -> EventBus:
+    """Select the global bus backend from EVENT_BUS_* settings
+
+    EVENT_BUS_BACKEND: 'memory' (single process, default) or 'socket'.
+    With 'socket', EVENT_BUS_ROLE 'publisher' (the ingest process) listens
+    on EVENT_BUS_ADDRESS and 'subscriber' (each websocket worker) connects
+    to it.
+    """
+    from src.services.bus_backends import create_backend
+    event_bus.set_backend(create_backend(
+        config.get('EVENT_BUS_BACKEND', 'memory'),
+        address=config.get('EVENT_BUS_ADDRESS'),
+        role=config.get('EVENT_BUS_ROLE', 'publisher'),
+        max_queue=config.get('EVENT_BUS_MAX_QUEUE', 10000)
+    ))
+    return event_bus
+
+def commit_and_publish(session, objects_by_topic: Dict[str, Iterable[Any]]):
+    """Commit the session, then publish each topic's objects as to_dict() payloads
+
+    Payloads are built after a flush but before the commit: the commit
+    expires the objects, and reading them afterwards would cost one SELECT
+    per object. Nothing is serialized for topics without subscribers.
+    """
+    payloads = {
+        topic: list(objects) for topic, objects in objects_by_topic.items()
+        if event_bus.has_subscribers(topic)
+    }
+    if any(payloads.values()):
+        session.flush()
+        payloads = {topic: event_payloads(objects) for topic, objects in payloads.items()}
+    session.commit()
+    for topic, topic_payloads in payloads.items():
+        event_bus.publish_many(topic, topic_payloads)
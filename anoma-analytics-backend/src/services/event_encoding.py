@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # optional dependency, stdlib json is used without it
+    orjson = None
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def dumps_compact(obj: Any) -> str:
+    """Compact JSON text, via orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), default=_default)
+
+class EncodedEvent:
+    """An update payload encoded to JSON once and reused for every recipient"""
+    __slots__ = ('event_type', 'raw')
+
+    def __init__(self, event_type: str, raw: str):
+        self.event_type = event_type
+        self.raw = raw
+
+    @property
+    def size(self) -> int:
+        return len(self.raw)
+
+class EncodeMetrics:
+    """Counters for time spent encoding update payloads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.events = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float, size: int):
+        with self._lock:
+            self.events += 1
+            self.bytes += size
+            self.seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'events': self.events,
+                'bytes': self.bytes,
+                'total_ms': round(self.seconds * 1000, 3),
+                'avg_us': round(self.seconds / self.events * 1e6, 1) if self.events else 0.0,
+                'max_us': round(self.max_seconds * 1e6, 1)
+            }
+
+def encode_event(event_type: str, data: Any, metrics: Optional[EncodeMetrics] = None,
+                 timestamp: Optional[str] = None, position: Optional[Dict[str, Any]] = None) -> EncodedEvent:
+    """Encode a {'type', 'timestamp', 'data'} update exactly once
+
+    position ({'topic', 'stream', 'seq'}) is added for events a client can
+    later resume after.
+    """
+    started = time.perf_counter()
+    update = {
+        'type': event_type,
+        'timestamp': timestamp or datetime.utcnow().isoformat(),
+        'data': data
+    }
+    if position:
+        update.update(position)
+    raw = dumps_compact(update)
+    if metrics is not None:
+        metrics.record(time.perf_counter() - started, len(raw))
+    return EncodedEvent(event_type, raw)
+
+class PacketJSON:
+    """json module for Socket.IO packets that splices EncodedEvent payloads in verbatim
+
+    Packets are still built by python-socketio; only the payload encoding is
+    skipped, so a pre-encoded event costs a string join per emit.
+    """
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs: Any) -> str:
+        if isinstance(obj, list) and any(isinstance(item, EncodedEvent) for item in obj):
+            return '[' + ','.join(
+                item.raw if isinstance(item, EncodedEvent) else json.dumps(item, separators=(',', ':'))
+                for item in obj
+            ) + ']'
+        return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def loads(s, **kwargs: Any) -> Any:
+        return json.loads(s, **kwargs)
+
+def encode_batch(events) -> EncodedEvent:
+    """Join already-encoded events into one JSON array without re-encoding them"""
+    return EncodedEvent('batch', '[' + ','.join(event.raw for event in events) + ']')
@@ -0,0 +1,226 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import func, select
+from src.models.anoma_models import (
+    db, Resource, Transaction, Intent, Block, NetworkStats,
+    ResourceKind, TransactionType, IntentStatus
+)
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Rows fetched from the database cursor per round trip
+EXPORT_BATCH_SIZE = 1000
+
+# Column sets matching each model's to_dict(), for row-tuple queries
+RESOURCE_COLUMNS = (
+    Resource.id, Resource.kind, Resource.owner, Resource.value, Resource.resource_metadata,
+    Resource.created_at, Resource.consumed_at, Resource.is_consumed,
+    Resource.created_in_transaction, Resource.consumed_in_transaction
+)
+TRANSACTION_COLUMNS = (
+    Transaction.id, Transaction.type, Transaction.block_height, Transaction.timestamp,
+    Transaction.size_bytes, Transaction.gas_used, Transaction.status
+)
+INTENT_COLUMNS = (
+    Intent.id, Intent.creator, Intent.status, Intent.intent_data, Intent.solver,
+    Intent.created_at, Intent.processed_at, Intent.processing_time_ms, Intent.transaction_id
+)
+BLOCK_COLUMNS = (
+    Block.height, Block.hash, Block.timestamp, Block.transaction_count, Block.size_bytes, Block.proposer
+)
+
+class ExportError(ValueError):
+    """Invalid export request parameters"""
+
+def _parse_time(value: Optional[str], name: str) -> Optional[datetime]:
+    """Parse an ISO-8601 query parameter into a naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ExportError(f"{name} must be an ISO-8601 timestamp")
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None) - parsed.utcoffset()
+    return parsed
+
+def _parse_enum(enum_cls, value: str, name: str):
+    """Parse an enum query parameter"""
+    try:
+        return enum_cls(value)
+    except ValueError:
+        choices = ', '.join(member.value for member in enum_cls)
+        raise ExportError(f"{name} must be one of: {choices}")
+
+def _resources_statement(args):
+    statement = select(*RESOURCE_COLUMNS)
+    if args.get('kind'):
+        statement = statement.where(Resource.kind == _parse_enum(ResourceKind, args['kind'], 'kind'))
+    if args.get('owner'):
+        statement = statement.where(Resource.owner == args['owner'])
+    if args.get('is_consumed') is not None:
+        statement = statement.where(Resource.is_consumed == (args['is_consumed'].lower() == 'true'))
+    return statement, Resource.created_at, None
+
+def _transactions_statement(args):
+    # Per-transaction counts come from grouped subqueries joined once,
+    # instead of loading three relationships for every exported row
+    created = select(
+        Resource.created_in_transaction.label('transaction_id'), func.count().label('count')
+    ).group_by(Resource.created_in_transaction).subquery()
+    consumed = select(
+        Resource.consumed_in_transaction.label('transaction_id'), func.count().label('count')
+    ).group_by(Resource.consumed_in_transaction).subquery()
+    intents = select(
+        Intent.transaction_id.label('transaction_id'), func.count().label('count')
+    ).group_by(Intent.transaction_id).subquery()
+
+    statement = select(
+        *TRANSACTION_COLUMNS,
+        func.coalesce(created.c.count, 0).label('created_resources_count'),
+        func.coalesce(consumed.c.count, 0).label('consumed_resources_count'),
+        func.coalesce(intents.c.count, 0).label('intents_count')
+    ).outerjoin(
+        created, created.c.transaction_id == Transaction.id
+    ).outerjoin(
+        consumed, consumed.c.transaction_id == Transaction.id
+    ).outerjoin(
+        intents, intents.c.transaction_id == Transaction.id
+    )
+    if args.get('type'):
+        statement = statement.where(Transaction.type == _parse_enum(TransactionType, args['type'], 'type'))
+    if args.get('status'):
+        statement = statement.where(Transaction.status == args['status'])
+    return statement, Transaction.timestamp, Transaction.block_height
+
+def _intents_statement(args):
+    statement = select(*INTENT_COLUMNS)
+    if args.get('status'):
+        statement = statement.where(Intent.status == _parse_enum(IntentStatus, args['status'], 'status'))
+    if args.get('creator'):
+        statement = statement.where(Intent.creator == args['creator'])
+    if args.get('solver'):
+        statement = statement.where(Intent.solver == args['solver'])
+    return statement, Intent.created_at, None
+
+def _blocks_statement(args):
+    statement = select(*BLOCK_COLUMNS)
+    return statement, Block.timestamp, Block.height
+
+def _network_stats_statement(args):
+    statement = select(
+        NetworkStats.id, NetworkStats.timestamp, NetworkStats.total_resources,
+        NetworkStats.total_transactions, NetworkStats.total_intents, NetworkStats.active_resources,
+        NetworkStats.pending_intents, NetworkStats.avg_processing_time_ms, NetworkStats.tps
+    )
+    return statement, NetworkStats.timestamp, None
+
+EXPORT_ENTITIES = {
+    'resources': _resources_statement,
+    'transactions': _transactions_statement,
+    'intents': _intents_statement,
+    'blocks': _blocks_statement,
+    'network_stats': _network_stats_statement
+}
+
+def build_export_statement(entity: str, args):
+    """Build the SELECT for an export from request arguments
+
+    Supports start/end (ISO-8601) on every entity and min_height/max_height
+    on blocks and transactions. Rows are ordered by height when available,
+    otherwise by time, so exports are stable and resumable.
+    """
+    if entity not in EXPORT_ENTITIES:
+        raise ExportError(f"entity must be one of: {', '.join(EXPORT_ENTITIES)}")
+
+    statement, time_column, height_column = EXPORT_ENTITIES[entity](args)
+
+    start = _parse_time(args.get('start'), 'start')
+    end = _parse_time(args.get('end'), 'end')
+    if start:
+        statement = statement.where(time_column >= start)
+    if end:
+        statement = statement.where(time_column < end)
+
+    min_height = args.get('min_height', type=int)
+    max_height = args.get('max_height', type=int)
+    if (min_height is not None or max_height is not None) and height_column is None:
+        raise ExportError(f"{entity} cannot be filtered by height")
+    if min_height is not None:
+        statement = statement.where(height_column >= min_height)
+    if max_height is not None:
+        statement = statement.where(height_column <= max_height)
+
+    order_column = height_column if height_column is not None else time_column
+    return statement.order_by(order_column)
+
+def _plain(value):
+    """Convert a column value to a JSON/CSV friendly value"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _encode_ndjson(columns: List[str], rows) -> str:
+    return ''.join(
+        json.dumps(dict(zip(columns, [_plain(value) for value in row])), separators=(',', ':')) + '\n'
+        for row in rows
+    )
+
+def _encode_csv(columns: List[str], rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+def stream_export(statement, export_format: str = 'ndjson', compress: bool = False,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """Stream the statement's rows as NDJSON or CSV chunks, optionally gzipped
+
+    Rows are pulled from the database with yield_per, encoded one batch at a
+    time and never accumulated, so memory use does not depend on export size.
+    """
+    encode = _encode_ndjson if export_format == 'ndjson' else _encode_csv
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def emit(text: str) -> bytes:
+        data = text.encode('utf-8')
+        return compressor.compress(data) if compressor else data
+
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    try:
+        columns = list(result.keys())
+        if export_format == 'csv':
+            yield emit(_encode_csv(columns, [columns]))
+
+        for partition in result.partitions():
+            chunk = emit(encode(columns, partition))
+            if chunk:
+                yield chunk
+    finally:
+        result.close()
+
+    if compressor:
+        yield compressor.flush()
+
+def export_filename(entity: str, export_format: str, compress: bool) -> str:
+    """Download filename for an export"""
+    return f"{entity}.{export_format}{'.gz' if compress else ''}"
+
+def export_headers(entity: str, export_format: str, compress: bool) -> Dict[str, str]:
+    """Response headers for an export download"""
+    return {
+        'Content-Type': 'application/gzip' if compress else EXPORT_CONTENT_TYPES[export_format],
+        'Content-Disposition': f'attachment; filename="{export_filename(entity, export_format, compress)}"',
+        'X-Accel-Buffering': 'no'  # let reverse proxies pass chunks through
+    }
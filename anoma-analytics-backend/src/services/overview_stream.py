@@ -0,0 +1,199 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from src.services.event_bus import BusEvent, event_bus
+from src.services.event_encoding import dumps_compact
+from src.services.replay_buffer import ReplayBuffer
+from src.services.versioned_state import VersionedState
+
+logger = logging.getLogger(__name__)
+
+# network_stats row field -> overview field pushed in stats deltas
+STATS_OVERVIEW_FIELDS = {
+    'total_transactions': 'total_transactions',
+    'total_resources': 'total_resources',
+    'total_intents': 'total_intents',
+    'active_resources': 'active_resources',
+    'pending_intents': 'pending_intents',
+    'avg_processing_time_ms': 'avg_processing_time_ms',
+    'tps': 'current_tps'
+}
+
+# Comment line: keeps proxies from timing the stream out and surfaces dead clients
+HEARTBEAT = ': heartbeat\n\n'
+
+def stats_overview_changes(stats_row: Dict[str, Any]) -> Dict[str, Any]:
+    """Overview fields carried by a committed network_stats row"""
+    return {field: stats_row[key] for key, field in STATS_OVERVIEW_FIELDS.items() if key in stats_row}
+
+def format_sse(event_type: str, data: Any, event_id: Optional[str] = None) -> str:
+    """One Server-Sent Events message; compact JSON never spans lines"""
+    lines = [f"id: {event_id}"] if event_id else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {dumps_compact(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+def parse_event_id(event_id: Optional[str]):
+    """(stream, seq) from a Last-Event-ID of the form 'stream:seq', or (None, None)"""
+    stream, _, seq = (event_id or '').rpartition(':')
+    if not stream or not seq.isdigit():
+        return None, None
+    return stream, int(seq)
+
+class StreamLimitReached(Exception):
+    """max_streams streams are already open in this process"""
+
+class _Listener:
+    """One open stream: a bounded queue of encoded messages"""
+
+    def __init__(self, max_queue: int):
+        self.messages = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def offer(self, message: str):
+        try:
+            self.messages.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+class _Subscription:
+    """Message iterator for one stream; close() unregisters it even if never iterated"""
+
+    def __init__(self, messages: Iterator[str], unsubscribe: Callable[[], None]):
+        self._messages = messages
+        self._unsubscribe = unsubscribe
+
+    def __iter__(self):
+        return self._messages
+
+    def close(self):
+        self._messages.close()
+        self._unsubscribe()
+
+class OverviewStream:
+    """Overview statistics kept current from the event bus and streamed as SSE deltas
+
+    Starts from one overview query, then folds committed network_stats rows
+    and block heights into a VersionedState. Each change is encoded once as
+    a 'stats_delta' message with id 'stream:seq' and queued to every open
+    stream. A client reconnecting with Last-Event-ID gets the deltas it
+    missed from a ReplayBuffer, or a 'snapshot' when they are gone. A
+    client may see a delta it already has (seq not above its own) and
+    should ignore it.
+
+    Every open stream holds a server thread (or green thread) until the
+    client leaves, so at most max_streams are served at once (0: no cap).
+    """
+
+    TOPIC = 'overview'
+
+    def __init__(self, load_overview: Callable[[], Dict[str, Any]], replay_size: int = 1000,
+                 max_queue: int = 100, max_streams: int = 0):
+        self.state = VersionedState()
+        self.replay = ReplayBuffer(replay_size)
+        self.max_queue = max_queue
+        self.max_streams = max_streams
+        self._lock = threading.Lock()
+        self._listeners: List[_Listener] = []
+
+        self.resumes = 0
+        self.snapshots = 0
+        self.dropped = 0
+        self.rejected = 0
+
+        self.state.update(load_overview())
+        self.replay.seed(self.state.stream, {self.TOPIC: self.state.seq})
+        event_bus.subscribe('stats', self._on_stats_event)
+        event_bus.subscribe('blocks', self._on_block_event)
+
+    def _on_stats_event(self, bus_event: BusEvent):
+        with self._lock:
+            self._send(self.state.patch(stats_overview_changes(bus_event.payload)))
+
+    def _on_block_event(self, bus_event: BusEvent):
+        height = bus_event.payload.get('height', bus_event.payload.get('block_height'))
+        with self._lock:
+            if height and height > self.state.snapshot()['state'].get('current_block_height', 0):
+                self._send(self.state.patch({'current_block_height': height}))
+
+    def _send(self, delta: Optional[Dict[str, Any]]):
+        # Called under the lock, so the replay buffer sees seqs in order
+        if delta is None:
+            return
+        message = format_sse('stats_delta', delta, f"{delta['stream']}:{delta['seq']}")
+        self.replay.record(self.TOPIC, delta['stream'], delta['seq'], message, ())
+        for listener in self._listeners:
+            listener.offer(message)
+
+    def _catch_up(self, last_event_id: Optional[str]) -> List[str]:
+        stream, seq = parse_event_id(last_event_id)
+        entries = self.replay.since(self.TOPIC, stream, seq) if stream else None
+        if entries is not None:
+            self.resumes += 1
+            return [entry.event for entry in entries]
+        self.snapshots += 1
+        snapshot = self.state.snapshot()
+        return [format_sse('snapshot', snapshot, f"{snapshot['stream']}:{snapshot['seq']}")]
+
+    def stream(self, last_event_id: Optional[str] = None, heartbeat: float = 15,
+               retry_ms: int = 3000) -> Iterable[str]:
+        """Messages for one client until it disconnects or falls max_queue messages behind
+
+        Registers the client straight away and raises StreamLimitReached
+        when max_streams are already open, so the caller can still answer
+        with an error status. A client that falls behind has its stream
+        ended; EventSource then reconnects with Last-Event-ID and resumes.
+        """
+        listener = _Listener(self.max_queue)
+        with self._lock:
+            if self.max_streams and len(self._listeners) >= self.max_streams:
+                self.rejected += 1
+                raise StreamLimitReached(f"{self.max_streams} overview streams already open")
+            # Registered before catching up so nothing committed in between is lost
+            self._listeners = self._listeners + [listener]
+            backlog = self._catch_up(last_event_id)
+        return _Subscription(self._messages(listener, backlog, heartbeat, retry_ms),
+                             lambda: self._remove(listener))
+
+    def _messages(self, listener: _Listener, backlog: List[str], heartbeat: float,
+                  retry_ms: int) -> Iterator[str]:
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            yield from backlog
+            while not listener.overflowed:
+                try:
+                    yield listener.messages.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield HEARTBEAT
+            self.dropped += 1
+            logger.debug("Overview stream client fell behind, ending its stream")
+        finally:
+            self._remove(listener)
+
+    def _remove(self, listener: _Listener):
+        with self._lock:
+            self._listeners = [other for other in self._listeners if other is not listener]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            'open_streams': len(self._listeners),
+            'seq': self.state.seq,
+            'resumed': self.resumes,
+            'snapshots': self.snapshots,
+            'dropped': self.dropped,
+            'rejected': self.rejected
+        }
+
+_overview_stream = None
+_overview_stream_lock = threading.Lock()
+
+def get_overview_stream(load_overview: Callable[[], Dict[str, Any]], replay_size: int = 1000,
+                        max_queue: int = 100, max_streams: int = 0) -> OverviewStream:
+    """Process-wide overview stream, loaded with load_overview on first use"""
+    global _overview_stream
+    with _overview_stream_lock:
+        if _overview_stream is None:
+            _overview_stream = OverviewStream(load_overview, replay_size, max_queue, max_streams)
+        return _overview_stream
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select, types
+from werkzeug.datastructures import MultiDict
+from src.models.anoma_models import db, Block
+from src.services.export import EXPORT_BATCH_SIZE, EXPORT_ENTITIES, ExportError, build_export_statement
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Blocks are partitioned by height range, everything else by UTC day
+BLOCK_PARTITION_SIZE = 10000
+MANIFEST_FILENAME = 'manifest.json'
+
+class ExportInProgress(RuntimeError):
+    """Another Parquet export run holds the exporter"""
+
+def parquet_available() -> bool:
+    """Whether pyarrow is installed"""
+    return pq is not None
+
+def _arrow_type(column_type):
+    """Map a SQLAlchemy column type to an Arrow type"""
+    if isinstance(column_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, types.Float):
+        return pa.float64()
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp('us')
+    return pa.string()
+
+def _plain(value):
+    return value.value if isinstance(value, Enum) else value
+
+class ParquetExporter:
+    """Incremental Parquet snapshots of the analytics tables
+
+    Each entity is written as immutable partition files (one per UTC day, or
+    per BLOCK_PARTITION_SIZE heights for blocks). Only complete partitions are
+    written - days before today, block ranges below the chain tip - and a
+    partition already listed in the manifest is never rewritten, so each run
+    only appends what is new since the last one.
+    """
+
+    def __init__(self, export_dir: str, batch_size: int = EXPORT_BATCH_SIZE,
+                 block_partition_size: int = BLOCK_PARTITION_SIZE):
+        self.export_dir = export_dir
+        self.batch_size = batch_size
+        self.block_partition_size = block_partition_size
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.export_dir, MANIFEST_FILENAME)
+
+    def load_manifest(self) -> Dict[str, Dict[str, Dict]]:
+        """Read the manifest of written partitions ({entity: {partition: info}})"""
+        try:
+            with open(self.manifest_path) as manifest_file:
+                return json.load(manifest_file)
+        except FileNotFoundError:
+            return {}
+
+    def _save_manifest(self, manifest: Dict):
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    def partition_path(self, entity: str, partition: str) -> Optional[str]:
+        """Absolute path of a written partition, or None if it is not in the manifest"""
+        info = self.load_manifest().get(entity, {}).get(partition)
+        if not info:
+            return None
+        return os.path.join(self.export_dir, info['file'])
+
+    def run(self, entities: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Write all new complete partitions; returns the partitions written per entity"""
+        if not parquet_available():
+            raise RuntimeError("pyarrow is not installed")
+        entities = entities or list(EXPORT_ENTITIES)
+        unknown = [entity for entity in entities if entity not in EXPORT_ENTITIES]
+        if unknown:
+            raise ExportError(f"entity must be one of: {', '.join(EXPORT_ENTITIES)}")
+        if not self._lock.acquire(blocking=False):
+            raise ExportInProgress("Parquet export already running")
+
+        try:
+            os.makedirs(self.export_dir, exist_ok=True)
+            manifest = self.load_manifest()
+            written = {}
+
+            for entity in entities:
+                done = manifest.setdefault(entity, {})
+                written[entity] = []
+                for partition, args in self._pending_partitions(entity, done):
+                    done[partition] = self._write_partition(entity, partition, args)
+                    written[entity].append(partition)
+                    # Persist after every partition so an interrupted run resumes cleanly
+                    self._save_manifest(manifest)
+
+            return written
+        finally:
+            self._lock.release()
+
+    def _pending_partitions(self, entity: str, done: Dict) -> List[Tuple[str, MultiDict]]:
+        """Complete partitions not yet in the manifest, oldest first"""
+        if entity == 'blocks':
+            return self._pending_height_partitions(done)
+        return self._pending_day_partitions(entity, done)
+
+    def _pending_day_partitions(self, entity: str, done: Dict) -> List[Tuple[str, MultiDict]]:
+        _, time_column, _ = EXPORT_ENTITIES[entity](MultiDict())
+        today = datetime.utcnow().date()
+
+        query = select(func.date(time_column)).where(time_column < datetime.combine(today, datetime.min.time()))
+        if done:
+            last_day = date.fromisoformat(max(done).split('=', 1)[1])
+            query = query.where(time_column >= datetime.combine(last_day + timedelta(days=1), datetime.min.time()))
+
+        days = [date.fromisoformat(row[0]) for row in db.session.execute(
+            query.distinct().order_by(func.date(time_column))
+        ) if row[0]]
+        return [
+            (f"date={day.isoformat()}", MultiDict({
+                'start': day.isoformat(),
+                'end': (day + timedelta(days=1)).isoformat()
+            }))
+            for day in days
+        ]
+
+    def _pending_height_partitions(self, done: Dict) -> List[Tuple[str, MultiDict]]:
+        lowest, highest = db.session.query(func.min(Block.height), func.max(Block.height)).one()
+        if highest is None:
+            return []
+
+        size = self.block_partition_size
+        if done:
+            start = int(max(done).split('=', 1)[1].split('-')[1]) + 1
+        else:
+            start = lowest // size * size
+
+        partitions = []
+        # A range is complete once a higher block exists
+        while start + size - 1 < highest:
+            end = start + size - 1
+            partitions.append((f"height={start:010d}-{end:010d}", MultiDict({
+                'min_height': str(start),
+                'max_height': str(end)
+            })))
+            start += size
+        return partitions
+
+    def _write_partition(self, entity: str, partition: str, args: MultiDict) -> Dict:
+        """Stream one partition from the database into a Parquet file"""
+        statement = build_export_statement(entity, args)
+        schema = pa.schema([
+            (column.name, _arrow_type(column.type)) for column in statement.selected_columns
+        ])
+
+        relative_path = os.path.join(entity, f"{partition}.parquet")
+        path = os.path.join(self.export_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp'
+
+        rows = 0
+        result = db.session.execute(statement.execution_options(yield_per=self.batch_size))
+        try:
+            with pq.ParquetWriter(temp_path, schema, compression='zstd') as writer:
+                for batch in result.partitions():
+                    columns = list(zip(*batch))
+                    writer.write_batch(pa.record_batch([
+                        pa.array([_plain(value) for value in values], type=field.type)
+                        for values, field in zip(columns, schema)
+                    ], schema=schema))
+                    rows += len(batch)
+        finally:
+            result.close()
+
+        os.replace(temp_path, path)
+        logger.info(f"Exported {rows} {entity} rows to {relative_path}")
+        return {
+            'file': relative_path,
+            'rows': rows,
+            'size_bytes': os.path.getsize(path),
+            'exported_at': datetime.utcnow().isoformat()
+        }
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def get_parquet_exporter(export_dir: str) -> ParquetExporter:
+    """Process-wide exporter, so concurrent runs are serialized"""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None or _exporter.export_dir != export_dir:
+            _exporter = ParquetExporter(export_dir)
+        return _exporter
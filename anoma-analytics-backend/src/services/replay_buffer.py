@@ -0,0 +1,76 @@
+import itertools
+import threading
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from src.services.event_encoding import EncodedEvent
+
+class ReplayEntry:
+    """A delivered event kept for replay, already encoded, with the rooms it went to"""
+    __slots__ = ('seq', 'order', 'event', 'rooms')
+
+    def __init__(self, seq: int, order: int, event: EncodedEvent, rooms: FrozenSet[str]):
+        self.seq = seq
+        self.order = order
+        self.event = event
+        self.rooms = rooms
+
+class _TopicLog:
+    __slots__ = ('stream', 'last_seq', 'entries')
+
+    def __init__(self, stream: Optional[str], last_seq: int, size: int):
+        self.stream = stream
+        self.last_seq = last_seq
+        self.entries = deque(maxlen=size)
+
+class ReplayBuffer:
+    """Bounded per-topic log of recent events, for clients resuming from a (stream, seq) position
+
+    Each topic keeps an unbroken run of seqs ending at its last event; when
+    an event arrives out of line (a gap after a bus reconnect, or a new
+    stream after a publisher restart) the run restarts at that event. A
+    resume is only served when the run covers everything after the
+    client's position; otherwise since() returns None and the client needs
+    a full snapshot.
+    """
+
+    def __init__(self, size: int = 1000):
+        self.size = size
+        self._lock = threading.Lock()
+        self._topics: Dict[str, _TopicLog] = {}
+        self._order = itertools.count()
+
+    def seed(self, stream: str, positions: Dict[str, int]):
+        """Start topics at known positions, so nothing before now is expected to be replayable"""
+        with self._lock:
+            for topic, seq in positions.items():
+                if topic not in self._topics:
+                    self._topics[topic] = _TopicLog(stream, seq, self.size)
+
+    def record(self, topic: str, stream: str, seq: int, event: EncodedEvent, rooms: Iterable[str]):
+        with self._lock:
+            log = self._topics.get(topic)
+            if log is None or log.stream != stream or seq != log.last_seq + 1:
+                if log is not None and log.stream == stream and seq <= log.last_seq:
+                    return  # already recorded
+                log = self._topics[topic] = _TopicLog(stream, seq - 1, self.size)
+            log.entries.append(ReplayEntry(seq, next(self._order), event, frozenset(rooms)))
+            log.last_seq = seq
+
+    def positions(self) -> Dict[str, Tuple[Optional[str], int]]:
+        """Current (stream, seq) per topic, handed to clients with a snapshot"""
+        with self._lock:
+            return {topic: (log.stream, log.last_seq) for topic, log in self._topics.items()}
+
+    def since(self, topic: str, stream: Optional[str], seq: Optional[int]) -> Optional[List[ReplayEntry]]:
+        """Entries after seq, or None when they are not all still buffered"""
+        with self._lock:
+            log = self._topics.get(topic)
+            if log is None or seq is None or log.stream != stream or seq > log.last_seq:
+                return None
+            if seq == log.last_seq:
+                return []
+            # The run starts one past the seq it was reset at; entries are contiguous
+            first_seq = log.entries[0].seq if log.entries else log.last_seq + 1
+            if seq + 1 < first_seq:
+                return None
+            return list(itertools.islice(log.entries, seq + 1 - first_seq, None))
@@ -0,0 +1,190 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import cast, text
+from src.models.anoma_models import db, NetworkStats, NetworkStatsHourly, NetworkStatsDaily
+
+logger = logging.getLogger(__name__)
+
+HOUR_SECONDS = 3600
+DAY_SECONDS = 86400
+
+@dataclass
+class RetentionPolicy:
+    """Retention policy for network statistics history"""
+    raw_days: int = 7  # Keep raw network_stats rows this long
+    hourly_days: int = 90  # Keep hourly rollups this long, then fold into daily
+    batch_size: int = 1000  # Rows deleted per transaction
+    batch_pause: float = 0.05  # Seconds between delete batches
+    interval: int = 3600  # Seconds between retention runs
+    vacuum_every: int = 24  # Runs between VACUUMs (0 disables)
+
+class NetworkStatsRetention:
+    """Downsamples old network_stats into hourly/daily rollups and deletes raw rows in batches"""
+
+    def __init__(self, policy: RetentionPolicy = None):
+        self.policy = policy or RetentionPolicy()
+        if self.policy.raw_days <= 0 or self.policy.hourly_days < self.policy.raw_days:
+            raise ValueError("Retention policy requires 0 < raw_days <= hourly_days")
+        self.runs = 0
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Run one retention pass and return counts of rolled up/deleted rows"""
+        now = now or datetime.utcnow()
+        raw_cutoff = self._align(now - timedelta(days=self.policy.raw_days), HOUR_SECONDS)
+        hourly_cutoff = self._align(now - timedelta(days=self.policy.hourly_days), DAY_SECONDS)
+
+        result = {
+            'hourly_rollups': self._rollup_raw(raw_cutoff),
+            'network_stats_deleted': self._delete_before(NetworkStats.id, NetworkStats.timestamp, raw_cutoff),
+            'daily_rollups': self._rollup_hourly(hourly_cutoff),
+            'hourly_deleted': self._delete_before(
+                NetworkStatsHourly.bucket_start, NetworkStatsHourly.bucket_start, hourly_cutoff
+            )
+        }
+
+        self.runs += 1
+        self._optimize(vacuum=self.policy.vacuum_every > 0 and self.runs % self.policy.vacuum_every == 0)
+        return result
+
+    def _align(self, moment: datetime, bucket_seconds: int) -> datetime:
+        """Round a datetime down to the start of its bucket"""
+        epoch = int((moment - datetime(1970, 1, 1)).total_seconds())
+        return datetime.utcfromtimestamp(epoch // bucket_seconds * bucket_seconds)
+
+    def _watermark(self, model, bucket_seconds: int) -> datetime:
+        """End of the newest bucket already rolled up into model"""
+        latest = db.session.query(db.func.max(model.bucket_start)).scalar()
+        return latest + timedelta(seconds=bucket_seconds) if latest else datetime(1970, 1, 1)
+
+    def _rollup_raw(self, cutoff: datetime) -> int:
+        """Fold complete hours of raw rows older than cutoff into network_stats_hourly"""
+        start = self._watermark(NetworkStatsHourly, HOUR_SECONDS)
+        if start >= cutoff:
+            return 0
+
+        bucket = cast(db.func.strftime('%s', NetworkStats.timestamp), db.Integer) // HOUR_SECONDS
+        rows = db.session.query(
+            bucket.label('bucket'),
+            db.func.count(NetworkStats.id).label('samples'),
+            db.func.max(NetworkStats.total_resources).label('total_resources'),
+            db.func.max(NetworkStats.total_transactions).label('total_transactions'),
+            db.func.max(NetworkStats.total_intents).label('total_intents'),
+            db.func.avg(NetworkStats.active_resources).label('active_resources'),
+            db.func.avg(NetworkStats.pending_intents).label('pending_intents'),
+            db.func.avg(NetworkStats.avg_processing_time_ms).label('avg_processing_time_ms'),
+            db.func.min(NetworkStats.avg_processing_time_ms).label('avg_processing_time_ms_min'),
+            db.func.max(NetworkStats.avg_processing_time_ms).label('avg_processing_time_ms_max'),
+            db.func.avg(NetworkStats.tps).label('tps'),
+            db.func.min(NetworkStats.tps).label('tps_min'),
+            db.func.max(NetworkStats.tps).label('tps_max')
+        ).filter(
+            NetworkStats.timestamp >= start,
+            NetworkStats.timestamp < cutoff
+        ).group_by(bucket).all()
+
+        for row in rows:
+            self._merge(NetworkStatsHourly, datetime.utcfromtimestamp(row.bucket * HOUR_SECONDS), row)
+        db.session.commit()
+        return len(rows)
+
+    def _rollup_hourly(self, cutoff: datetime) -> int:
+        """Fold complete days of hourly rollups older than cutoff into network_stats_daily"""
+        start = self._watermark(NetworkStatsDaily, DAY_SECONDS)
+        if start >= cutoff:
+            return 0
+
+        hourly = NetworkStatsHourly
+        bucket = cast(db.func.strftime('%s', hourly.bucket_start), db.Integer) // DAY_SECONDS
+        samples = db.func.sum(hourly.samples)
+
+        def weighted(column):
+            return db.func.sum(column * hourly.samples) / samples
+
+        rows = db.session.query(
+            bucket.label('bucket'),
+            samples.label('samples'),
+            db.func.max(hourly.total_resources).label('total_resources'),
+            db.func.max(hourly.total_transactions).label('total_transactions'),
+            db.func.max(hourly.total_intents).label('total_intents'),
+            weighted(hourly.active_resources).label('active_resources'),
+            weighted(hourly.pending_intents).label('pending_intents'),
+            weighted(hourly.avg_processing_time_ms).label('avg_processing_time_ms'),
+            db.func.min(hourly.avg_processing_time_ms_min).label('avg_processing_time_ms_min'),
+            db.func.max(hourly.avg_processing_time_ms_max).label('avg_processing_time_ms_max'),
+            weighted(hourly.tps).label('tps'),
+            db.func.min(hourly.tps_min).label('tps_min'),
+            db.func.max(hourly.tps_max).label('tps_max')
+        ).filter(
+            hourly.bucket_start >= start,
+            hourly.bucket_start < cutoff
+        ).group_by(bucket).all()
+
+        for row in rows:
+            self._merge(NetworkStatsDaily, datetime.utcfromtimestamp(row.bucket * DAY_SECONDS), row)
+        db.session.commit()
+        return len(rows)
+
+    def _merge(self, model, bucket_start: datetime, row):
+        """Insert a rollup bucket, or merge it sample-weighted into an existing one"""
+        existing = db.session.get(model, bucket_start)
+        if not existing:
+            db.session.add(model(
+                bucket_start=bucket_start,
+                samples=row.samples,
+                total_resources=row.total_resources,
+                total_transactions=row.total_transactions,
+                total_intents=row.total_intents,
+                active_resources=row.active_resources,
+                pending_intents=row.pending_intents,
+                avg_processing_time_ms=row.avg_processing_time_ms,
+                avg_processing_time_ms_min=row.avg_processing_time_ms_min,
+                avg_processing_time_ms_max=row.avg_processing_time_ms_max,
+                tps=row.tps,
+                tps_min=row.tps_min,
+                tps_max=row.tps_max
+            ))
+            return
+
+        samples = existing.samples + row.samples
+        for column in ('active_resources', 'pending_intents', 'avg_processing_time_ms', 'tps'):
+            merged = (getattr(existing, column) * existing.samples + getattr(row, column) * row.samples) / samples
+            setattr(existing, column, merged)
+        for column in ('total_resources', 'total_transactions', 'total_intents',
+                       'avg_processing_time_ms_max', 'tps_max'):
+            setattr(existing, column, max(getattr(existing, column), getattr(row, column)))
+        for column in ('avg_processing_time_ms_min', 'tps_min'):
+            setattr(existing, column, min(getattr(existing, column), getattr(row, column)))
+        existing.samples = samples
+
+    def _delete_before(self, key, column, cutoff: datetime) -> int:
+        """Delete rows older than cutoff in small transactions so writers are never blocked for long"""
+        deleted = 0
+        while True:
+            ids = [row[0] for row in db.session.query(key).filter(
+                column < cutoff
+            ).order_by(column).limit(self.policy.batch_size).all()]
+            if not ids:
+                return deleted
+
+            db.session.query(key.class_).filter(key.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            deleted += len(ids)
+
+            if len(ids) < self.policy.batch_size:
+                return deleted
+            time.sleep(self.policy.batch_pause)
+
+    def _optimize(self, vacuum: bool):
+        """Refresh planner statistics and periodically reclaim disk space"""
+        is_sqlite = db.engine.dialect.name == 'sqlite'
+        db.session.execute(text('PRAGMA optimize' if is_sqlite else 'ANALYZE'))
+        db.session.commit()
+
+        if vacuum:
+            # VACUUM cannot run inside a transaction
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                conn.execute(text('VACUUM'))
+            logger.info("Vacuumed analytics database")
@@ -0,0 +1,151 @@
+import math
+from typing import Any, Callable, Dict, List, Tuple
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import func, inspect, select, types
+from src.models.anoma_models import db, Intent, Resource, Transaction
+
+try:
+    import orjson
+except ImportError:  # optional dependency, the stdlib provider is used without it
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson
+
+    Follows DefaultJSONProvider semantics (sorted keys, compact output unless
+    debugging, HTTP dates for datetime objects) so responses do not change
+    shape; only non-ASCII text is emitted as UTF-8 instead of \\u escapes.
+    Anything orjson cannot handle falls back to the stdlib encoder.
+    """
+
+    def _options(self, indent: bool) -> int:
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options(indent))
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits
+            dump_args = {'indent': 2} if indent else {'separators': (',', ':')}
+            return super().dumps(obj, **dump_args).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if set(kwargs) - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+def install_json_provider(app):
+    """Use the orjson provider when orjson is installed"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    return app
+
+def _column_converter(column_type) -> Callable[[Any], Any]:
+    """Value converter for a column, chosen once per query instead of per value"""
+    if isinstance(column_type, types.Enum) and column_type.enum_class is not None:
+        return lambda value: value.value if value is not None else None
+    if isinstance(column_type, types.DateTime):
+        return lambda value: value.isoformat() if value is not None else None
+    return None
+
+class RowSerializer:
+    """Turns row tuples from a column SELECT into dicts matching Model.to_dict()
+
+    Skips ORM object construction and attribute instrumentation entirely; the
+    Enum/DateTime conversions are resolved from the column types up front.
+    """
+
+    def __init__(self, statement):
+        self.keys = [column.key for column in statement.selected_columns]
+        self.converters = [_column_converter(column.type) for column in statement.selected_columns]
+        self._plain = not any(self.converters)
+
+    def __call__(self, row) -> Dict[str, Any]:
+        if self._plain:
+            return dict(zip(self.keys, row))
+        return {
+            key: convert(value) if convert else value
+            for key, convert, value in zip(self.keys, self.converters, row)
+        }
+
+    def many(self, rows) -> List[Dict[str, Any]]:
+        return [self(row) for row in rows]
+
+def paginate_rows(statement, page: int, per_page: int) -> Tuple[List[Any], Dict[str, Any]]:
+    """LIMIT/OFFSET pagination over a column SELECT (same fields as Pagination)"""
+    page = max(page, 1)
+    if per_page < 1:
+        per_page = 20
+
+    total = db.session.execute(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    ).scalar()
+    rows = db.session.execute(statement.limit(per_page).offset((page - 1) * per_page)).all()
+    pages = math.ceil(total / per_page) if total else 0
+
+    return rows, {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': pages,
+        'has_next': page < pages,
+        'has_prev': page > 1
+    }
+
+def transaction_counts(transaction_ids):
+    """Created/consumed resource and intent counts for a batch of transactions"""
+    counts = {
+        transaction_id: {'created_resources_count': 0, 'consumed_resources_count': 0, 'intents_count': 0}
+        for transaction_id in transaction_ids
+    }
+    if not transaction_ids:
+        return counts
+    
+    # One grouped query per relationship instead of three lazy loads per row
+    for key, column in (
+        ('created_resources_count', Resource.created_in_transaction),
+        ('consumed_resources_count', Resource.consumed_in_transaction),
+        ('intents_count', Intent.transaction_id)
+    ):
+        grouped = db.session.execute(
+            select(column, func.count()).where(column.in_(transaction_ids)).group_by(column)
+        )
+        for transaction_id, count in grouped:
+            counts[transaction_id][key] = count
+    return counts
+
+def _column_values(obj) -> Dict[str, Any]:
+    """An object's column attributes, converted like RowSerializer converts row values"""
+    values = {}
+    for attr in inspect(obj).mapper.column_attrs:
+        convert = _column_converter(attr.columns[0].type)
+        value = getattr(obj, attr.key)
+        values[attr.key] = convert(value) if convert else value
+    return values
+
+def event_payloads(objects) -> List[Dict[str, Any]]:
+    """to_dict() payloads for flushed objects, without per-row relationship loads
+
+    Transaction.to_dict() lazy-loads three relationships to count them; here
+    the counts for all transactions come from one grouped query each.
+    """
+    counts = transaction_counts([obj.id for obj in objects if isinstance(obj, Transaction)])
+    return [
+        {**_column_values(obj), **counts[obj.id]} if isinstance(obj, Transaction) else obj.to_dict()
+        for obj in objects
+    ]
@@ -0,0 +1,52 @@
+import threading
+import time
+from typing import Callable, Optional, Tuple
+from src.services.event_encoding import EncodedEvent
+
+class SnapshotCache:
+    """Pre-encoded snapshot that is rebuilt at most once per invalidation
+
+    invalidate() only marks the snapshot stale; the next get() rebuilds it
+    under a lock, so a burst of concurrent callers costs one build and the
+    rest are served from memory. max_age bounds staleness for writes this
+    process never sees a commit for (e.g. another process writing the same
+    database); 0 disables it.
+    """
+
+    def __init__(self, build: Callable[[], EncodedEvent], max_age: float = 0):
+        self.build = build
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # (generation, built_at, snapshot), replaced as a whole so readers never see a torn entry
+        self._entry: Optional[Tuple[int, float, EncodedEvent]] = None
+        self._generation = 0
+
+        self.builds = 0
+        self.hits = 0
+
+    def invalidate(self):
+        # Bumping the generation also discards a build that was running concurrently
+        self._generation += 1
+
+    def _cached(self) -> Optional[EncodedEvent]:
+        entry = self._entry
+        if entry is None or entry[0] != self._generation:
+            return None
+        if self.max_age and time.monotonic() - entry[1] >= self.max_age:
+            return None
+        return entry[2]
+
+    def get(self) -> EncodedEvent:
+        snapshot = self._cached()
+        if snapshot is None:
+            with self._lock:
+                # Another caller may have rebuilt it while we waited
+                snapshot = self._cached()
+                if snapshot is None:
+                    generation = self._generation
+                    snapshot = self.build()
+                    self._entry = (generation, time.monotonic(), snapshot)
+                    self.builds += 1
+                    return snapshot
+        self.hits += 1
+        return snapshot
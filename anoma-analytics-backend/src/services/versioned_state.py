@@ -0,0 +1,49 @@
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+class VersionedState:
+    """Latest value of a flat dict with a sequence number bumped on every change
+
+    Clients hold a snapshot (stream, seq, state) and apply deltas in order:
+    a delta with seq == held seq + 1 is applied, an older one is ignored, and
+    a gap (or a different stream after a server restart) means the client
+    must ask for a fresh snapshot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Identifies this sequence; seq restarts from 0 whenever the service restarts
+        self.stream = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._state: Dict[str, Any] = {}
+
+    def update(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Replace the state; returns a delta message, or None when nothing changed"""
+        return self._apply(state, replace=True)
+
+    def patch(self, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Change only the given fields; returns a delta message, or None when nothing changed"""
+        return self._apply(fields, replace=False)
+
+    def _apply(self, fields: Dict[str, Any], replace: bool) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            changes = {
+                key: value for key, value in fields.items()
+                if key not in self._state or self._state[key] != value
+            }
+            removed = [key for key in self._state if key not in fields] if replace else []
+            if not changes and not removed:
+                return None
+
+            self.seq += 1
+            self._state = dict(fields) if replace else {**self._state, **changes}
+            delta = {'stream': self.stream, 'seq': self.seq, 'changes': changes}
+            if removed:
+                delta['removed'] = removed
+            return delta
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full state message a client can resume deltas from"""
+        with self._lock:
+            return {'stream': self.stream, 'seq': self.seq, 'state': dict(self._state)}
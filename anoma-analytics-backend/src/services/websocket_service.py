@@ -2,15 +2,48 @@ import asyncio
 import json
 import logging
 from datetime import datetime
-from flask import Flask
-from flask_socketio import SocketIO, emit, disconnect
-from typing import Dict, List, Any
+from flask import Flask, request
+from flask_socketio import SocketIO, emit, disconnect, join_room, leave_room, rooms
+from sqlalchemy import event
+from typing import Dict, List, Any, Iterable, Optional, Tuple
 from src.models.anoma_models import (
     db, Resource, Transaction, Intent, Block, NetworkStats
 )
+from src.services.async_mode import resolve_async_mode
+from src.services.event_batcher import EventBatcher
+from src.services.event_bus import BusEvent, event_bus
+from src.services.event_encoding import EncodeMetrics, PacketJSON, encode_batch, encode_event
+from src.services.overview_stream import stats_overview_changes
+from src.services.replay_buffer import ReplayBuffer
+from src.services.snapshot_cache import SnapshotCache
+from src.services.versioned_state import VersionedState
 
 logger = logging.getLogger(__name__)
 
+# Topics clients can subscribe to; new clients start subscribed to all of them
+TOPICS = ('transactions', 'resources', 'intents', 'blocks', 'stats')
+
+# Topics whose events carry a bus position and can be replayed to resuming
+# clients; stats are state, a resuming client just gets a fresh snapshot
+REPLAY_TOPICS = ('transactions', 'resources', 'intents', 'blocks')
+
+# Optional per-topic filters: subscribe payload key -> (topic, event field)
+TOPIC_FILTERS = {
+    'owners': ('resources', 'owner'),
+    'creators': ('intents', 'creator'),
+    'solvers': ('intents', 'solver')
+}
+
+def topic_room(topic: str, field: Optional[str] = None, value: Optional[str] = None) -> str:
+    """Socket.IO room name for a topic, or for a topic filtered by one field value"""
+    if field is None:
+        return topic
+    return f"{topic}:{field}:{value}"
+
+def room_topic(room: str) -> str:
+    """Topic a room belongs to"""
+    return room.split(':', 1)[0]
+
 class WebSocketService:
     """WebSocket service for real-time data updates"""
     
@@ -19,6 +52,13 @@ class WebSocketService:
         self.socketio = None
         self.connected_clients = set()
         self.is_running = False
+        self.encode_metrics = EncodeMetrics()
+        self.batcher = None
+        self.stats_state = VersionedState()
+        self.initial_snapshot = SnapshotCache(self._build_initial_data)
+        self.replay = ReplayBuffer()
+        self.resumes = 0
+        self.resume_fallbacks = 0
         
     def init_app(self, app: Flask):
         """Initialize WebSocket service with Flask app"""
@@ -26,74 +66,258 @@ class WebSocketService:
         self.socketio = SocketIO(
             app,
             cors_allowed_origins="*",
-            async_mode='threading',
-            logger=True,
-            engineio_logger=True
+            async_mode=resolve_async_mode(app.config.get('WEBSOCKET_ASYNC_MODE')),
+            # Engine.IO heartbeat: idle connections are probed every ping_interval
+            # and dropped when no pong arrives within ping_timeout
+            ping_interval=app.config.get('WEBSOCKET_PING_INTERVAL', 25),
+            ping_timeout=app.config.get('WEBSOCKET_PING_TIMEOUT', 20),
+            json=PacketJSON,  # splices pre-encoded payloads into packets
+            # Per-packet logging is too costly to leave on under load
+            logger=app.config.get('WEBSOCKET_PACKET_LOGGING', False),
+            engineio_logger=app.config.get('WEBSOCKET_PACKET_LOGGING', False)
         )
         
+        self.initial_snapshot.max_age = app.config.get('WEBSOCKET_SNAPSHOT_MAX_AGE', 30)
+        
+        # Any commit that wrote rows makes the cached initial snapshot stale
+        event.listen(db.session, 'after_flush', self._on_flush)
+        event.listen(db.session, 'after_commit', self._on_commit)
+        
+        # Recent events per topic for clients reconnecting after a network flap
+        self.replay.size = app.config.get('WEBSOCKET_REPLAY_SIZE', 1000)
+        positions = event_bus.positions()
+        self.replay.seed(event_bus.stream, {topic: positions[topic] for topic in REPLAY_TOPICS})
+        
+        # Coalesce updates into one batch per client per window (0 sends each event immediately)
+        batch_window = app.config.get('WEBSOCKET_BATCH_WINDOW', 0.25)
+        if batch_window:
+            self.batcher = EventBatcher(
+                self._client_rooms,
+                # One emit (and one packet encode) for every client getting the same batch
+                lambda client_ids, batch: self.socketio.emit('data_batch', batch, to=client_ids),
+                window=batch_window,
+                max_events_per_second=app.config.get('WEBSOCKET_MAX_EVENTS_PER_SECOND', 200),
+                max_queue=app.config.get('WEBSOCKET_MAX_QUEUE', 1000),
+                start_task=self.socketio.start_background_task,
+                sleep=self.socketio.sleep,
+                # A client behind on stats deltas gets one current snapshot instead
+                snapshots={'stats': self._stats_snapshot}
+            )
+        
         # Register event handlers
         self.register_handlers()
         
+        # Committed rows arrive from the ingest paths (possibly another
+        # process, see configure_event_bus); nothing is polled
+        self._bus_handlers = {
+            'transactions': self.broadcast_new_transaction,
+            'resources': self.broadcast_new_resource,
+            'intents': self.broadcast_new_intent,
+            'blocks': self._on_block_event,
+            'stats': self._on_stats_event
+        }
+        for topic in self._bus_handlers:
+            event_bus.subscribe(topic, self._on_bus_event)
+        
     def register_handlers(self):
         """Register WebSocket event handlers"""
         
         @self.socketio.on('connect')
-        def handle_connect():
-            """Handle client connection"""
-            client_id = request.sid if 'request' in globals() else 'unknown'
+        def handle_connect(auth=None):
+            """Handle client connection
+            
+            A reconnecting client may pass auth={'resume': {'positions': {topic:
+            {'stream', 'seq'}}}, 'subscribe': {...}} with the position of the last
+            event it got per topic (and its subscription, restored first). It then
+            receives only the events it missed plus a stats snapshot, or the full
+            initial_data when they are no longer buffered.
+            """
+            client_id = request.sid
             self.connected_clients.add(client_id)
             logger.info(f"Client connected: {client_id}")
             
+            # Until the client narrows its subscription it receives every topic
+            for topic in TOPICS:
+                join_room(topic_room(topic))
+            
+            auth = auth if isinstance(auth, dict) else {}
+            if auth.get('resume'):
+                if auth.get('subscribe'):
+                    self._apply_subscription(client_id, auth['subscribe'])
+                if self.resume_client(client_id, auth['resume']):
+                    return
+            
             # Send initial data to new client
             self.send_initial_data(client_id)
             
         @self.socketio.on('disconnect')
-        def handle_disconnect():
+        def handle_disconnect(*args):
             """Handle client disconnection"""
-            client_id = request.sid if 'request' in globals() else 'unknown'
+            client_id = request.sid
             self.connected_clients.discard(client_id)
+            if self.batcher:
+                self.batcher.remove_client(client_id)
             logger.info(f"Client disconnected: {client_id}")
             
         @self.socketio.on('subscribe')
         def handle_subscribe(data):
-            """Handle subscription to specific data types"""
-            client_id = request.sid if 'request' in globals() else 'unknown'
-            data_types = data.get('types', [])
-            logger.info(f"Client {client_id} subscribed to: {data_types}")
-            
-            # Store subscription preferences (could be enhanced with Redis)
-            # For now, all clients get all updates
+            """Replace the client's subscriptions with the requested topics
+
+            Payload: {'types': [...topics], 'owners': [...], 'creators': [...], 'solvers': [...]}.
+            A filter narrows its topic to matching events only, e.g. 'owners'
+            limits 'resources' to resources owned by the listed addresses.
+            """
+            client_id = request.sid
+            had_stats = topic_room('stats') in self._subscribed_rooms(client_id)
+            wanted, invalid = self._apply_subscription(client_id, data or {})
+            
+            logger.info(f"Client {client_id} subscribed to: {sorted(wanted)}")
+            emit('subscribed', {'rooms': sorted(wanted), 'invalid': invalid})
+            
+            # Deltas only make sense on top of a snapshot the client does not have yet
+            if topic_room('stats') in wanted and not had_stats:
+                emit('data_update', self._stats_snapshot())
+            
+        @self.socketio.on('unsubscribe')
+        def handle_unsubscribe(data):
+            """Leave all rooms (plain and filtered) of the given topics"""
+            client_id = request.sid
+            data_types = set((data or {}).get('types') or TOPICS)
+            
+            for room in self._subscribed_rooms(client_id):
+                if room_topic(room) in data_types:
+                    leave_room(room)
+            
+            emit('subscribed', {'rooms': sorted(self._subscribed_rooms(client_id)), 'invalid': []})
+            
+        @self.socketio.on('resync')
+        def handle_resync(*args):
+            """Send the full stats snapshot to a client that detected a gap in stats_delta seqs"""
+            emit('data_update', self._stats_snapshot())
             
         @self.socketio.on('ping')
-        def handle_ping():
-            """Handle ping from client"""
-            emit('pong', {'timestamp': datetime.utcnow().isoformat()})
-            
+        def handle_ping(data=None):
+            """Application-level heartbeat; echoes the client's payload so it can measure round trips"""
+            emit('pong', {'timestamp': datetime.utcnow().isoformat(), 'echo': data})
+            
+    def _apply_subscription(self, client_id: str, data: Dict[str, Any]) -> Tuple[set, List[str]]:
+        """Move the client into exactly the rooms a subscribe payload asks for"""
+        data_types = data.get('types') or list(TOPICS)
+        invalid = [topic for topic in data_types if topic not in TOPICS]
+        
+        wanted = set()
+        filtered_topics = set()
+        for key, (topic, field) in TOPIC_FILTERS.items():
+            values = data.get(key) or []
+            if topic in data_types and values:
+                filtered_topics.add(topic)
+                wanted.update(topic_room(topic, field, value) for value in values)
+        wanted.update(
+            topic_room(topic) for topic in data_types
+            if topic in TOPICS and topic not in filtered_topics
+        )
+        
+        for room in self._subscribed_rooms(client_id):
+            if room not in wanted:
+                leave_room(room)
+        for room in wanted:
+            join_room(room)
+        return wanted, invalid
+        
+    def resume_client(self, client_id: str, resume: Dict[str, Any]) -> bool:
+        """Send a reconnecting client the events it missed; False if a full snapshot is needed"""
+        positions = resume.get('positions') or {}
+        client_rooms = set(self._subscribed_rooms(client_id))
+        
+        missed = []
+        for topic in REPLAY_TOPICS:
+            if not any(room_topic(room) == topic for room in client_rooms):
+                continue
+            position = positions.get(topic) or {}
+            entries = self.replay.since(topic, position.get('stream'), position.get('seq'))
+            if entries is None:
+                self.resume_fallbacks += 1
+                logger.debug(f"Client {client_id} cannot resume {topic} from {position}, sending snapshot")
+                return False
+            missed.extend(entry for entry in entries if entry.rooms & client_rooms)
+        
+        # Replay in original delivery order across topics, stats state last
+        missed.sort(key=lambda entry: entry.order)
+        batch = [entry.event for entry in missed]
+        if topic_room('stats') in client_rooms:
+            batch.append(self._stats_snapshot())
+        
+        self.resumes += 1
+        emit('resumed', {'replayed': len(missed), 'rooms': sorted(client_rooms)})
+        if batch:
+            emit('data_batch', encode_batch(batch))
+        return True
+        
+    def _on_flush(self, session, flush_context):
+        session.info['initial_snapshot_stale'] = True
+        
+    def _on_commit(self, session):
+        if session.info.pop('initial_snapshot_stale', False):
+            self.initial_snapshot.invalidate()
+            
+    def get_metrics(self) -> Dict[str, Any]:
+        """Connection count, payload encode-time, snapshot cache and batching counters"""
+        return {
+            'connected_clients': len(self.connected_clients),
+            'encode': self.encode_metrics.snapshot(),
+            'initial_snapshot': {
+                'builds': self.initial_snapshot.builds,
+                'hits': self.initial_snapshot.hits
+            },
+            'resume': {
+                'resumed': self.resumes,
+                'snapshot_fallbacks': self.resume_fallbacks
+            },
+            'batching': self.batcher.get_metrics() if self.batcher else None
+        }
+        
+    def _client_rooms(self) -> Dict[str, set]:
+        """Rooms of every connected client, for the batcher"""
+        return {
+            client_id: set(self.socketio.server.rooms(client_id))
+            for client_id in list(self.connected_clients)
+        }
+        
+    def _subscribed_rooms(self, client_id: str) -> List[str]:
+        """Topic rooms the client is in (excluding its private sid room)"""
+        return [room for room in rooms(sid=client_id) if room != client_id]
+        
+    def _broadcast(self, topic: str, event_type: str, data: Dict[str, Any],
+                   filters: Iterable[Tuple[str, Any]] = (), position: Optional[Dict[str, Any]] = None) -> bool:
+        """Emit one update to a topic room and its matching filtered rooms
+
+        The payload is JSON-encoded once up front and the single emit
+        addressed to all rooms is delivered once per client, even if the
+        client is in several of the rooms. Events with a bus position are
+        also kept in the replay buffer, even while no client is connected.
+        """
+        if not self.connected_clients and position is None:
+            return False
+            
+        target_rooms = [topic_room(topic)] + [
+            topic_room(topic, field, value) for field, value in filters if value
+        ]
+        # Encoded once here; every recipient gets the same bytes
+        encoded = encode_event(event_type, data, self.encode_metrics, position=position)
+        if position is not None:
+            self.replay.record(topic, position['stream'], position['seq'], encoded, target_rooms)
+        if not self.connected_clients:
+            return False
+        if self.batcher:
+            self.batcher.publish(encoded, target_rooms)
+        else:
+            self.socketio.emit('data_update', encoded, to=target_rooms)
+        return True
+        
     def send_initial_data(self, client_id: str = None):
-        """Send initial data to client(s)"""
+        """Send initial data to client(s) from the cached pre-encoded snapshot"""
         try:
-            # Get latest overview data
-            overview_data = self.get_overview_data()
-            
-            # Get recent transactions
-            recent_transactions = self.get_recent_transactions(limit=10)
-            
-            # Get recent resources
-            recent_resources = self.get_recent_resources(limit=10)
-            
-            # Get recent intents
-            recent_intents = self.get_recent_intents(limit=10)
-            
-            initial_data = {
-                'type': 'initial_data',
-                'timestamp': datetime.utcnow().isoformat(),
-                'data': {
-                    'overview': overview_data,
-                    'recent_transactions': recent_transactions,
-                    'recent_resources': recent_resources,
-                    'recent_intents': recent_intents
-                }
-            }
+            initial_data = self.initial_snapshot.get()
             
             if client_id:
                 self.socketio.emit('data_update', initial_data, room=client_id)
@@ -103,96 +327,119 @@ class WebSocketService:
         except Exception as e:
             logger.error(f"Error sending initial data: {e}")
             
-    def broadcast_new_transaction(self, transaction_data: Dict[str, Any]):
-        """Broadcast new transaction to all connected clients"""
-        if not self.connected_clients:
-            return
-            
+    def _build_initial_data(self):
+        """Query and encode the initial snapshot; runs once per invalidation, not per connection"""
+        # Positions are read before the queries: an event landing in between
+        # is then replayed twice at worst, never lost
+        positions = self.replay.positions()
+        
+        # Refresh the versioned stats so the snapshot is current; other
+        # clients get the change as a regular delta
+        self.broadcast_stats_update(self.get_overview_data())
+        stats = self.stats_state.snapshot()
+        
+        # Get recent transactions
+        recent_transactions = self.get_recent_transactions(limit=10)
+        
+        # Get recent resources
+        recent_resources = self.get_recent_resources(limit=10)
+        
+        # Get recent intents
+        recent_intents = self.get_recent_intents(limit=10)
+        
+        return encode_event('initial_data', {
+            'overview': stats['state'],
+            'stats_stream': stats['stream'],
+            'stats_seq': stats['seq'],
+            'positions': {
+                topic: {'stream': stream, 'seq': seq} for topic, (stream, seq) in positions.items()
+            },
+            'recent_transactions': recent_transactions,
+            'recent_resources': recent_resources,
+            'recent_intents': recent_intents
+        }, self.encode_metrics)
+        
+    def broadcast_new_transaction(self, transaction_data: Dict[str, Any], position: Optional[Dict[str, Any]] = None):
+        """Broadcast new transaction to 'transactions' subscribers"""
         try:
-            update_data = {
-                'type': 'new_transaction',
-                'timestamp': datetime.utcnow().isoformat(),
-                'data': transaction_data
-            }
-            
-            self.socketio.emit('data_update', update_data)
-            logger.info(f"Broadcasted new transaction: {transaction_data.get('id', 'unknown')}")
+            if self._broadcast('transactions', 'new_transaction', transaction_data, position=position):
+                logger.debug(f"Broadcasted new transaction: {transaction_data.get('id', 'unknown')}")
             
         except Exception as e:
             logger.error(f"Error broadcasting transaction: {e}")
             
-    def broadcast_new_resource(self, resource_data: Dict[str, Any]):
-        """Broadcast new resource to all connected clients"""
-        if not self.connected_clients:
-            return
-            
+    def broadcast_new_resource(self, resource_data: Dict[str, Any], position: Optional[Dict[str, Any]] = None):
+        """Broadcast new resource to 'resources' subscribers and its owner's room"""
         try:
-            update_data = {
-                'type': 'new_resource',
-                'timestamp': datetime.utcnow().isoformat(),
-                'data': resource_data
-            }
-            
-            self.socketio.emit('data_update', update_data)
-            logger.info(f"Broadcasted new resource: {resource_data.get('id', 'unknown')}")
+            if self._broadcast('resources', 'new_resource', resource_data,
+                               [('owner', resource_data.get('owner'))], position):
+                logger.debug(f"Broadcasted new resource: {resource_data.get('id', 'unknown')}")
             
         except Exception as e:
             logger.error(f"Error broadcasting resource: {e}")
             
-    def broadcast_new_intent(self, intent_data: Dict[str, Any]):
-        """Broadcast new intent to all connected clients"""
-        if not self.connected_clients:
-            return
-            
+    def broadcast_new_intent(self, intent_data: Dict[str, Any], position: Optional[Dict[str, Any]] = None):
+        """Broadcast new intent to 'intents' subscribers and its creator/solver rooms"""
         try:
-            update_data = {
-                'type': 'new_intent',
-                'timestamp': datetime.utcnow().isoformat(),
-                'data': intent_data
-            }
-            
-            self.socketio.emit('data_update', update_data)
-            logger.info(f"Broadcasted new intent: {intent_data.get('id', 'unknown')}")
+            if self._broadcast('intents', 'new_intent', intent_data,
+                               [('creator', intent_data.get('creator')), ('solver', intent_data.get('solver'))],
+                               position):
+                logger.debug(f"Broadcasted new intent: {intent_data.get('id', 'unknown')}")
             
         except Exception as e:
             logger.error(f"Error broadcasting intent: {e}")
             
-    def broadcast_new_block(self, block_data: Dict[str, Any]):
-        """Broadcast new block to all connected clients"""
-        if not self.connected_clients:
-            return
-            
+    def broadcast_new_block(self, block_data: Dict[str, Any], position: Optional[Dict[str, Any]] = None):
+        """Broadcast new block to 'blocks' subscribers"""
         try:
-            update_data = {
-                'type': 'new_block',
-                'timestamp': datetime.utcnow().isoformat(),
-                'data': block_data
-            }
-            
-            self.socketio.emit('data_update', update_data)
-            logger.info(f"Broadcasted new block: {block_data.get('height', 'unknown')}")
+            if self._broadcast('blocks', 'new_block', block_data, position=position):
+                logger.debug(f"Broadcasted new block: {block_data.get('height', 'unknown')}")
             
         except Exception as e:
             logger.error(f"Error broadcasting block: {e}")
             
     def broadcast_stats_update(self, stats_data: Dict[str, Any]):
-        """Broadcast network stats update to all connected clients"""
-        if not self.connected_clients:
-            return
-            
+        """Broadcast the fields of stats_data that changed since the last update
+        
+        Subscribers receive {'stream', 'seq', 'changes'} as 'stats_delta'; seq
+        grows by one per delta so a client can spot a missed one and emit
+        'resync' to get the full snapshot.
+        """
         try:
-            update_data = {
-                'type': 'stats_update',
-                'timestamp': datetime.utcnow().isoformat(),
-                'data': stats_data
-            }
-            
-            self.socketio.emit('data_update', update_data)
-            logger.info("Broadcasted stats update")
+            # An empty dict means the overview query failed, not that every field went away
+            if not stats_data:
+                return
+            self._send_stats_delta(self.stats_state.update(stats_data))
             
         except Exception as e:
             logger.error(f"Error broadcasting stats: {e}")
             
+    def _on_bus_event(self, bus_event: BusEvent):
+        # Commits made by another process never reach our session listeners
+        self.initial_snapshot.invalidate()
+        self._bus_handlers[bus_event.topic](bus_event.payload, {
+            'topic': bus_event.topic, 'stream': bus_event.stream, 'seq': bus_event.seq
+        })
+            
+    def _send_stats_delta(self, delta: Optional[Dict[str, Any]]):
+        if delta and self._broadcast('stats', 'stats_delta', delta):
+            logger.debug(f"Broadcasted stats delta {delta['seq']}: {sorted(delta['changes'])}")
+            
+    def _on_block_event(self, block_data: Dict[str, Any], position: Dict[str, Any]):
+        """Broadcast a committed block and advance the overview's block height"""
+        self.broadcast_new_block(block_data, position)
+        height = block_data.get('height', block_data.get('block_height'))
+        if height and height > self.stats_state.snapshot()['state'].get('current_block_height', 0):
+            self._send_stats_delta(self.stats_state.patch({'current_block_height': height}))
+            
+    def _on_stats_event(self, stats_row: Dict[str, Any], position: Dict[str, Any]):
+        """Fold a committed network_stats row into the overview and send the delta"""
+        self._send_stats_delta(self.stats_state.patch(stats_overview_changes(stats_row)))
+            
+    def _stats_snapshot(self):
+        """Encoded full stats message for a single client"""
+        return encode_event('stats_snapshot', self.stats_state.snapshot(), self.encode_metrics)
+            
     def get_overview_data(self) -> Dict[str, Any]:
         """Get overview data for initial load"""
         try:
@@ -249,35 +496,23 @@ class WebSocketService:
             return []
             
     def start_periodic_updates(self):
-        """Start periodic updates for connected clients"""
+        """Start delivering batched updates to connected clients
+        
+        Updates themselves are pushed by event bus subscriptions as rows are
+        committed; there is no polling loop.
+        """
         if self.is_running:
             return
             
         self.is_running = True
-        
-        def update_loop():
-            while self.is_running:
-                try:
-                    if self.connected_clients:
-                        # Send periodic stats updates
-                        stats_data = self.get_overview_data()
-                        self.broadcast_stats_update(stats_data)
-                        
-                    # Wait 30 seconds before next update
-                    import time
-                    time.sleep(30)
-                    
-                except Exception as e:
-                    logger.error(f"Error in update loop: {e}")
-                    
-        # Start update loop in background thread
-        import threading
-        update_thread = threading.Thread(target=update_loop, daemon=True)
-        update_thread.start()
+        if self.batcher:
+            self.batcher.start()
         
     def stop_periodic_updates(self):
-        """Stop periodic updates"""
+        """Stop delivering batched updates"""
         self.is_running = False
+        if self.batcher:
+            self.batcher.stop()
 
 # Global WebSocket service instance
 websocket_service = WebSocketService()
@@ -0,0 +1,53 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# Green-thread servers need the stdlib patched before anything else is imported
+from src.services.async_mode import monkey_patch, resolve_async_mode
+ASYNC_MODE = resolve_async_mode()
+monkey_patch(ASYNC_MODE)
+
+from flask import Flask
+import logging
+
+from src.models.anoma_models import db
+from src.services.event_bus import configure_event_bus
+from src.services.websocket_service import init_websocket
+from src.config.production import config
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def create_worker(config_name='production'):
+    """Create a WebSocket-only worker fed by the ingest process over the event bus
+    
+    Run any number of these next to main_original.py (started with
+    EVENT_BUS_BACKEND=socket) behind a load balancer; each one subscribes to
+    the publisher at EVENT_BUS_ADDRESS and delivers updates to its own
+    clients. The database is only read, for the initial snapshot.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config[config_name])
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'anoma_analytics_production.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['WEBSOCKET_ASYNC_MODE'] = ASYNC_MODE
+    
+    db.init_app(app)
+    configure_event_bus({
+        'EVENT_BUS_BACKEND': 'socket',
+        'EVENT_BUS_ROLE': 'subscriber',
+        'EVENT_BUS_ADDRESS': app.config.get('EVENT_BUS_ADDRESS')
+    })
+    socketio = init_websocket(app)
+    
+    return app, socketio
+
+if __name__ == '__main__':
+    app, socketio = create_worker()
+    port = int(os.environ.get('WEBSOCKET_WORKER_PORT', '5001'))
+    logger.info(f"🚀 Starting WebSocket worker on port {port} ({ASYNC_MODE})")
+    
+    run_options = {'allow_unsafe_werkzeug': True} if ASYNC_MODE == 'threading' else {}
+    socketio.run(app, host='0.0.0.0', port=port, debug=False, **run_options)
@@ -0,0 +1,27 @@
+import pytest
+from flask import Flask
+
+from src.models.anoma_models import db
+from src.routes.analytics import analytics_bp
+from src.services.data_simulator import AnomaDataSimulator
+from src.services.serialization import install_json_provider
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    """Analytics API over a SQLite database filled by the simulator"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'analytics.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    install_json_provider(app)
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    with app.app_context():
+        db.create_all()
+        AnomaDataSimulator().populate_database()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,36 @@
+import errno
+import socket
+
+import pytest
+
+# The bus module first: creating the global bus imports the backends
+import src.services.event_bus  # noqa: F401
+from src.services.bus_backends import SocketPublisherBackend
+
+def test_second_publisher_on_a_live_socket_fails(tmp_path):
+    address = str(tmp_path / 'bus.sock')
+    first = SocketPublisherBackend(address)
+    first.attach(lambda event: None)
+
+    with pytest.raises(OSError) as error:
+        SocketPublisherBackend(address).attach(lambda event: None)
+    assert error.value.errno == errno.EADDRINUSE
+
+    # The first publisher still owns the path
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(address)
+    client.close()
+    first.close()
+
+def test_stale_socket_file_is_replaced(tmp_path):
+    address = str(tmp_path / 'bus.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(address)
+    stale.close()  # the path stays behind, as after a crash
+
+    publisher = SocketPublisherBackend(address)
+    publisher.attach(lambda event: None)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(address)
+    client.close()
+    publisher.close()
@@ -0,0 +1,60 @@
+import gzip
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from src.services import compression
+from src.services.compression import IMMUTABLE_CACHE_CONTROL, init_compression, send_static_file
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'assets' / 'app.js').write_text('console.log("plain")')
+    (tmp_path / 'assets' / 'app.js.gz').write_bytes(gzip.compress(b'console.log("plain")'))
+    (tmp_path / 'index.html').write_text('<html></html>')
+
+    app = Flask(__name__)
+    app.config['COMPRESSION_MIN_SIZE'] = 100
+    init_compression(app)
+    app.add_url_rule('/big', 'big', lambda: jsonify({'items': ['x' * 10] * 50}))
+    app.add_url_rule('/small', 'small', lambda: jsonify({'ok': True}))
+    app.add_url_rule('/stream', 'stream', lambda: Response(iter(['x' * 500]), mimetype='text/plain'))
+    app.add_url_rule('/app/<path:path>', 'app_files', lambda path: send_static_file(str(tmp_path), path))
+    return app.test_client()
+
+@pytest.fixture(autouse=True)
+def without_brotli(monkeypatch):
+    # The choice between br and gzip depends on an optional package; test gzip
+    monkeypatch.setattr(compression, 'brotli', None)
+
+def test_large_json_is_gzipped_when_accepted(client):
+    plain = client.get('/big')
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert 'Content-Encoding' not in plain.headers
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+
+def test_small_and_streamed_responses_are_sent_as_is(client):
+    for path in ('/small', '/stream'):
+        response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers, path
+
+def test_precompressed_asset_is_served_and_cached_forever(client):
+    response = client.get('/app/assets/app.js', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == b'console.log("plain")'
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    response.close()
+
+    response = client.get('/app/assets/app.js')
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == b'console.log("plain")'
+    response.close()
+
+def test_unhashed_files_are_revalidated(client):
+    response = client.get('/app/index.html', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'Content-Encoding' not in response.headers
+    response.close()
@@ -0,0 +1,61 @@
+import json
+
+from src.services import event_batcher
+from src.services.event_batcher import EventBatcher
+from src.services.event_encoding import encode_event
+
+def make_batcher(rooms, sent, **kwargs):
+    snapshot = encode_event('stats_snapshot', {'stream': 's', 'seq': 3, 'state': {'tps': 3}})
+    return EventBatcher(
+        lambda: rooms,
+        lambda client_ids, batch: sent.append((client_ids, json.loads(batch.raw))),
+        snapshots={'stats': lambda: snapshot},
+        **kwargs
+    )
+
+def delta(seq):
+    return encode_event('stats_delta', {'stream': 's', 'seq': seq, 'changes': {'tps': seq}})
+
+def test_single_stats_delta_is_sent_as_is():
+    sent = []
+    batcher = make_batcher({'a': {'stats'}}, sent)
+    batcher.publish(delta(1), ['stats'])
+    batcher.flush()
+    assert [event['type'] for event in sent[0][1]] == ['stats_delta']
+
+def test_pending_stats_deltas_collapse_into_one_snapshot():
+    sent = []
+    batcher = make_batcher({'a': {'stats'}, 'b': {'stats'}}, sent)
+    for seq in (1, 2, 3):
+        batcher.publish(delta(seq), ['stats'])
+    batcher.flush()
+
+    # One shared batch for both clients, holding only the snapshot
+    assert len(sent) == 1
+    client_ids, batch = sent[0]
+    assert sorted(client_ids) == ['a', 'b']
+    assert [event['type'] for event in batch] == ['stats_snapshot']
+    assert batcher.get_metrics()['collapsed'] == 4
+
+def test_rate_limited_client_gets_snapshot_after_falling_behind(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(event_batcher.time, 'monotonic', lambda: clock[0])
+    sent = []
+    batcher = make_batcher({'a': {'stats', 'blocks'}}, sent, max_events_per_second=1)
+    batcher.publish(encode_event('new_block', {'height': 1}), ['blocks'])
+    batcher.flush()
+    assert [event['type'] for event in sent[0][1]] == ['new_block']
+
+    # The token bucket is empty: later deltas wait, and collapse while waiting
+    batcher.publish(delta(1), ['stats'])
+    batcher.publish(delta(2), ['stats'])
+    batcher.flush()
+    assert len(sent) == 1
+
+    clock[0] += 1.0  # one token refilled
+    batcher.flush()
+    assert len(sent) == 2
+    client_ids, batch = sent[1]
+    assert client_ids == ['a']
+    assert [event['type'] for event in batch] == ['stats_snapshot']
+    assert batch[0]['data']['seq'] == 3
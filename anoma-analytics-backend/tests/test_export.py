@@ -0,0 +1,76 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from src.models.anoma_models import Block, Intent, NetworkStats, Resource, Transaction
+
+MODELS = {
+    'resources': (Resource, 'id'),
+    'transactions': (Transaction, 'id'),
+    'intents': (Intent, 'id'),
+    'blocks': (Block, 'height'),
+    'network_stats': (NetworkStats, 'id')
+}
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+@pytest.mark.parametrize('entity', list(MODELS))
+def test_ndjson_rows_match_to_dict(app, client, entity):
+    response = client.get(f'/api/analytics/export/{entity}')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/x-ndjson'
+    exported = {row[MODELS[entity][1]]: row for row in ndjson(response)}
+
+    model, key = MODELS[entity]
+    with app.app_context():
+        expected = {item[key]: json.loads(json.dumps(item)) for item in (obj.to_dict() for obj in model.query.all())}
+    assert exported and exported == expected
+
+def test_csv_has_a_header_and_one_line_per_row(app, client):
+    response = client.get('/api/analytics/export/blocks?format=csv')
+    assert response.headers['Content-Type'] == 'text/csv'
+    header, *rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+    assert header == ['height', 'hash', 'timestamp', 'transaction_count', 'size_bytes', 'proposer']
+    with app.app_context():
+        assert len(rows) == Block.query.count()
+
+def test_gzip_export_decompresses_to_the_plain_export(client):
+    plain = client.get('/api/analytics/export/intents').get_data()
+    response = client.get('/api/analytics/export/intents?gzip=true')
+
+    assert response.headers['Content-Type'] == 'application/gzip'
+    assert 'intents.ndjson.gz' in response.headers['Content-Disposition']
+    assert gzip.decompress(response.get_data()) == plain
+
+def test_height_range_is_inclusive_and_ordered(app, client):
+    with app.app_context():
+        heights = sorted(block.height for block in Block.query.all())
+    low, high = heights[2], heights[5]
+
+    rows = ndjson(client.get(f'/api/analytics/export/blocks?min_height={low}&max_height={high}'))
+    assert [row['height'] for row in rows] == heights[2:6]
+
+def test_time_range_filters_rows(app, client):
+    with app.app_context():
+        timestamps = sorted(block.timestamp for block in Block.query.all())
+    start = timestamps[len(timestamps) // 2]
+
+    rows = ndjson(client.get(f'/api/analytics/export/blocks?start={start.isoformat()}Z'))
+    assert len(rows) == len([timestamp for timestamp in timestamps if timestamp >= start])
+
+@pytest.mark.parametrize('url', [
+    '/api/analytics/export/users',
+    '/api/analytics/export/blocks?format=xml',
+    '/api/analytics/export/resources?min_height=1',
+    '/api/analytics/export/blocks?start=yesterday',
+    '/api/analytics/export/resources?kind=coin'
+])
+def test_invalid_requests_are_rejected(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,30 @@
+import sqlite3
+
+from flask import Flask
+from sqlalchemy import inspect
+
+from src.models.anoma_models import create_missing_indexes, db
+
+def test_index_added_to_an_existing_table(tmp_path):
+    path = tmp_path / 'old.db'
+    # network_stats as created before the timestamp index existed
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE network_stats (id INTEGER PRIMARY KEY, timestamp DATETIME, '
+                 'total_resources INTEGER, total_transactions INTEGER, total_intents INTEGER, '
+                 'active_resources INTEGER, pending_intents INTEGER, '
+                 'avg_processing_time_ms FLOAT, tps FLOAT)')
+    conn.close()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        assert not inspect(db.engine).get_indexes('network_stats')
+
+        create_missing_indexes()
+        create_missing_indexes()  # idempotent on every startup
+
+        indexes = inspect(db.engine).get_indexes('network_stats')
+        assert [index['column_names'] for index in indexes] == [['timestamp']]
+        db.engine.dispose()
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(__file__), '..', 'src')
+# Плоские модули Namada импортируются из src/ напрямую
+sys.path.insert(0, SRC)
+
+from namada_api_client import BlockCache, NamadaAPIClient, NamadaDataProcessor, compute_tx_hashes
+
+class FakeRPC:
+    """Отвечает на RPC вызовы как нода с высотами 1..tip и записывает их"""
+
+    def __init__(self, tip: int = 100):
+        self.tip = tip
+        self.calls = []
+
+    def __call__(self, method, params=None):
+        self.calls.append((method, params))
+        if method == 'status':
+            return {'sync_info': {'latest_block_height': str(self.tip)}}
+        if method == 'block':
+            return {'block': {'header': {'height': params[0]}}}
+        if method == 'blockchain':
+            # Как CometBFT: не больше 20 заголовков, от max вниз
+            low, high = int(params[0]), min(int(params[1]), self.tip)
+            return {'block_metas': [self.meta(height) for height in range(high, max(low, high - 19) - 1, -1)]}
+        return None
+
+    @staticmethod
+    def meta(height):
+        return {'header': {'height': str(height), 'time': '2025-07-15T23:30:00Z'}, 'num_txs': str(height % 3)}
+
+    def count(self, method):
+        return sum(1 for called, _ in self.calls if called == method)
+
+def client_with(rpc):
+    client = NamadaAPIClient()
+    client._make_rpc_call = rpc
+    return client
+
+ABC_SHA256 = 'BA7816BF8F01CFEA414140DE5DAE2223B00361A396177A9CB410FF61F20015AD'
+
+def test_tx_hash_is_uppercase_sha256_of_the_decoded_bytes():
+    # 'YWJj' - base64 от b'abc'
+    assert compute_tx_hashes(['YWJj']) == [ABC_SHA256]
+
+def test_invalid_base64_is_hashed_as_text():
+    assert compute_tx_hashes(['not base64!']) == [hashlib.sha256(b'not base64!').hexdigest().upper()]
+
+def test_tx_hash_is_the_same_in_every_process():
+    script = f"import sys; sys.path.insert(0, {SRC!r}); from namada_api_client import compute_tx_hashes; print(compute_tx_hashes(['YWJj', 'x'])[1])"
+    hashes = {
+        subprocess.run([sys.executable, '-c', script], env={**os.environ, 'PYTHONHASHSEED': seed},
+                       capture_output=True, text=True, check=True).stdout.strip()
+        for seed in ('1', '2')
+    }
+    assert hashes == {hashlib.sha256(b'x').hexdigest().upper()}
+
+def test_analyzed_transactions_carry_their_hash():
+    processor = NamadaDataProcessor(NamadaAPIClient())
+    [tx] = processor._analyze_transactions(['YWJj'])
+    assert tx['hash'] == ABC_SHA256
+    assert tx['index'] == 0 and tx['size'] == 4
+
+def test_block_cache_evicts_the_least_recently_used():
+    cache = BlockCache(max_size=2)
+    cache.put(1, {'h': 1})
+    cache.put(2, {'h': 2})
+    cache.get(1)
+    cache.put(3, {'h': 3})
+
+    assert cache.get(2) is None
+    assert cache.get(1) == {'h': 1} and cache.get(3) == {'h': 3}
+    assert (cache.hits, cache.misses) == (3, 1)
+
+def test_blocks_are_fetched_once_and_status_within_its_ttl():
+    rpc = FakeRPC()
+    client = client_with(rpc)
+
+    assert client.get_block(5) == client.get_block(5)
+    client.get_latest_height()
+    client.get_latest_height()
+    assert (rpc.count('block'), rpc.count('status')) == (1, 1)
+
+    client.get_status(max_age=0)
+    assert rpc.count('status') == 2
+
+def test_header_sweep_uses_blockchain_pages_and_skips_cached_heights():
+    rpc = FakeRPC()
+    client = client_with(rpc)
+
+    metas = client.get_block_metas(11, 55)
+    assert [int(meta['header']['height']) for meta in metas] == list(range(55, 10, -1))
+    assert rpc.count('blockchain') == 3  # 45 высот по 20 за вызов
+    assert rpc.count('block') == 0
+
+    rpc.calls.clear()
+    client.get_block_metas(1, 60)
+    # Новые только 56..60 и 1..10 - два вызова по непрерывным отрезкам
+    assert rpc.calls == [('blockchain', ['56', '60']), ('blockchain', ['1', '10'])]
+
+def test_iter_blocks_reads_headers_without_fetching_blocks():
+    rpc = FakeRPC()
+    processor = NamadaDataProcessor(client_with(rpc), window_sizes=(5,), window_bootstrap=0)
+
+    blocks = list(processor.iter_blocks(1, 6))
+    assert [block['block_height'] for block in blocks] == [6, 5, 4, 3, 2, 1]
+    assert [block['transaction_count'] for block in blocks] == [0, 2, 1, 0, 2, 1]
+    assert rpc.count('block') == 0
@@ -0,0 +1,47 @@
+import os
+import sys
+import threading
+import urllib.request
+
+from werkzeug.serving import make_server
+
+# Плоские модули Namada импортируются из src/ напрямую
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import main_namada
+from namada_db import NamadaConnectionManager
+from namada_integration_layer import NamadaAnalyticsAdapter
+
+def test_reader_reused_after_release(tmp_path):
+    db = NamadaConnectionManager(str(tmp_path / 'pool.db'), max_idle_readers=2)
+
+    def short_lived():
+        db.reader().execute('SELECT 1').fetchone()
+        db.release_reader()
+
+    for _ in range(50):
+        thread = threading.Thread(target=short_lived)
+        thread.start()
+        thread.join()
+
+    assert db.reader_count() == 1
+    db.close()
+    assert db.reader_count() == 0
+
+def test_reader_count_bounded_under_threaded_requests(tmp_path, monkeypatch):
+    adapter = NamadaAnalyticsAdapter(str(tmp_path / 'namada.db'))
+    monkeypatch.setattr(main_namada, 'namada_adapter', adapter)
+
+    # Как app.run(): отдельный поток на каждый запрос
+    server = make_server('127.0.0.1', 0, main_namada.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/api/analytics/blocks"
+        for _ in range(50):
+            with urllib.request.urlopen(url) as response:
+                assert response.status == 200
+    finally:
+        server.shutdown()
+
+    assert adapter.db.reader_count() <= adapter.db.max_idle_readers
+    adapter.db.close()
@@ -0,0 +1,90 @@
+import os
+import sys
+
+# Плоские модули Namada импортируются из src/ напрямую
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from namada_integration_layer import INSERT_RESOURCE_SQL, NamadaAnalyticsAdapter
+from src.services.overview_stream import stats_overview_changes
+
+class RecordingPublisher:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, topic, payload):
+        self.events.append((topic, payload))
+
+def test_published_stats_use_the_overview_schema(tmp_path, monkeypatch):
+    publisher = RecordingPublisher()
+    adapter = NamadaAnalyticsAdapter(str(tmp_path / 'namada.db'), publisher=publisher)
+    monkeypatch.setattr(adapter.namada_processor, 'get_network_stats', lambda: {
+        'tps': 1.5, 'average_block_time': 6.2, 'current_height': 2789000, 'total_recent_transactions': 12
+    })
+    monkeypatch.setattr(adapter.namada_processor, 'get_recent_transactions', lambda limit: [])
+    monkeypatch.setattr(adapter, '_fetch_recent_blocks', lambda: [])
+
+    adapter.sync_with_namada()
+
+    [stats] = [payload for topic, payload in publisher.events if topic == 'stats']
+    changes = stats_overview_changes(stats)
+    assert changes['avg_processing_time_ms'] == 6200.0
+    assert changes['current_tps'] == 1.5
+    # Число транзакций в последних блоках не должно затирать общий итог
+    assert 'total_transactions' not in changes
+    assert stats['recent_transactions'] == 12
+    adapter.db.close()
+
+OWNERS = ['tnam1abc123', 'tnam1abd999', 'tnam1xyz123', 'tnam2abc000']
+
+def adapter_with_owners(path):
+    adapter = NamadaAnalyticsAdapter(path)
+    with adapter.db.writer() as conn:
+        conn.executemany(INSERT_RESOURCE_SQL, [
+            (f"res_{i}", 'token', owner, 'active', 1.0, None, None, None, None, None, None,
+             '2025-07-15T23:30:00Z', '2025-07-15T23:30:00Z', 1752622200)
+            for i, owner in enumerate(OWNERS)
+        ])
+    return adapter
+
+def owners_matching(adapter, owner, match_mode):
+    condition, params = adapter.build_owner_filter(owner, match_mode)
+    rows = adapter.db.reader().execute(f"SELECT owner FROM resources WHERE {condition}", params)
+    return sorted(owner for (owner,) in rows)
+
+@pytest.mark.parametrize('owner, match_mode, expected', [
+    ('tnam1abc123', 'exact', ['tnam1abc123']),
+    ('tnam1ab', 'prefix', ['tnam1abc123', 'tnam1abd999']),
+    ('tnam1', 'prefix', ['tnam1abc123', 'tnam1abd999', 'tnam1xyz123']),
+    ('123', 'substring', ['tnam1abc123', 'tnam1xyz123']),
+    ('abc', 'substring', ['tnam1abc123', 'tnam2abc000']),
+    ('9', 'substring', ['tnam1abd999']),  # короче триграммы - через LIKE
+])
+def test_owner_search_modes(tmp_path, owner, match_mode, expected):
+    adapter = adapter_with_owners(str(tmp_path / 'owners.db'))
+    assert owners_matching(adapter, owner, match_mode) == expected
+    adapter.db.close()
+
+def test_owner_search_follows_updates_and_deletes(tmp_path):
+    adapter = adapter_with_owners(str(tmp_path / 'owners.db'))
+    with adapter.db.writer() as conn:
+        conn.execute("UPDATE resources SET owner = 'tnam1qqq777' WHERE owner = 'tnam1xyz123'")
+        conn.execute("DELETE FROM resources WHERE owner = 'tnam2abc000'")
+
+    assert owners_matching(adapter, '123', 'substring') == ['tnam1abc123']
+    assert owners_matching(adapter, 'q77', 'substring') == ['tnam1qqq777']
+    assert owners_matching(adapter, 'abc', 'substring') == ['tnam1abc123']
+    adapter.db.close()
+
+def test_prefix_search_uses_the_owner_index(tmp_path):
+    adapter = adapter_with_owners(str(tmp_path / 'owners.db'))
+    condition, params = adapter.build_owner_filter('tnam1ab', 'prefix')
+    plan = ' '.join(row[-1] for row in adapter.db.reader().execute(
+        f"EXPLAIN QUERY PLAN SELECT * FROM resources WHERE {condition}", params
+    ))
+    assert 'idx_resources_owner' in plan
+    with pytest.raises(ValueError):
+        adapter.build_owner_filter('tnam1', 'regex')
+    adapter.db.close()
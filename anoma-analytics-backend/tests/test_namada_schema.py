@@ -0,0 +1,47 @@
+import os
+import sqlite3
+import sys
+
+# Плоские модули Namada импортируются из src/ напрямую
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from namada_integration_layer import NamadaAnalyticsAdapter
+from namada_schema import SCHEMA_VERSION, migrate, to_epoch
+
+def old_database(path):
+    """БД в схеме до миграций, с одной транзакцией"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    cursor = conn.cursor()
+    NamadaAnalyticsAdapter._create_tables(None, cursor)
+    cursor.execute(
+        "INSERT INTO transactions (tx_hash, block_height, timestamp, tx_type, status) "
+        "VALUES ('AB', 10, '2025-07-15T23:30:00Z', 'transfer', 'confirmed')"
+    )
+    return conn
+
+def test_to_epoch_reads_utc_iso_timestamps():
+    assert to_epoch('2025-07-15T23:30:00Z') == 1752622200
+    assert to_epoch('2025-07-15T23:30:00') == 1752622200
+    assert to_epoch(None) is None
+
+def test_old_database_is_migrated_and_backfilled(tmp_path):
+    conn = old_database(str(tmp_path / 'old.db'))
+    cursor = conn.cursor()
+
+    assert migrate(cursor) == SCHEMA_VERSION
+    assert cursor.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+    assert cursor.execute('SELECT timestamp_epoch FROM transactions').fetchone()[0] == 1752622200
+
+    # Повторный запуск ничего не применяет
+    assert migrate(cursor) == SCHEMA_VERSION
+
+def test_time_range_queries_use_the_epoch_index(tmp_path):
+    conn = old_database(str(tmp_path / 'old.db'))
+    cursor = conn.cursor()
+    migrate(cursor)
+
+    plan = ' '.join(row[-1] for row in cursor.execute(
+        'EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE timestamp_epoch >= ? '
+        'ORDER BY timestamp_epoch DESC LIMIT 10', (0,)
+    ))
+    assert 'idx_transactions_timestamp' in plan
@@ -0,0 +1,75 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from src.models.anoma_models import NetworkStats, NetworkStatsDaily, NetworkStatsHourly, db
+from src.routes.analytics import analytics_bp
+from src.services.retention import NetworkStatsRetention, RetentionPolicy
+
+DAYS = 20
+STEP = timedelta(minutes=10)
+
+@pytest.fixture
+def stats_app(tmp_path):
+    """Analytics API over DAYS of network_stats rows, one every STEP"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'stats.db'}"
+    db.init_app(app)
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    with app.app_context():
+        db.create_all()
+        now = datetime.utcnow()
+        count = int(timedelta(days=DAYS) / STEP)
+        db.session.add_all(
+            NetworkStats(timestamp=now - STEP * i, tps=float(i % 7), avg_processing_time_ms=100.0 + i % 5,
+                         active_resources=i % 11, pending_intents=i % 3, total_transactions=count - i)
+            for i in range(count)
+        )
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+def network_stats(app, **params):
+    return app.test_client().get('/api/analytics/stats/network', query_string=params).get_json()
+
+def test_range_is_bucketed_to_at_most_max_points(stats_app):
+    body = network_stats(stats_app, hours=24, max_points=48)
+    stats = body['stats']
+
+    assert body['resolution_seconds'] == 1800
+    assert len(stats) <= 49  # the range rarely starts on a bucket boundary
+    assert sum(point['samples'] for point in stats) == 24 * 6
+
+    with stats_app.app_context():
+        since = datetime.utcnow() - timedelta(hours=24)
+        rows = NetworkStats.query.filter(NetworkStats.timestamp >= since).all()
+    assert math.isclose(sum(point['tps'] * point['samples'] for point in stats), sum(row.tps for row in rows))
+    assert min(point['tps_min'] for point in stats) == min(row.tps for row in rows)
+    assert max(point['tps_max'] for point in stats) == max(row.tps for row in rows)
+
+def test_resolution_and_point_cap_are_honoured(stats_app):
+    assert network_stats(stats_app, hours=24, resolution=3600)['resolution_seconds'] == 3600
+    assert network_stats(stats_app, hours=24, max_points=100000)['resolution_seconds'] == 44  # MAX_NETWORK_STATS_POINTS
+
+def test_history_survives_retention(stats_app):
+    before = network_stats(stats_app, hours=24 * 30, resolution=86400)['stats']
+
+    with stats_app.app_context():
+        NetworkStatsRetention(RetentionPolicy(raw_days=3, hourly_days=7, batch_pause=0)).run_once()
+        oldest_raw = db.session.query(db.func.min(NetworkStats.timestamp)).scalar()
+        assert oldest_raw > datetime.utcnow() - timedelta(days=3, hours=1)
+        assert NetworkStatsHourly.query.count() and NetworkStatsDaily.query.count()
+
+    after = network_stats(stats_app, hours=24 * 30, resolution=86400)['stats']
+
+    assert [point['timestamp'] for point in after] == [point['timestamp'] for point in before]
+    for old, new in zip(before, after):
+        assert new['samples'] == old['samples']
+        for field in ('tps', 'avg_processing_time_ms'):
+            assert math.isclose(new[field], old[field]), (field, old, new)
+        for field in ('active_resources', 'pending_intents'):  # rounded in the response
+            assert abs(new[field] - old[field]) <= 1, (field, old, new)
+        assert (new['tps_min'], new['tps_max']) == (old['tps_min'], old['tps_max'])
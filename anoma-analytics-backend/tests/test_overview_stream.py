@@ -0,0 +1,36 @@
+import pytest
+
+from src.services.event_bus import event_bus
+from src.services.overview_stream import OverviewStream, StreamLimitReached
+
+def make_stream(**kwargs):
+    return OverviewStream(lambda: {'total_transactions': 1, 'current_tps': 0.5}, **kwargs)
+
+def test_streams_past_the_cap_are_refused_until_one_closes():
+    overview = make_stream(max_streams=2)
+    first = overview.stream()
+    second = overview.stream()
+    with pytest.raises(StreamLimitReached):
+        overview.stream()
+    
+    # Never iterated, as when the client leaves before the first write
+    first.close()
+    third = overview.stream()
+    
+    assert overview.get_metrics()['open_streams'] == 2
+    assert overview.get_metrics()['rejected'] == 1
+    second.close()
+    third.close()
+    assert overview.get_metrics()['open_streams'] == 0
+
+def test_published_stats_reach_an_open_stream():
+    overview = make_stream()
+    messages = iter(overview.stream(heartbeat=1))
+    assert next(messages).startswith('retry:')
+    assert 'event: snapshot' in next(messages)
+    
+    event_bus.publish('stats', {'tps': 2.0, 'total_transactions': 3})
+    delta = next(messages)
+    
+    assert 'event: stats_delta' in delta
+    assert '"current_tps":2.0' in delta and '"total_transactions":3' in delta
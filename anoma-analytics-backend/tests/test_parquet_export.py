@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.anoma_models import Block, Intent
+from src.services.parquet_export import ParquetExporter, parquet_available
+
+def test_day_partitions_stop_before_today_and_skip_exported_days(app, tmp_path):
+    exporter = ParquetExporter(str(tmp_path))
+    with app.app_context():
+        partitions = [name for name, _ in exporter._pending_day_partitions('intents', {})]
+        days = {intent.created_at.date() for intent in Intent.query.all()}
+
+        expected = sorted(f"date={day.isoformat()}" for day in days if day < datetime.utcnow().date())
+        assert partitions and partitions == expected
+        assert exporter._pending_day_partitions('intents', {partitions[-1]: {}}) == []
+
+def test_height_partitions_are_contiguous_and_below_the_tip(app, tmp_path):
+    exporter = ParquetExporter(str(tmp_path), block_partition_size=10)
+    with app.app_context():
+        partitions = exporter._pending_height_partitions({})
+        tip = max(block.height for block in Block.query.all())
+
+    assert partitions
+    ranges = [(int(args['min_height']), int(args['max_height'])) for _, args in partitions]
+    assert all(end - start == 9 for start, end in ranges)
+    assert all(next_start == end + 1 for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    assert ranges[-1][1] < tip <= ranges[-1][1] + 10
+
+    # Already exported ranges are not offered again
+    with app.app_context():
+        rest = exporter._pending_height_partitions({partitions[0][0]: {}})
+    assert [name for name, _ in rest] == [name for name, _ in partitions[1:]]
+
+@pytest.mark.skipif(parquet_available(), reason="pyarrow is installed")
+def test_export_without_pyarrow_is_unavailable(client):
+    assert client.get('/api/analytics/export/parquet').get_json()['available'] is False
+    assert client.post('/api/analytics/export/parquet').status_code == 503
+
+def test_runs_append_only_new_partitions(app, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    exporter = ParquetExporter(str(tmp_path), block_partition_size=10)
+    with app.app_context():
+        written = exporter.run(['blocks'])
+        assert written['blocks']
+        assert exporter.run(['blocks']) == {'blocks': []}
+
+        manifest = exporter.load_manifest()['blocks']
+        for partition in written['blocks']:
+            table = pq.read_table(exporter.partition_path('blocks', partition))
+            assert table.num_rows == manifest[partition]['rows']
+            assert table.column_names[0] == 'height'
+
+def test_unknown_partition_is_not_found(client):
+    assert client.get('/api/analytics/export/parquet/blocks/height=0-9').status_code == 404
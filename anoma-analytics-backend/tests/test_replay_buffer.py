@@ -0,0 +1,61 @@
+from src.services.replay_buffer import ReplayBuffer
+
+def record(buffer, topic, stream, seqs):
+    for seq in seqs:
+        buffer.record(topic, stream, seq, f"{topic}-{seq}", [topic])
+
+def events(entries):
+    return [entry.event for entry in entries]
+
+def test_since_returns_the_events_after_a_position():
+    buffer = ReplayBuffer(size=10)
+    buffer.seed('s', {'blocks': 0})
+    record(buffer, 'blocks', 's', range(1, 6))
+
+    assert events(buffer.since('blocks', 's', 2)) == ['blocks-3', 'blocks-4', 'blocks-5']
+    assert buffer.since('blocks', 's', 5) == []
+    assert buffer.positions() == {'blocks': ('s', 5)}
+
+def test_seeded_topic_resumes_from_its_seed_with_nothing_missed():
+    buffer = ReplayBuffer(size=10)
+    buffer.seed('s', {'blocks': 7})
+    assert buffer.since('blocks', 's', 7) == []
+    assert buffer.since('blocks', 's', 6) is None
+
+def test_positions_that_fell_out_of_the_buffer_need_a_snapshot():
+    buffer = ReplayBuffer(size=3)
+    buffer.seed('s', {'blocks': 0})
+    record(buffer, 'blocks', 's', range(1, 7))
+
+    assert events(buffer.since('blocks', 's', 3)) == ['blocks-4', 'blocks-5', 'blocks-6']
+    assert buffer.since('blocks', 's', 2) is None
+
+def test_other_stream_or_future_seq_needs_a_snapshot():
+    buffer = ReplayBuffer(size=10)
+    buffer.seed('s', {'blocks': 0})
+    record(buffer, 'blocks', 's', range(1, 4))
+
+    assert buffer.since('blocks', 'restarted', 1) is None
+    assert buffer.since('blocks', 's', 9) is None
+    assert buffer.since('blocks', 's', None) is None
+    assert buffer.since('intents', 's', 0) is None
+
+def test_gap_restarts_the_run():
+    buffer = ReplayBuffer(size=10)
+    buffer.seed('s', {'blocks': 0})
+    record(buffer, 'blocks', 's', [1, 2, 5, 6])
+
+    # Seqs 3 and 4 never arrived, so nothing before 5 can be replayed
+    assert buffer.since('blocks', 's', 2) is None
+    assert events(buffer.since('blocks', 's', 4)) == ['blocks-5', 'blocks-6']
+
+def test_duplicates_are_ignored_and_order_spans_topics():
+    buffer = ReplayBuffer(size=10)
+    buffer.seed('s', {'blocks': 0, 'intents': 0})
+    buffer.record('blocks', 's', 1, 'b1', ['blocks'])
+    buffer.record('intents', 's', 1, 'i1', ['intents'])
+    buffer.record('blocks', 's', 1, 'b1 again', ['blocks'])
+    buffer.record('blocks', 's', 2, 'b2', ['blocks'])
+
+    entries = buffer.since('blocks', 's', 0) + buffer.since('intents', 's', 0)
+    assert [entry.event for entry in sorted(entries, key=lambda entry: entry.order)] == ['b1', 'i1', 'b2']
@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from src.models.anoma_models import Block, Intent, Resource, Transaction
+from src.services.serialization import OrjsonProvider, orjson, transaction_counts
+
+ENDPOINTS = {
+    'resources': (Resource, 'id'),
+    'transactions': (Transaction, 'id'),
+    'intents': (Intent, 'id'),
+    'blocks': (Block, 'height')
+}
+
+def normalized(value):
+    return json.loads(json.dumps(value))
+
+@pytest.mark.parametrize('entity', list(ENDPOINTS))
+def test_list_endpoints_match_to_dict(app, client, entity):
+    body = client.get(f'/api/analytics/{entity}?per_page=50').get_json()
+    model, key = ENDPOINTS[entity]
+
+    assert body[entity]
+    with app.app_context():
+        for item in body[entity]:
+            record = model.query.filter(getattr(model, key) == item[key]).one()
+            assert item == normalized(record.to_dict())
+
+def test_transaction_counts_match_the_relationships(app):
+    with app.app_context():
+        transactions = Transaction.query.limit(50).all()
+        counts = transaction_counts([transaction.id for transaction in transactions])
+        for transaction in transactions:
+            expected = transaction.to_dict()
+            assert counts[transaction.id] == {
+                key: expected[key] for key in ('created_resources_count', 'consumed_resources_count', 'intents_count')
+            }
+
+@pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+def test_orjson_provider_matches_the_default_provider():
+    app = Flask(__name__)
+    data = {'b': [1, 2.5, None, True], 'a': {'when': datetime(2025, 7, 15, 23, 30)}, 'big': 2 ** 70}
+
+    assert OrjsonProvider(app).dumps(data) == DefaultJSONProvider(app).dumps(data, separators=(',', ':'))
+    assert OrjsonProvider(app).loads('{"a": [1]}') == {'a': [1]}
+
+def test_serialization_benchmark_runs():
+    root = os.path.join(os.path.dirname(__file__), '..')
+    result = subprocess.run([sys.executable, 'benchmarks/serialization_benchmark.py', '--repeat', '1'],
+                            cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert 'transactions' in result.stdout
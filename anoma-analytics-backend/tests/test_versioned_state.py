@@ -0,0 +1,44 @@
+from src.services.versioned_state import VersionedState
+
+def apply(state, delta):
+    """What a client does with a delta it received in order"""
+    state = {**state, **delta['changes']}
+    for key in delta.get('removed', []):
+        state.pop(key)
+    return state
+
+def test_deltas_carry_consecutive_seqs_and_only_changed_fields():
+    versioned = VersionedState()
+    first = versioned.update({'tps': 1.0, 'blocks': 10})
+    second = versioned.patch({'tps': 1.0, 'blocks': 11})
+
+    assert first == {'stream': versioned.stream, 'seq': 1, 'changes': {'tps': 1.0, 'blocks': 10}}
+    assert second == {'stream': versioned.stream, 'seq': 2, 'changes': {'blocks': 11}}
+    assert versioned.patch({'blocks': 11}) is None
+    assert versioned.seq == 2
+
+def test_update_reports_removed_fields():
+    versioned = VersionedState()
+    versioned.update({'tps': 1.0, 'blocks': 10})
+    delta = versioned.update({'tps': 1.0})
+    assert delta['changes'] == {} and delta['removed'] == ['blocks']
+
+def test_snapshot_plus_later_deltas_rebuild_the_state():
+    versioned = VersionedState()
+    versioned.update({'tps': 1.0, 'blocks': 10, 'pending': 3})
+    snapshot = versioned.snapshot()
+
+    deltas = [
+        versioned.patch({'tps': 2.0}),
+        versioned.update({'tps': 2.0, 'blocks': 12}),
+        versioned.patch({'pending': 1})
+    ]
+    state = snapshot['state']
+    for delta in deltas:
+        assert delta['seq'] == snapshot['seq'] + 1
+        state, snapshot = apply(state, delta), {'seq': delta['seq']}
+
+    assert state == versioned.snapshot()['state']
+
+def test_each_instance_has_its_own_stream():
+    assert VersionedState().stream != VersionedState().stream
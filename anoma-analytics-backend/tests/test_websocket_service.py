@@ -0,0 +1,89 @@
+import pytest
+
+from src.services.event_bus import event_bus
+from src.services.websocket_service import REPLAY_TOPICS, WebSocketService
+
+@pytest.fixture(scope='module')
+def service(app):
+    app.config['WEBSOCKET_BATCH_WINDOW'] = 0  # every update is emitted immediately
+    service = WebSocketService()
+    with app.app_context():
+        service.init_app(app)
+    return service
+
+def messages(packet):
+    """Update messages of a data_update (one) or data_batch (several) packet"""
+    payload = packet['args'][0]
+    return payload if packet['name'] == 'data_batch' else [payload]
+
+def events(packets):
+    """(type, data, message) of every update in the packets, batches flattened"""
+    return [
+        (message['type'], message['data'], message)
+        for packet in packets if packet['name'] in ('data_update', 'data_batch')
+        for message in messages(packet)
+    ]
+
+def connect(service, app, auth=None):
+    """Connected test client, the packets it got on connect and any initial_data among them"""
+    client = service.socketio.test_client(app, auth=auth)
+    received = client.get_received()
+    initial = [data for event_type, data, _ in events(received) if event_type == 'initial_data']
+    return client, received, initial
+
+def test_initial_data_carries_stats_position_and_topic_positions(service, app):
+    client, _, [initial] = connect(service, app)
+    assert initial['overview']['current_block_height'] > 0
+    assert initial['stats_stream'] == service.stats_state.stream
+    assert initial['stats_seq'] == service.stats_state.seq
+    assert set(initial['positions']) == set(REPLAY_TOPICS)
+    client.disconnect()
+
+def test_stats_rows_arrive_as_sequenced_deltas_of_changed_fields(service, app):
+    client, _, [initial] = connect(service, app)
+    seq = initial['stats_seq']
+
+    event_bus.publish('stats', {'tps': 1234.5, 'pending_intents': 7})
+    event_bus.publish('stats', {'tps': 1234.5, 'pending_intents': 8})
+    event_bus.publish('stats', {'tps': 1234.5, 'pending_intents': 8})  # nothing changed
+
+    deltas = [data for event_type, data, _ in events(client.get_received()) if event_type == 'stats_delta']
+    assert deltas == [
+        {'stream': initial['stats_stream'], 'seq': seq + 1, 'changes': {'current_tps': 1234.5, 'pending_intents': 7}},
+        {'stream': initial['stats_stream'], 'seq': seq + 2, 'changes': {'pending_intents': 8}}
+    ]
+
+    # A client that missed a delta asks for the full state
+    client.emit('resync')
+    [(event_type, snapshot, _)] = events(client.get_received())
+    assert event_type == 'stats_snapshot'
+    assert snapshot['seq'] == seq + 2 and snapshot['state']['pending_intents'] == 8
+    client.disconnect()
+
+def test_reconnecting_client_gets_only_missed_events(service, app):
+    client, _, [initial] = connect(service, app)
+    client.disconnect()
+
+    for tx_id in ('tx-a', 'tx-b', 'tx-c'):
+        event_bus.publish('transactions', {'id': tx_id})
+
+    client, received, initial_after = connect(service, app, auth={'resume': {'positions': initial['positions']}})
+    assert initial_after == []
+    assert [packet['name'] for packet in received] == ['resumed', 'data_batch']
+    assert received[0]['args'][0]['replayed'] == 3
+
+    batch = received[1]['args'][0]
+    replayed = [message for message in batch if message['type'] == 'new_transaction']
+    assert [message['data']['id'] for message in replayed] == ['tx-a', 'tx-b', 'tx-c']
+    assert [message['seq'] for message in replayed] == list(range(
+        initial['positions']['transactions']['seq'] + 1, initial['positions']['transactions']['seq'] + 4
+    ))
+    assert batch[-1]['type'] == 'stats_snapshot'
+    client.disconnect()
+
+def test_unknown_position_falls_back_to_initial_data(service, app):
+    positions = {topic: {'stream': 'restarted', 'seq': 5} for topic in REPLAY_TOPICS}
+    client, _, [initial] = connect(service, app, auth={'resume': {'positions': positions}})
+    assert initial['positions']['transactions']['stream'] == event_bus.stream
+    assert service.get_metrics()['resume']['snapshot_fallbacks'] >= 1
+    client.disconnect()
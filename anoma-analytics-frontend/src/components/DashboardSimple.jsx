@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { 
   BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer,
   LineChart, Line, PieChart, Pie, Cell, AreaChart, Area
@@ -8,6 +8,7 @@ import {
   Clock, Users, Network, ArrowUpRight, ArrowDownRight
 } from 'lucide-react'
 import { api } from '../utils/api'
+import { subscribeOverview } from '../utils/stream'
 
 const COLORS = ['#3B82F6', '#10B981', '#F59E0B', '#EF4444', '#8B5CF6', '#06B6D4']
 
@@ -16,21 +17,25 @@ export function DashboardSimple() {
   const [transactionStats, setTransactionStats] = useState(null)
   const [intentStats, setIntentStats] = useState(null)
   const [networkStats, setNetworkStats] = useState(null)
+  const [overview, setOverview] = useState(null)
   const [loading, setLoading] = useState(true)
+  const lastFetch = useRef(0)
 
   useEffect(() => {
     fetchDashboardData()
     
-    // Auto-refresh every 30 seconds
-    const interval = setInterval(() => {
-      fetchDashboardData()
-    }, 30000)
-    
-    return () => clearInterval(interval)
+    // Stat cards follow the live overview; charts refresh at most every 30 seconds, and only when data changed
+    return subscribeOverview((state) => {
+      setOverview(state)
+      if (Date.now() - lastFetch.current >= 30000) {
+        fetchDashboardData()
+      }
+    })
   }, [])
 
   const fetchDashboardData = async () => {
     try {
+      lastFetch.current = Date.now()
       setLoading(true)
       
       // Fetch working endpoints only
@@ -67,11 +72,11 @@ export function DashboardSimple() {
     )
   }
 
-  // Calculate overview data from available stats
-  const totalResources = resourceStats?.distribution_by_kind?.reduce((sum, item) => sum + item.count, 0) || 50
-  const totalTransactions = transactionStats?.daily_volume?.reduce((sum, item) => sum + item.count, 0) || 100
-  const totalIntents = intentStats?.distribution_by_status?.reduce((sum, item) => sum + item.count, 0) || 75
-  const currentBlock = networkStats?.stats?.length ? networkStats.stats[networkStats.stats.length - 1]?.block_height || 1049 : 1049
+  // Live overview when streamed, otherwise calculated from available stats
+  const totalResources = overview?.total_resources ?? (resourceStats?.distribution_by_kind?.reduce((sum, item) => sum + item.count, 0) || 50)
+  const totalTransactions = overview?.total_transactions ?? (transactionStats?.daily_volume?.reduce((sum, item) => sum + item.count, 0) || 100)
+  const totalIntents = overview?.total_intents ?? (intentStats?.distribution_by_status?.reduce((sum, item) => sum + item.count, 0) || 75)
+  const currentBlock = overview?.current_block_height ?? (networkStats?.stats?.length ? networkStats.stats[networkStats.stats.length - 1]?.block_height || 1049 : 1049)
 
   const statCards = [
     {
@@ -1,23 +1,28 @@
-import React, { useState, useEffect } from 'react'
+import React, { useState, useEffect, useRef } from 'react'
 import { api } from '../utils/api'
+import { subscribeOverview } from '../utils/stream'
 
 export function NetworkStatsPageSimple() {
   const [networkStats, setNetworkStats] = useState([])
+  const [overview, setOverview] = useState(null)
   const [loading, setLoading] = useState(true)
+  const lastFetch = useRef(0)
 
   useEffect(() => {
     fetchNetworkStats()
     
-    // Auto-refresh every 30 seconds
-    const interval = setInterval(() => {
-      fetchNetworkStats()
-    }, 30000)
-    
-    return () => clearInterval(interval)
+    // Current stats follow the live overview; history refreshes at most every 30 seconds, and only when data changed
+    return subscribeOverview((state) => {
+      setOverview(state)
+      if (Date.now() - lastFetch.current >= 30000) {
+        fetchNetworkStats()
+      }
+    })
   }, [])
 
   const fetchNetworkStats = async () => {
     try {
+      lastFetch.current = Date.now()
       const data = await api.get('/api/analytics/stats/network?hours=168') // 7 days
       setNetworkStats(data.stats || [])
     } catch (error) {
@@ -27,7 +32,14 @@ export function NetworkStatsPageSimple() {
     }
   }
 
-  const latest = networkStats[networkStats.length - 1] || {}
+  const latestSample = networkStats[networkStats.length - 1] || {}
+  const latest = overview ? {
+    ...latestSample,
+    tps: overview.current_tps,
+    avg_processing_time_ms: overview.avg_processing_time_ms,
+    active_resources: overview.active_resources,
+    pending_intents: overview.pending_intents
+  } : latestSample
 
   return (
     <div className="space-y-6 p-6">
@@ -147,7 +159,7 @@ export function NetworkStatsPageSimple() {
             <h4 className="font-medium mb-2">Performance Metrics</h4>
             <ul className="space-y-2 text-sm text-gray-600 dark:text-gray-400">
               <li>• Average TPS: {networkStats.length > 0 ? (networkStats.reduce((sum, stat) => sum + (stat.tps || 0), 0) / networkStats.length).toFixed(2) : '0.00'}</li>
-              <li>• Peak TPS: {networkStats.length > 0 ? Math.max(...networkStats.map(stat => stat.tps || 0)).toFixed(2) : '0.00'}</li>
+              <li>• Peak TPS: {networkStats.length > 0 ? Math.max(...networkStats.map(stat => stat.tps_max ?? stat.tps ?? 0)).toFixed(2) : '0.00'}</li>
               <li>• Average Processing Time: {networkStats.length > 0 ? (networkStats.reduce((sum, stat) => sum + (stat.avg_processing_time_ms || 0), 0) / networkStats.length).toFixed(0) : '0'}ms</li>
             </ul>
           </div>
@@ -0,0 +1,28 @@
+// Live overview over Server-Sent Events: one long-lived request per tab instead of polling
+import { API_BASE_URL } from './api'
+
+export const subscribeOverview = (onChange) => {
+  const source = new EventSource(`${API_BASE_URL}/api/analytics/stream`)
+  let current = null // { stream, seq, state }
+
+  // Sent on connect, and on reconnect when the missed deltas are no longer available
+  source.addEventListener('snapshot', (event) => {
+    current = JSON.parse(event.data)
+    onChange(current.state, current.state)
+  })
+
+  source.addEventListener('stats_delta', (event) => {
+    const delta = JSON.parse(event.data)
+    // Deltas around a reconnect may arrive twice
+    if (!current || delta.stream !== current.stream || delta.seq <= current.seq) return
+    current = { ...current, seq: delta.seq, state: { ...current.state, ...delta.changes } }
+    onChange(current.state, delta.changes)
+  })
+
+  // EventSource reconnects by itself, sending the last id it received as Last-Event-ID
+  source.onerror = () => {
+    console.warn('Overview stream interrupted, reconnecting')
+  }
+
+  return () => source.close()
+}